@@ -0,0 +1,604 @@
+"""
+ADF Module
+
+Conversion of Atlassian Document Format (ADF), the JSON document model Jira
+Cloud uses for rich text fields, to plain text and to and from the
+lightweight markup used for Test Plan content.
+
+The walker is iterative: it keeps its own stack instead of recursing, so
+deeply nested documents cannot hit Python's recursion limit, and it appends
+to a single output buffer in one pass over the tree.
+"""
+
+import logging
+import re
+import time
+from typing import Any, List, Optional
+
+from logger import get_logger, log_exceptions
+
+logger = get_logger(__name__)
+
+BULLET = "• "
+INDENT = "  "
+CELL_SEPARATOR = " | "
+
+_ENTER = 0
+_EXIT = 1
+
+# Containers whose children are simply concatenated
+_BLOCK_END_NEWLINE = {"paragraph", "heading", "codeBlock", "table", "mediaGroup", "mediaSingle"}
+
+
+def _ensure_newline(out: List[str]) -> None:
+    if out and not out[-1].endswith("\n"):
+        out.append("\n")
+
+
+def _inline_atom(node_type: str, node: dict) -> str:
+    """Text for inline nodes that carry their text in ``attrs``."""
+    attrs = node.get("attrs") or {}
+    if node_type == "mention":
+        text = attrs.get("text") or attrs.get("id") or ""
+        return text if text.startswith("@") else f"@{text}"
+    if node_type == "emoji":
+        return attrs.get("text") or attrs.get("shortName") or ""
+    if node_type in ("inlineCard", "blockCard", "embedCard"):
+        return attrs.get("url") or ""
+    if node_type == "status":
+        return attrs.get("text") or ""
+    if node_type == "date":
+        try:
+            return time.strftime("%Y-%m-%d", time.gmtime(int(attrs.get("timestamp")) / 1000))
+        except (TypeError, ValueError):
+            return ""
+    return ""
+
+
+@log_exceptions
+def adf_to_text(node: Any) -> str:
+    """
+    Extract plain text from an ADF document, node or list of nodes.
+
+    Paragraphs and headings end with a newline; list items are prefixed with
+    ``• `` (bullet lists) or their number (ordered lists) and indented per
+    nesting level; table rows become one line with cells separated by ``|``;
+    mentions, emoji, status lozenges, dates and smart links use their text.
+
+    Args:
+        node: ADF dict, list of nodes, plain string or None
+
+    Returns:
+        Plain text
+    """
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return node
+
+    out: List[str] = []
+    # One entry per open list: [ordered, next item number]
+    lists: List[List[Any]] = []
+    # (action, node, buffer position when the node was entered)
+    stack: List[tuple] = [(_ENTER, node, 0)]
+
+    append = out.append
+    push = stack.append
+    pop = stack.pop
+
+    while stack:
+        action, item, mark = pop()
+
+        if action == _EXIT:
+            node_type = item.get("type", "")
+            if node_type == "paragraph":
+                out.append("\n")
+            elif node_type in _BLOCK_END_NEWLINE:
+                _ensure_newline(out)
+            elif node_type in ("bulletList", "orderedList"):
+                lists.pop()
+                _ensure_newline(out)
+                if not lists:
+                    # Blank line after a top-level list separates it from what follows
+                    out.append("\n")
+            elif node_type == "listItem":
+                _ensure_newline(out)
+            elif node_type in ("tableCell", "tableHeader"):
+                cell = " ".join("".join(out[mark:]).split())
+                del out[mark:]
+                out.append(cell)
+                out.append(CELL_SEPARATOR)
+            elif node_type == "tableRow":
+                if out and out[-1] == CELL_SEPARATOR:
+                    out.pop()
+                out.append("\n")
+            elif node_type == "blockquote":
+                quoted = "".join(out[mark:]).rstrip("\n")
+                del out[mark:]
+                out.append("\n".join("> " + line for line in quoted.split("\n")))
+                out.append("\n")
+            continue
+
+        if isinstance(item, list):
+            for child in reversed(item):
+                push((_ENTER, child, 0))
+            continue
+        if isinstance(item, str):
+            append(item)
+            continue
+        if not isinstance(item, dict):
+            continue
+
+        content = item.get("content")
+        node_type = item.get("type", "")
+        if "text" in item:
+            text = item["text"]
+            if text:
+                append(text)
+            if not content:
+                # Leaf text node (the bulk of any document): nothing to close
+                continue
+        elif node_type == "hardBreak":
+            out.append("\n")
+        elif node_type == "rule":
+            _ensure_newline(out)
+            out.append("---\n")
+        elif node_type in ("bulletList", "orderedList"):
+            _ensure_newline(out)
+            start = (item.get("attrs") or {}).get("order", 1) if node_type == "orderedList" else 1
+            lists.append([node_type == "orderedList", start if isinstance(start, int) else 1])
+        elif node_type == "listItem":
+            _ensure_newline(out)
+            indent = INDENT * (len(lists) - 1) if lists else ""
+            if lists and lists[-1][0]:
+                out.append(f"{indent}{lists[-1][1]}. ")
+                lists[-1][1] += 1
+            else:
+                out.append(indent + BULLET)
+        elif node_type in ("codeBlock", "blockquote", "table", "heading"):
+            _ensure_newline(out)
+        else:
+            atom = _inline_atom(node_type, item)
+            if atom:
+                out.append(atom)
+
+        push((_EXIT, item, len(out)))
+        if content and isinstance(content, list):
+            for child in reversed(content):
+                push((_ENTER, child, 0))
+
+    result = "".join(out)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Extracted %d characters of text from ADF", len(result))
+    return result
+
+
+# --- Markup <-> ADF -------------------------------------------------------
+#
+# Test Plan content is edited as lightweight markup (the dialect markup.py
+# renders) and written back as ADF. ``text_to_adf`` builds ADF line by line;
+# ``adf_to_markup`` is its inverse, so for paragraphs, headings, nested bullet
+# and ordered lists (with their numbering), code blocks, quotes, rules and
+# strong/em/code/strike/link marks, ADF -> markup -> ADF gives back the same
+# document. Other nodes (tables, media, mentions) are written as their text.
+
+LIST_ITEM_LINE = re.compile(r"^(?P<indent>\s*)(?:(?P<bullet>[-*+•])|(?P<number>\d+)\.)(?:\s+(?P<text>.*))?$")
+HEADING_LINE = re.compile(r"^(?P<hashes>#{1,6})\s+(?P<text>.*?)\s*$")
+FENCE_LINE = re.compile(r"^\s*```\s*(?P<language>[\w+#.-]*)\s*$")
+RULE_LINE = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+QUOTE_LINE = re.compile(r"^\s*>\s?(?P<text>.*)$")
+# Inside emphasis a '*' is either escaped, inside a code span or part of a
+# nested span, so "***a***" (strong around em) and "**a***b*" (strong, then
+# em) split where the serializer put the delimiters
+_EM_BODY = r"(?:[^*\\`]|\\.|`[^`]+`)+?"
+INLINE_TOKEN = re.compile(
+    r"\\(?P<escaped>[\\`*_\[\]~#>.+•-])"
+    r"|`(?P<code>[^`]+)`"
+    rf"|\*\*(?P<strong>(?:[^*\\`]|\\.|`[^`]+`|\*{_EM_BODY}\*)+?)\*\*"
+    r"|\*\*(?P<strong_loose>.+?)\*\*"
+    r"|~~(?P<strike>.+?)~~"
+    rf"|\*(?P<em>{_EM_BODY})\*"
+    r"|(?<!\w)_(?P<em_underscore>[^_]+?)_(?!\w)"
+    r"|\[(?P<label>[^\]]+)\]\((?P<href>[^)\s]+)\)"
+)
+
+# Canonical mark order, outermost first; the serializer nests marks this way
+MARK_ORDER = ("link", "strong", "em", "strike", "code")
+_MARK_RANK = {name: rank for rank, name in enumerate(MARK_ORDER)}
+# em is written as *...*, not _..._: underscores are not delimiters inside a
+# word, so "user" + em("id") + "x" would not read back as written
+_MARK_DELIMITERS = {"strong": ("**", "**"), "em": ("*", "*"), "strike": ("~~", "~~"), "code": ("`", "`")}
+
+_ESCAPE_TEXT = re.compile(r"([\\`*\[\]~])|(?<!\w)_|_(?!\w)")
+_ESCAPE_LINE_START = re.compile(r"^(\s*)(#{1,6}\s|[-*+•>]\s|(\d+)\.\s|```|-{3,}\s*$)")
+
+
+def _sorted_marks(marks: List[dict]) -> List[dict]:
+    return sorted(marks, key=lambda mark: _MARK_RANK.get(mark.get("type"), len(MARK_ORDER)))
+
+
+def _add_text(nodes: List[dict], text: str, marks: List[dict]) -> None:
+    """Append a text node, merging it into the previous one when the marks match."""
+    if not text:
+        return
+    if nodes and nodes[-1].get("type") == "text" and nodes[-1].get("marks", []) == marks:
+        nodes[-1]["text"] += text
+        return
+    node = {"type": "text", "text": text}
+    if marks:
+        node["marks"] = list(marks)
+    nodes.append(node)
+
+
+def parse_inline(text: str, marks: Optional[List[dict]] = None, nodes: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Parse one line of inline markup into ADF text nodes.
+
+    Args:
+        text: Markup such as ``**bold** and [a link](https://...)``
+        marks: Marks applied to everything in ``text`` (used for nesting)
+        nodes: List to append to (adjacent nodes with equal marks are merged)
+
+    Returns:
+        List of ADF text nodes
+    """
+    marks = marks or []
+    nodes = [] if nodes is None else nodes
+    position = 0
+    for match in INLINE_TOKEN.finditer(text):
+        _add_text(nodes, text[position:match.start()], marks)
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "escaped":
+            _add_text(nodes, match.group("escaped"), marks)
+        elif kind == "code":
+            _add_text(nodes, match.group("code"), _sorted_marks(marks + [{"type": "code"}]))
+        elif kind == "href":
+            link = {"type": "link", "attrs": {"href": match.group("href")}}
+            parse_inline(match.group("label"), _sorted_marks(marks + [link]), nodes)
+        else:
+            mark_type = {"em_underscore": "em", "strong_loose": "strong"}.get(kind, kind)
+            parse_inline(match.group(kind), _sorted_marks(marks + [{"type": mark_type}]), nodes)
+    _add_text(nodes, text[position:], marks)
+    return nodes
+
+
+class AdfBuilder:
+    """Builds an ADF document from markup fed one line at a time.
+
+    Blank lines end paragraphs and lists; consecutive text lines form one
+    paragraph joined by hard breaks. List items indented deeper than the item
+    above nest inside it, and an ordered list keeps its first number.
+    """
+
+    def __init__(self):
+        self.content: List[dict] = []
+        self._paragraph: Optional[List[dict]] = None
+        # Open lists, innermost last: [indent width, list node, current item]
+        self._lists: List[List[Any]] = []
+        self._code: Optional[List[str]] = None
+        self._code_language = ""
+        self._quote: Optional[List[str]] = None
+
+    def feed(self, line: str) -> None:
+        if self._code is not None:
+            if FENCE_LINE.match(line):
+                self._end_code()
+            else:
+                self._code.append(line)
+            return
+
+        quote = QUOTE_LINE.match(line)
+        if self._quote is not None:
+            if quote:
+                self._quote.append(quote.group("text"))
+                return
+            self._end_quote()
+
+        if not line.strip():
+            self._end_block()
+            return
+
+        fence = FENCE_LINE.match(line)
+        if fence:
+            self._end_block()
+            self._code, self._code_language = [], fence.group("language")
+            return
+        if quote:
+            self._end_block()
+            self._quote = [quote.group("text")]
+            return
+        if RULE_LINE.match(line):
+            self._end_block()
+            self.content.append({"type": "rule"})
+            return
+        heading = HEADING_LINE.match(line)
+        if heading:
+            self._end_block()
+            node = {"type": "heading", "attrs": {"level": len(heading.group("hashes"))}}
+            inline = parse_inline(heading.group("text"))
+            if inline:
+                node["content"] = inline
+            self.content.append(node)
+            return
+        item = LIST_ITEM_LINE.match(line)
+        if item:
+            self._list_item(item)
+            return
+
+        if self._lists and line[:1].isspace():
+            # Indented continuation of the current list item
+            paragraph = self._lists[-1][2]["content"][0]
+            paragraph.setdefault("content", []).append({"type": "hardBreak"})
+            parse_inline(line.strip(), nodes=paragraph["content"])
+            return
+        self._end_lists()
+        if self._paragraph is None:
+            self._paragraph = []
+        elif self._paragraph:
+            self._paragraph.append({"type": "hardBreak"})
+        parse_inline(line.strip(), nodes=self._paragraph)
+
+    def build(self) -> dict:
+        """Close open blocks and return the document."""
+        self._end_code()
+        self._end_quote()
+        self._end_block()
+        return {"type": "doc", "version": 1, "content": self.content}
+
+    def _list_item(self, match) -> None:
+        self._end_paragraph()
+        width = len(match.group("indent").expandtabs(4))
+        number = match.group("number")
+        list_type = "orderedList" if number is not None else "bulletList"
+        lists = self._lists
+        while len(lists) > 1 and width <= lists[-2][0]:
+            lists.pop()
+        if lists and width > lists[-1][0]:
+            lists.append([width, self._new_list(lists[-1][2]["content"], list_type, number), None])
+        elif not lists:
+            lists.append([width, self._new_list(self.content, list_type, number), None])
+        elif lists[-1][1]["type"] != list_type:
+            parent = lists[-2][2]["content"] if len(lists) > 1 else self.content
+            lists[-1] = [min(lists[-1][0], width), self._new_list(parent, list_type, number), None]
+        else:
+            lists[-1][0] = min(lists[-1][0], width)
+        paragraph = {"type": "paragraph"}
+        inline = parse_inline((match.group("text") or "").strip())
+        if inline:
+            paragraph["content"] = inline
+        item = {"type": "listItem", "content": [paragraph]}
+        lists[-1][1]["content"].append(item)
+        lists[-1][2] = item
+
+    @staticmethod
+    def _new_list(container: List[dict], list_type: str, number: Optional[str]) -> dict:
+        node: dict = {"type": list_type, "content": []}
+        if number is not None and int(number) != 1:
+            node["attrs"] = {"order": int(number)}
+        container.append(node)
+        return node
+
+    def _end_paragraph(self) -> None:
+        if self._paragraph:
+            self.content.append({"type": "paragraph", "content": self._paragraph})
+        self._paragraph = None
+
+    def _end_lists(self) -> None:
+        self._lists = []
+
+    def _end_block(self) -> None:
+        self._end_paragraph()
+        self._end_lists()
+
+    def _end_code(self) -> None:
+        if self._code is None:
+            return
+        node: dict = {"type": "codeBlock"}
+        if self._code_language:
+            node["attrs"] = {"language": self._code_language}
+        text = "\n".join(self._code)
+        if text:
+            node["content"] = [{"type": "text", "text": text}]
+        self.content.append(node)
+        self._code = None
+        self._code_language = ""
+
+    def _end_quote(self) -> None:
+        if self._quote is None:
+            return
+        lines, self._quote = self._quote, None
+        inner = AdfBuilder()
+        for line in lines:
+            inner.feed(line)
+        content = inner.build()["content"]
+        if content:
+            self.content.append({"type": "blockquote", "content": content})
+
+
+@log_exceptions
+def text_to_adf(text: Optional[str]) -> dict:
+    """
+    Convert markup (or plain text) to an ADF document.
+
+    Args:
+        text: Markup in the dialect produced by :func:`adf_to_markup`
+
+    Returns:
+        ADF ``doc`` node; empty paragraphs and text nodes are never emitted
+    """
+    builder = AdfBuilder()
+    for line in (text or "").split("\n"):
+        builder.feed(line.rstrip("\r"))
+    return builder.build()
+
+
+def escape_markup(text: str) -> str:
+    """
+    Escape characters :func:`parse_inline` would read as markup.
+
+    Use it on plain text (e.g. generated scenarios) inserted into markup that
+    goes through :func:`text_to_adf`, so ``2*3*4`` stays literal.
+
+    Args:
+        text: Plain text
+
+    Returns:
+        Markup that parses back to ``text``
+    """
+    return _ESCAPE_TEXT.sub(lambda m: "\\" + m.group(0), text)
+
+
+
+def _escape_line_start(line: str) -> str:
+    match = _ESCAPE_LINE_START.match(line)
+    if not match:
+        return line
+    start = match.end(1)
+    if match.group(3):
+        # "12. " -> "12\. "
+        dot = start + len(match.group(3))
+        return line[:dot] + "\\" + line[dot:]
+    return line[:start] + "\\" + line[start:]
+
+
+def _mark_open(mark: dict) -> str:
+    if mark.get("type") == "link":
+        return "["
+    return _MARK_DELIMITERS.get(mark.get("type"), ("", ""))[0]
+
+
+def _mark_close(mark: dict) -> str:
+    if mark.get("type") == "link":
+        return "](" + (mark.get("attrs") or {}).get("href", "") + ")"
+    return _MARK_DELIMITERS.get(mark.get("type"), ("", ""))[1]
+
+
+def inline_to_markup(nodes: List[dict]) -> List[str]:
+    """
+    Serialize inline ADF nodes; returns one string per line (hard breaks split lines).
+
+    Marks stay open across adjacent text nodes that share them, so
+    ``**a *b***`` is written as such rather than as two separate strong runs.
+    """
+    lines: List[str] = []
+    out: List[str] = []
+    active: List[dict] = []
+
+    def close_to(depth: int) -> None:
+        while len(active) > depth:
+            out.append(_mark_close(active.pop()))
+
+    for node in nodes or []:
+        node_type = node.get("type")
+        if node_type == "hardBreak":
+            close_to(0)
+            lines.append("".join(out))
+            out = []
+            continue
+        if node_type == "text":
+            text = node.get("text") or ""
+            marks = [m for m in _sorted_marks(node.get("marks") or []) if m.get("type") in _MARK_RANK]
+        else:
+            text, marks = _inline_atom(node_type or "", node), []
+        if not text:
+            continue
+        common = 0
+        while common < len(active) and common < len(marks) and active[common] == marks[common]:
+            common += 1
+        close_to(common)
+        for mark in marks[common:]:
+            out.append(_mark_open(mark))
+            active.append(mark)
+        out.append(text if active and active[-1].get("type") == "code" else escape_markup(text))
+    close_to(0)
+    lines.append("".join(out))
+    return lines
+
+
+def _block_to_markup(node: dict, out: List[str], indent: str = "") -> None:
+    node_type = node.get("type")
+    content = node.get("content") or []
+    if node_type == "paragraph":
+        lines = inline_to_markup(content)
+        if any(lines):
+            out.extend(indent + _escape_line_start(line) for line in lines)
+    elif node_type == "heading":
+        level = (node.get("attrs") or {}).get("level", 1)
+        out.append(indent + "#" * max(1, min(int(level), 6)) + " " + " ".join(inline_to_markup(content)))
+    elif node_type in ("bulletList", "orderedList"):
+        number = (node.get("attrs") or {}).get("order", 1) if node_type == "orderedList" else None
+        for item in content:
+            marker = "- " if number is None else f"{number}. "
+            first, rest = True, []
+            for child in item.get("content") or []:
+                if child.get("type") in ("bulletList", "orderedList"):
+                    if first:
+                        out.append(indent + marker.rstrip())
+                        first = False
+                    _block_to_markup(child, out, indent + INDENT)
+                    continue
+                child_lines: List[str] = []
+                _block_to_markup(child, child_lines)
+                for line in child_lines:
+                    if first:
+                        out.append(indent + marker + line)
+                        first = False
+                    else:
+                        # Further lines of the item continue its paragraph
+                        out.append(indent + INDENT + line)
+            if first:
+                out.append(indent + marker.rstrip())
+            if number is not None:
+                number += 1
+    elif node_type == "codeBlock":
+        language = (node.get("attrs") or {}).get("language") or ""
+        out.append(indent + "```" + language)
+        out.extend(indent + line for line in "".join(c.get("text", "") for c in content).split("\n"))
+        out.append(indent + "```")
+    elif node_type == "blockquote":
+        inner: List[str] = []
+        for index, child in enumerate(content):
+            if index:
+                inner.append("")
+            _block_to_markup(child, inner)
+        out.extend(indent + ("> " + line if line else ">") for line in inner)
+    elif node_type == "rule":
+        out.append(indent + "---")
+    else:
+        text = adf_to_text(node).strip()
+        if text:
+            out.extend(indent + _escape_line_start(escape_markup(line)) for line in text.split("\n"))
+
+
+@log_exceptions
+def adf_to_markup(node: Any) -> str:
+    """
+    Serialize an ADF document to the markup :func:`text_to_adf` reads.
+
+    Top-level blocks are separated by a blank line. Tables, media, panels and
+    other nodes without a markup form are written as their plain text.
+
+    Args:
+        node: ADF document or node, plain string or None
+
+    Returns:
+        Markup text
+    """
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, list):
+        blocks = node
+    elif node.get("type") == "doc":
+        blocks = node.get("content") or []
+    else:
+        blocks = [node]
+    parts = []
+    for block in blocks:
+        lines: List[str] = []
+        _block_to_markup(block, lines)
+        if lines:
+            parts.append("\n".join(lines))
+    return "\n\n".join(parts)
@@ -1,5 +1,18 @@
 # ai package initializer
-from .google_ai import GoogleAIChat
+#
+# Providers are resolved through ai.registry and imported lazily, so importing
+# this package does not pull in any provider SDK.
+from .base import BaseAIChat
+from .registry import create_chat, get_provider, provider_stats, register_provider
 
-__all__ = ["GoogleAIChat"]
+__all__ = ["BaseAIChat", "GoogleAIChat", "FakeAIChat", "create_chat", "get_provider",
+           "provider_stats", "register_provider"]
 
+
+def __getattr__(name):
+    # Backwards compatible access to provider classes without eager imports
+    if name == "GoogleAIChat":
+        return get_provider("google")
+    if name == "FakeAIChat":
+        return get_provider("fake")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,241 @@
+"""
+Admission Module
+
+Fair-share admission control in front of AI provider calls: per-user
+concurrency and rate limits, a process-wide concurrency cap, and bounded
+per-user queues served round-robin.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+from logger import get_logger
+from metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+ADMISSION_WAIT = REGISTRY.histogram(
+    "ai_admission_wait_seconds", "Time AI requests spent queued before admission",
+    ("outcome",))
+ADMISSION_REJECTED = REGISTRY.counter(
+    "ai_admission_rejected_total", "AI requests shed by admission control",
+    ("reason",))
+
+
+class AdmissionRejected(Exception):
+    """Raised when an AI request is shed; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class _TokenBucket:
+    """Per-user request rate limit (``rate`` per second, bursts up to ``burst``)."""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume a token; return 0, or the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self) -> None:
+        """Return a token taken by a request that was then not admitted."""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class _Waiter:
+    __slots__ = ('user', 'granted')
+
+    def __init__(self, user: str):
+        self.user = user
+        self.granted = False
+
+
+class AdmissionController:
+    """Fair-share gate in front of AI provider calls.
+
+    Each user (any key the caller chooses; the app uses the Jira site and
+    account) may run at most ``per_user_concurrency`` AI requests at once
+    and start at most ``per_user_rate`` per second (with a burst allowance);
+    the whole process runs at most ``max_concurrency``.
+    Requests that cannot start immediately wait in a per-user FIFO queue, and
+    freed slots are handed to users round-robin, so a user with many queued
+    requests cannot starve one with a single request. A request waits at most
+    ``max_wait`` seconds and each user may have at most ``max_queued`` waiting;
+    beyond that it is rejected with a retry hint instead of tying up a worker.
+    """
+
+    def __init__(self, max_concurrency: int = 8, per_user_concurrency: int = 2,
+                 per_user_rate: float = 0.5, per_user_burst: float = 5,
+                 max_queued: int = 4, max_wait: float = 10.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_user_concurrency = max(1, per_user_concurrency)
+        self.per_user_rate = per_user_rate
+        self.per_user_burst = max(1.0, per_user_burst)
+        self.max_queued = max(1, max_queued)
+        self.max_wait = max(0.0, max_wait)
+        self._cond = threading.Condition()
+        self._active: Dict[str, int] = {}
+        self._total_active = 0
+        self._queues: Dict[str, Deque[_Waiter]] = {}
+        # Users with waiters, in round-robin order
+        self._ring: Deque[str] = deque()
+        self._buckets: Dict[str, _TokenBucket] = {}
+        # Smoothed time a slot is held, used for retry hints
+        self._avg_hold = 1.0
+
+    @contextmanager
+    def admit(self, user: str, max_wait: Optional[float] = None) -> Iterator[None]:
+        """Hold an AI slot for ``user`` for the duration of the block.
+
+        Raises:
+            AdmissionRejected: rate limit hit, queue full, or no slot within ``max_wait``
+        """
+        self._acquire(user, self.max_wait if max_wait is None else max_wait)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(user, time.monotonic() - start)
+
+    def stats(self) -> dict:
+        """Current occupancy (for the metrics endpoint)."""
+        with self._cond:
+            return {
+                'active': self._total_active,
+                'max_concurrency': self.max_concurrency,
+                'queued': sum(len(q) for q in self._queues.values()),
+                'users_active': len(self._active),
+                'users_queued': len(self._queues),
+            }
+
+    def _acquire(self, user: str, max_wait: float) -> None:
+        started = time.monotonic()
+        with self._cond:
+            bucket = None
+            if self.per_user_rate > 0:
+                bucket = self._buckets.get(user)
+                if bucket is None:
+                    bucket = self._buckets[user] = _TokenBucket(self.per_user_rate, self.per_user_burst)
+                wait = bucket.take()
+                if wait:
+                    self._reject('rate_limited', wait)
+            try:
+                self._enqueue_and_wait(user, started, max_wait)
+            except AdmissionRejected:
+                # A request shed by the queue never ran, so it must not count
+                # against the user's rate limit
+                if bucket is not None:
+                    bucket.refund()
+                raise
+        waited = time.monotonic() - started
+        ADMISSION_WAIT.observe(waited, outcome='admitted')
+        if waited > 1:
+            logger.info('AI request for %s admitted after %.2fs in queue', user, waited)
+
+    def _enqueue_and_wait(self, user: str, started: float, max_wait: float) -> None:
+        """Queue ``user`` and wait for a slot (caller holds the lock)."""
+        queue = self._queues.get(user)
+        if queue is not None and len(queue) >= self.max_queued:
+            self._reject('queue_full', self._retry_hint(user))
+        waiter = _Waiter(user)
+        if queue is None:
+            queue = self._queues[user] = deque()
+            self._ring.append(user)
+        queue.append(waiter)
+        self._dispatch()
+        if not waiter.granted and max_wait <= 0:
+            self._remove_waiter(waiter)
+            self._reject('busy', self._retry_hint(user))
+        deadline = started + max_wait
+        while not waiter.granted:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._remove_waiter(waiter)
+                ADMISSION_WAIT.observe(time.monotonic() - started, outcome='timeout')
+                self._reject('wait_timeout', self._retry_hint(user))
+            self._cond.wait(remaining)
+
+    def _release(self, user: str, held: float) -> None:
+        with self._cond:
+            self._total_active -= 1
+            remaining = self._active.get(user, 1) - 1
+            if remaining > 0:
+                self._active[user] = remaining
+            else:
+                self._active.pop(user, None)
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * held
+            self._dispatch()
+            self._prune_buckets()
+
+    def _start(self, user: str) -> None:
+        self._total_active += 1
+        self._active[user] = self._active.get(user, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Grant free slots to queued users round-robin (caller holds the lock)."""
+        granted = False
+        skipped = 0
+        while self._ring and self._total_active < self.max_concurrency and skipped < len(self._ring):
+            user = self._ring[0]
+            self._ring.rotate(-1)
+            if self._active.get(user, 0) >= self.per_user_concurrency:
+                skipped += 1
+                continue
+            skipped = 0
+            waiter = self._queues[user].popleft()
+            if not self._queues[user]:
+                del self._queues[user]
+                self._ring.remove(user)
+            waiter.granted = True
+            self._start(user)
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.user)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            return
+        if not queue:
+            del self._queues[waiter.user]
+            self._ring.remove(waiter.user)
+
+    def _retry_hint(self, user: str) -> float:
+        ahead = len(self._queues.get(user, ())) + self._active.get(user, 0)
+        return self._avg_hold * max(1, ahead) / self.per_user_concurrency
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        ADMISSION_REJECTED.inc(reason=reason)
+        logger.warning('AI request rejected by admission control: %s (retry after %.1fs)', reason, retry_after)
+        raise AdmissionRejected(reason, retry_after)
+
+    def _prune_buckets(self) -> None:
+        # Buckets that have refilled completely carry no state worth keeping
+        if len(self._buckets) < 1024:
+            return
+        now = time.monotonic()
+        for user in [u for u, b in self._buckets.items()
+                     if u not in self._active and b.tokens + (now - b.updated) * b.rate >= b.burst]:
+            del self._buckets[user]
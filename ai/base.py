@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+
+class BaseAIChat(ABC):
+    """Common interface implemented by every AI provider.
+
+    Providers return short error strings ("Invalid API Key or unauthorized",
+    "AI service unavailable") instead of raising, so callers can treat all
+    providers the same way.
+    """
+
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+        self.chat = None
+
+    @abstractmethod
+    def start_chat(self, model: Optional[str] = None) -> str:
+        """Create a chat session; returns "Chat started" or an error string."""
+
+    @abstractmethod
+    def send_message(self, message: str) -> str:
+        """Send a message in the current chat and return the response text."""
+
+    def send_message_stream(self, message: str) -> Iterator[str]:
+        """Yield the response in chunks. Providers without streaming yield it whole."""
+        yield self.send_message(message)
+
+    def start_cached_context(self, context: str, ttl_seconds: int = 1800) -> bool:
+        """Upload ``context`` once to a provider-side cache and start a chat bound to it.
+
+        Returns False when the provider has no such cache (the default); callers
+        then include the context in their first message instead.
+        """
+        return False
+
+    def close(self) -> None:
+        """Release provider-side resources such as context caches."""
@@ -0,0 +1,89 @@
+"""
+Chunking Module
+
+Token budgeting for long ticket descriptions: a cheap local token estimate,
+splitting text into chunks on paragraph and line boundaries, and a parallel
+map-reduce that condenses text until it fits the prompt budget.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rough average for English prose with Gemini's tokenizer; deliberately
+# conservative so estimates err towards chunking a little early.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, local token estimate for budgeting (no network round trip)."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most ``max_tokens`` estimated tokens.
+
+    Paragraph boundaries are preferred, then line boundaries; only a single
+    line longer than the budget is cut mid-line.
+    """
+    max_chars = max(1, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+
+    # Each piece carries the separator that preceded it in the original text,
+    # so lines of an oversized paragraph are rejoined with '\n' (and cut lines
+    # with nothing) instead of being spread out into separate paragraphs
+    pieces: List[Tuple[str, str]] = []
+    for paragraph in text.split('\n\n'):
+        if len(paragraph) <= max_chars:
+            pieces.append(('\n\n', paragraph))
+            continue
+        sep = '\n\n'
+        for line in paragraph.split('\n'):
+            while len(line) > max_chars:
+                pieces.append((sep, line[:max_chars]))
+                line, sep = line[max_chars:], ''
+            pieces.append((sep, line))
+            sep = '\n'
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sep, piece in pieces:
+        if current and size + len(sep) + len(piece) > max_chars:
+            chunks.append(''.join(current))
+            current, size = [], 0
+        if current:
+            current.append(sep)
+            size += len(sep)
+        current.append(piece)
+        size += len(piece)
+    if current:
+        chunks.append(''.join(current))
+    return [c for c in chunks if c.strip()]
+
+
+def map_reduce_text(text: str, summarize: Callable[[str, int, int], str], budget_tokens: int,
+                    chunk_tokens: int, max_workers: int = 4, max_rounds: int = 2) -> str:
+    """Condense ``text`` until it fits ``budget_tokens``.
+
+    Each round splits the text into chunks, summarizes them in parallel with
+    ``summarize(chunk, index, total)`` and joins the summaries in their
+    original order. Exceptions raised by ``summarize`` propagate to the caller.
+    """
+    for round_no in range(1, max_rounds + 1):
+        if estimate_tokens(text) <= budget_tokens:
+            break
+        chunks = chunk_text(text, chunk_tokens)
+        logger.info('Condensing description round %d: ~%d tokens in %d chunks',
+                    round_no, estimate_tokens(text), len(chunks))
+        workers = max(1, min(max_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-map') as pool:
+            summaries = list(pool.map(lambda args: summarize(args[1], args[0] + 1, len(chunks)), enumerate(chunks)))
+        text = '\n\n'.join(s.strip() for s in summaries if s and s.strip())
+    return text
@@ -0,0 +1,105 @@
+"""
+Conversations Module
+
+Keeps live per-ticket chat sessions between follow-up questions, so the
+story is sent to the model once per conversation instead of with every turn.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def description_digest(description: str) -> str:
+    return hashlib.sha256((description or '').strip().encode('utf-8')).hexdigest()
+
+
+class Conversation:
+    """A live chat about one ticket that has already been given the story."""
+
+    def __init__(self, chat: Any, digest: str, cached_context: bool):
+        self.chat = chat
+        self.digest = digest
+        self.cached_context = cached_context
+        self.turns = 0
+        self.last_used = time.monotonic()
+        # Chat clients keep turn history and are not safe for concurrent sends
+        self.lock = threading.Lock()
+
+
+class ConversationStore:
+    """In-process, bounded store of per-(session, ticket) chat sessions.
+
+    A conversation is tied to the digest of the description it was started
+    with; looking it up with a different description closes it, so an edited
+    story always starts a fresh conversation. Idle conversations expire after
+    ``ttl`` seconds and the least recently used ones are evicted beyond
+    ``max_conversations``.
+
+    Chat clients cannot be serialized, so conversations are not kept in the
+    shared store: they are lost on restart and each worker has its own.
+    """
+
+    def __init__(self, max_conversations: int = 200, ttl: float = 1800.0):
+        self._items: "OrderedDict[Tuple[str, str], Conversation]" = OrderedDict()
+        self._max = max(1, max_conversations)
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    def get(self, owner: str, ticket_key: str, description: str) -> Optional[Conversation]:
+        """Return the live conversation for this ticket and description, if any."""
+        key = (owner, ticket_key)
+        stale = None
+        with self._lock:
+            conv = self._items.get(key)
+            if conv is None:
+                return None
+            if conv.digest != description_digest(description) or time.monotonic() - conv.last_used > self._ttl:
+                stale = self._items.pop(key)
+                conv = None
+            else:
+                self._items.move_to_end(key)
+                conv.last_used = time.monotonic()
+        if stale is not None:
+            logger.info('Conversation for %s invalidated (description changed or expired)', ticket_key)
+            _close(stale)
+        return conv
+
+    def put(self, owner: str, ticket_key: str, description: str, chat: Any, cached_context: bool) -> Conversation:
+        """Register a newly started conversation, evicting old ones if needed."""
+        conv = Conversation(chat, description_digest(description), cached_context)
+        evicted = []
+        with self._lock:
+            previous = self._items.pop((owner, ticket_key), None)
+            if previous is not None:
+                evicted.append(previous)
+            self._items[(owner, ticket_key)] = conv
+            now = time.monotonic()
+            for k in [k for k, c in self._items.items() if now - c.last_used > self._ttl]:
+                evicted.append(self._items.pop(k))
+            while len(self._items) > self._max:
+                evicted.append(self._items.popitem(last=False)[1])
+        for old in evicted:
+            _close(old)
+        return conv
+
+    def drop(self, owner: str, ticket_key: Optional[str] = None) -> None:
+        """Close one conversation, or all of an owner's conversations."""
+        with self._lock:
+            keys = [k for k in self._items if k[0] == owner and (ticket_key is None or k[1] == ticket_key)]
+            dropped = [self._items.pop(k) for k in keys]
+        for conv in dropped:
+            _close(conv)
+
+
+def _close(conv: Conversation) -> None:
+    try:
+        conv.chat.close()
+    except Exception:
+        logger.exception('Failed to close conversation chat')
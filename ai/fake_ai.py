@@ -0,0 +1,201 @@
+"""
+Fake AI Module
+
+Offline stand-in for the Gemini provider (AI_PROVIDER=fake) used for load and
+failure testing: deterministic scenario text per prompt, simulated latency
+from a configurable distribution, and injected provider errors.
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from logger import get_logger
+
+from .base import BaseAIChat
+from .telemetry import CallTimer
+
+logger = get_logger(__name__)
+
+# Error strings shared with GoogleAIChat so callers cannot tell the providers apart
+UNAUTHORIZED = "Invalid API Key or unauthorized"
+UNAVAILABLE = "AI service unavailable"
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]{3,}")
+
+# create_chat builds a new client per request, so latency and error injection
+# draw from one generator per seed for the whole process; a per-instance
+# generator would replay the same first draw on every call
+_rngs = {}
+_rng_lock = threading.Lock()
+
+
+def _shared_rng(seed: int) -> random.Random:
+    """Return the process-wide generator for ``seed``, seeding it once."""
+    with _rng_lock:
+        rng = _rngs.get(seed)
+        if rng is None:
+            rng = _rngs[seed] = random.Random(seed)
+        return rng
+
+
+class LatencyModel:
+    """Samples simulated response latency in seconds.
+
+    Spec format is ``<distribution>:<params in ms>``:
+    ``fixed:200``, ``uniform:100,500``, ``normal:300,50`` (mean, stddev) or
+    ``lognormal:300,0.5`` (median, sigma).
+    """
+
+    def __init__(self, spec: str, rng: random.Random):
+        self.spec = spec or 'fixed:0'
+        self.rng = rng
+        kind, _, params = self.spec.partition(':')
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(',') if p.strip()] or [0.0]
+        if self.kind not in ('fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {self.spec!r}")
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == 'uniform':
+            ms = self.rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        elif self.kind == 'normal':
+            ms = self.rng.gauss(p[0], p[1] if len(p) > 1 else 0.0)
+        elif self.kind == 'lognormal':
+            ms = p[0] * self.rng.lognormvariate(0.0, p[1] if len(p) > 1 else 0.0)
+        else:
+            ms = p[0]
+        return max(0.0, ms) / 1000.0
+
+
+class FakeAIChat(BaseAIChat):
+    """Deterministic, offline stand-in for GoogleAIChat.
+
+    Produces numbered test-scenario style answers derived from the prompt, so
+    the same prompt always yields the same text. Latency, streaming chunk
+    timing and injected failures are configurable through constructor
+    arguments or the AI_FAKE_* environment variables, which makes the AI
+    endpoints usable for load and latency testing without network access.
+
+    Methods return the same short error strings as GoogleAIChat on failure.
+    """
+
+    def __init__(self, api_key: Optional[str], latency: Optional[str] = None,
+                 chunk_ms: Optional[float] = None, chunk_chars: Optional[int] = None,
+                 error_rate: Optional[float] = None, errors: Optional[str] = None,
+                 timeout_seconds: Optional[float] = None, scenarios: Optional[int] = None,
+                 seed: Optional[int] = None):
+        super().__init__(api_key)
+        env = os.environ.get
+        self.client = object() if api_key else None
+        self.seed = int(seed if seed is not None else env('AI_FAKE_SEED', '0'))
+        self._rng = _shared_rng(self.seed)
+        self.latency = LatencyModel(latency or env('AI_FAKE_LATENCY_MS', 'fixed:0'), self._rng)
+        self.chunk_delay = float(chunk_ms if chunk_ms is not None else env('AI_FAKE_CHUNK_MS', '0')) / 1000.0
+        self.chunk_chars = max(1, int(chunk_chars if chunk_chars is not None else env('AI_FAKE_CHUNK_CHARS', '40')))
+        self.error_rate = float(error_rate if error_rate is not None else env('AI_FAKE_ERROR_RATE', '0'))
+        self.errors = [e.strip().lower() for e in (errors or env('AI_FAKE_ERRORS', '503')).split(',') if e.strip()]
+        self.timeout_seconds = float(timeout_seconds if timeout_seconds is not None else env('AI_FAKE_TIMEOUT_SECONDS', '30'))
+        self.scenario_count = max(1, int(scenarios if scenarios is not None else env('AI_FAKE_SCENARIOS', '5')))
+
+        if not api_key:
+            logger.error('API key missing during FakeAIChat initialization')
+        else:
+            logger.info('FakeAIChat client initialized (latency=%s, error_rate=%s)', self.latency.spec, self.error_rate)
+
+    def start_chat(self, model: str = "fake-model") -> str:
+        """Create a (simulated) chat session."""
+        if not self.client or self._is_rejected_key():
+            return UNAUTHORIZED
+        self.chat = {'model': model, 'turns': 0}
+        return "Chat started"
+
+    def send_message(self, message: str) -> str:
+        """Return a deterministic response after the simulated latency."""
+        timer = CallTimer('fake', self._model(), message)
+        error, error_class = self._begin(message)
+        if error:
+            timer.finish(error_class=error_class)
+            return error
+        time.sleep(self._sample_latency())
+        text = self._respond(message)
+        timer.finish(text)
+        return text
+
+    def send_message_stream(self, message: str) -> Iterator[str]:
+        """Yield the deterministic response in chunks with simulated timing.
+
+        The first chunk arrives after the sampled latency (time to first token),
+        later chunks every ``chunk_ms``.
+        """
+        timer = CallTimer('fake', self._model(), message)
+        error, error_class = self._begin(message)
+        if error:
+            timer.finish(error_class=error_class)
+            yield error
+            return
+        try:
+            time.sleep(self._sample_latency())
+            text = self._respond(message)
+            timer.first_token()
+            for i in range(0, len(text), self.chunk_chars):
+                if i and self.chunk_delay:
+                    time.sleep(self.chunk_delay)
+                yield text[i:i + self.chunk_chars]
+            timer.finish(text)
+        finally:
+            # The consumer closed the generator before the stream ended
+            timer.finish(error_class='Cancelled')
+
+    def _begin(self, message: str) -> Tuple[Optional[str], Optional[str]]:
+        """Start the chat if needed and decide on error injection.
+
+        Returns (error string, error class for telemetry), both None on success.
+        """
+        if not self.client:
+            return UNAUTHORIZED, 'Unauthorized'
+        if not self.chat:
+            start = self.start_chat()
+            if start != "Chat started":
+                return start, 'Unauthorized'
+        self.chat['turns'] += 1
+        with _rng_lock:
+            inject = self.error_rate > 0 and self._rng.random() < self.error_rate
+            kind = self._rng.choice(self.errors) if inject and self.errors else None
+        if not kind:
+            return None, None
+        logger.warning('FakeAIChat injecting error: %s', kind)
+        if kind == '401':
+            return UNAUTHORIZED, 'Unauthorized'
+        if kind == 'timeout':
+            time.sleep(self.timeout_seconds)
+            return UNAVAILABLE, 'Timeout'
+        return UNAVAILABLE, f'HTTP{kind}'
+
+    def _model(self) -> str:
+        return self.chat['model'] if self.chat else 'fake-model'
+
+    def _is_rejected_key(self) -> bool:
+        # Lets tests exercise the unauthorized path without configuring error injection
+        return str(self.api_key).lower().startswith('invalid')
+
+    def _sample_latency(self) -> float:
+        with _rng_lock:
+            return self.latency.sample()
+
+    def _respond(self, message: str) -> str:
+        """Build numbered scenarios from words of the prompt, seeded by its hash."""
+        digest = hashlib.sha256(f"{self.seed}:{message}".encode('utf-8')).digest()
+        rng = random.Random(digest)
+        words: List[str] = _WORD_RE.findall(message) or ['feature']
+        lines = []
+        for i in range(1, self.scenario_count + 1):
+            action = ' '.join(rng.choice(words).lower() for _ in range(3))
+            outcome = ' '.join(rng.choice(words).lower() for _ in range(2))
+            lines.append(f"{i}. Verify that {action} results in {outcome}, including case {digest[i % len(digest)]}.")
+        return '\n'.join(lines)
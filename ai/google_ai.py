@@ -1,34 +1,61 @@
 import logging
-from typing import Optional
+import threading
+import time
+from typing import Iterator, Optional
+
+from logger import object_state, truncated
+
+from .base import BaseAIChat
+from .registry import record_import
+from .telemetry import CallTimer, usage_tokens
 
 logger = logging.getLogger('ai_chat')
 
-# Try to import google-genai
-try:
-    from google import genai  # type: ignore
-    _HAS_GENAI = True
-except Exception as e:
-    genai = None  # type: ignore
-    _HAS_GENAI = False
-    logger.warning('google-genai package not available: %s', str(e))
+# google-genai is imported on first client construction, not at module import,
+# because it is slow to import and most requests never touch the AI endpoints
+genai = None  # type: ignore
+_HAS_GENAI = None
+_genai_lock = threading.Lock()
+
+DEFAULT_MODEL = "gemini-2.0-flash-001"
+
+
+def _load_genai() -> bool:
+    """Import google-genai once; returns True if it is available."""
+    global genai, _HAS_GENAI
+    if _HAS_GENAI is None:
+        with _genai_lock:
+            if _HAS_GENAI is None:
+                start = time.perf_counter()
+                try:
+                    from google import genai as _genai  # type: ignore
+                    genai = _genai
+                    _HAS_GENAI = True
+                except Exception as e:
+                    _HAS_GENAI = False
+                    logger.warning('google-genai package not available: %s', str(e))
+                # Reported as part of the provider's import cost in provider_stats()
+                record_import('google', time.perf_counter() - start)
+    return bool(_HAS_GENAI)
 
 
-class GoogleAIChat:
+class GoogleAIChat(BaseAIChat):
     """Wrapper around google-genai chat functionality.
 
     Methods return simple strings on error for upstream handling.
     """
 
     def __init__(self, api_key: Optional[str]):
-        self.api_key = api_key
+        super().__init__(api_key)
         self.client = None
-        self.chat = None
+        self.model = None
+        self.cache_name = None
 
         if not api_key:
             logger.error('API key missing during GoogleAIChat initialization')
             return
 
-        if not _HAS_GENAI:
+        if not _load_genai():
             logger.error('google-genai package not installed; cannot initialize client')
             return
 
@@ -36,7 +63,7 @@ class GoogleAIChat:
             # Initialize the genai client
             self.client = genai.Client(api_key=api_key)
             logger.info('GoogleAIChat client initialized')
-            logger.debug('Client object: %s', getattr(self.client, '__dict__', str(self.client)))
+            logger.debug('Client object: %s', object_state(self.client))
         except Exception as e:
             msg = str(e)
             if '401' in msg or 'Unauthorized' in msg or 'unauthorized' in msg.lower() or 'invalid' in msg.lower():
@@ -45,7 +72,7 @@ class GoogleAIChat:
                 logger.exception('Failed to initialize Google GenAI client')
             self.client = None
 
-    def start_chat(self, model: str = "gemini-2.0-flash-001") -> str:
+    def start_chat(self, model: str = DEFAULT_MODEL) -> str:
         """Create a chat session with the given model.
 
         Returns "Chat started" on success or an error string on failure.
@@ -57,7 +84,8 @@ class GoogleAIChat:
         try:
             logger.info('Starting chat session with model=%s', model)
             self.chat = self.client.chats.create(model=model)
-            logger.debug('Chat session created: %s', getattr(self.chat, '__dict__', str(self.chat)))
+            self.model = model
+            logger.debug('Chat session created: %s', object_state(self.chat))
             return "Chat started"
         except Exception as e:
             msg = str(e)
@@ -67,6 +95,43 @@ class GoogleAIChat:
             logger.exception('Failed to start chat session')
             return "AI service unavailable"
 
+    def start_cached_context(self, context: str, ttl_seconds: int = 1800, model: str = DEFAULT_MODEL) -> bool:
+        """Store ``context`` in a Gemini context cache and start a chat that reads from it.
+
+        Later messages in this chat then carry only the new instruction. Returns
+        False (leaving no chat started) if caching is unavailable, e.g. because
+        the context is below the model's minimum cacheable size.
+        """
+        if not self.client:
+            return False
+        try:
+            cache = self.client.caches.create(model=model, config={
+                'contents': [context],
+                'ttl': f'{int(ttl_seconds)}s',
+                'display_name': 'jira-agent-hub story context',
+            })
+            self.chat = self.client.chats.create(model=model, config={'cached_content': cache.name})
+            self.cache_name = cache.name
+            self.model = model
+            logger.info('Started chat on cached context %s (model=%s)', cache.name, model)
+            return True
+        except Exception as e:
+            logger.warning('Context caching unavailable, sending context inline: %s', str(e))
+            self.chat = None
+            return False
+
+    def close(self) -> None:
+        """Delete the context cache created by start_cached_context, if any."""
+        if not (self.client and self.cache_name):
+            return
+        try:
+            self.client.caches.delete(name=self.cache_name)
+            logger.info('Deleted context cache %s', self.cache_name)
+        except Exception as e:
+            # The cache expires on its own via its TTL
+            logger.warning('Failed to delete context cache %s: %s', self.cache_name, str(e))
+        self.cache_name = None
+
     def send_message(self, message: str) -> str:
         """Send a user message to the chat and return the AI response text.
 
@@ -82,9 +147,10 @@ class GoogleAIChat:
                 # start_chat already logged details
                 return start
 
+        timer = CallTimer('google', self.model, message)
         try:
-            logger.info('Sending message to GenAI (truncated): %s', (message[:200] + '...') if len(message) > 200 else message)
-            logger.debug('Request payload: %s', {'message': message})
+            logger.info('Sending message to GenAI (%d chars): %s', len(message), truncated(message))
+            logger.debug('Request payload: %s', truncated(message, 10000))
 
             # Send message using the chat session
             response = self.chat.send_message(message)
@@ -143,8 +209,11 @@ class GoogleAIChat:
             if not text:
                 text = str(response)
 
-            logger.info('Received response from GenAI (len=%d)', len(text) if text else 0)
-            logger.debug('Response raw payload: %s', getattr(response, '__dict__', str(response)))
+            prompt_tokens, response_tokens = usage_tokens(response)
+            elapsed = timer.finish(text, prompt_tokens, response_tokens)
+            logger.info('Received response from GenAI (len=%d, %.2fs, tokens in/out=%s/%s)',
+                        len(text) if text else 0, elapsed, prompt_tokens, response_tokens)
+            logger.debug('Response raw payload: %s', object_state(response))
             return text
 
         except Exception as e:
@@ -152,7 +221,55 @@ class GoogleAIChat:
             low = msg.lower()
             # Detect common API key invalid messages returned by GenAI SDK
             if ('401' in msg) or ('unauthorized' in low) or ('api key not valid' in low) or ('api_key_invalid' in low) or ('invalid_argument' in low) or ('invalid' in low and 'key' in low):
+                timer.finish(error_class='Unauthorized')
                 logger.error('Invalid API key or unauthorized during send_message: %s', msg)
                 return "Invalid API Key or unauthorized"
+            timer.finish(error_class=type(e).__name__)
             logger.exception('Exception when calling GenAI send_message')
             return "AI service unavailable"
+
+    def send_message_stream(self, message: str) -> Iterator[str]:
+        """Send a user message and yield the response text as it arrives.
+
+        Yields a single short error string on failure, like send_message returns.
+        """
+        if not self.client:
+            logger.error('send_message_stream called but client is not initialized')
+            yield "Invalid API Key or unauthorized"
+            return
+
+        if not self.chat:
+            start = self.start_chat()
+            if start != "Chat started":
+                yield start
+                return
+
+        timer = CallTimer('google', self.model, message)
+        try:
+            logger.info('Streaming message to GenAI (%d chars): %s', len(message), truncated(message))
+            parts = []
+            usage = (None, None)
+            for chunk in self.chat.send_message_stream(message):
+                text = getattr(chunk, 'text', None)
+                if getattr(chunk, 'usage_metadata', None) is not None:
+                    usage = usage_tokens(chunk)
+                if text:
+                    timer.first_token()
+                    parts.append(text)
+                    yield text
+            elapsed = timer.finish(''.join(parts), *usage)
+            logger.info('Streamed response from GenAI (len=%d, %.2fs)', sum(len(p) for p in parts), elapsed)
+        except Exception as e:
+            msg = str(e)
+            low = msg.lower()
+            if ('401' in msg) or ('unauthorized' in low) or ('api key not valid' in low) or ('api_key_invalid' in low):
+                timer.finish(error_class='Unauthorized')
+                logger.error('Invalid API key or unauthorized during send_message_stream: %s', msg)
+                yield "Invalid API Key or unauthorized"
+                return
+            timer.finish(error_class=type(e).__name__)
+            logger.exception('Exception when calling GenAI send_message_stream')
+            yield "AI service unavailable"
+        finally:
+            # The consumer closed the generator before the stream ended
+            timer.finish(error_class='Cancelled')
@@ -0,0 +1,103 @@
+"""
+Incremental Module
+
+Incremental scenario regeneration: diff two versions of a story description
+line by line, prompt the model with only the changed requirement lines, and
+merge its REMOVE list and new scenarios into the existing ones.
+"""
+
+import difflib
+import re
+from typing import List, NamedTuple, Set, Tuple
+
+_MARKER_RE = re.compile(r'^(?:\d+[.)]|[-*+•])\s*')
+_SPACE_RE = re.compile(r'\s+')
+_REMOVE_RE = re.compile(r'^\s*REMOVE\s*:\s*(.*)$', re.IGNORECASE)
+
+
+class CriteriaDiff(NamedTuple):
+    """Line-level difference between two versions of a story description."""
+    added: List[str]
+    removed: List[str]
+    unchanged: int
+
+    @property
+    def change_ratio(self) -> float:
+        """Share of requirement lines touched by the change (0.0 - 1.0)."""
+        changed = max(len(self.added), len(self.removed))
+        total = self.unchanged + changed
+        return changed / total if total else 0.0
+
+
+def criteria_lines(text: str) -> List[str]:
+    """Return the description's non-empty lines with list markers and spacing normalized."""
+    lines = []
+    for line in (text or '').splitlines():
+        line = _SPACE_RE.sub(' ', _MARKER_RE.sub('', line.strip())).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def diff_criteria(old_text: str, new_text: str) -> CriteriaDiff:
+    """Compare two descriptions line by line, ignoring list markers and whitespace."""
+    old_lines = criteria_lines(old_text)
+    new_lines = criteria_lines(new_text)
+    matcher = difflib.SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+    added: List[str] = []
+    removed: List[str] = []
+    unchanged = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            unchanged += i2 - i1
+            continue
+        removed.extend(old_lines[i1:i2])
+        added.extend(new_lines[j1:j2])
+    return CriteriaDiff(added, removed, unchanged)
+
+
+def build_incremental_prompt(instruction: str, scenarios: List[str], diff: CriteriaDiff) -> str:
+    """Build a prompt that only asks about the changed requirement lines."""
+    existing = '\n'.join(f"{i}. {s}" for i, s in enumerate(scenarios, 1))
+    removed = '\n'.join(f"- {line}" for line in diff.removed) or '- (none)'
+    added = '\n'.join(f"- {line}" for line in diff.added) or '- (none)'
+    return (
+        f"{instruction}\n\n"
+        "The story has changed since the existing test scenarios below were written. "
+        "Only the listed requirement lines changed; everything else is still covered.\n\n"
+        f"Existing test scenarios:\n{existing}\n\n"
+        f"Removed or rewritten requirement lines:\n{removed}\n\n"
+        f"New or rewritten requirement lines:\n{added}\n\n"
+        "Reply in exactly this format:\n"
+        "REMOVE: <comma-separated numbers of existing scenarios that no longer match the story, or none>\n"
+        "followed by a numbered list (1, 2, 3, ...) of new test scenarios that cover only the new or "
+        "rewritten lines and are not already covered by the scenarios that remain. "
+        "Output nothing else.\n\nTest Scenarios:"
+    )
+
+
+def split_removals(response: str, scenario_count: int) -> Tuple[Set[int], str]:
+    """Extract the REMOVE line from a model response.
+
+    Returns the zero-based indices of scenarios to drop and the rest of the
+    response (the new scenarios) for regular scenario parsing.
+    """
+    removed: Set[int] = set()
+    rest = []
+    for line in (response or '').splitlines():
+        m = _REMOVE_RE.match(line)
+        if m:
+            for number in re.findall(r'\d+', m.group(1)):
+                index = int(number) - 1
+                if 0 <= index < scenario_count:
+                    removed.add(index)
+            continue
+        rest.append(line)
+    return removed, '\n'.join(rest)
+
+
+def merge_scenarios(existing: List[str], removed: Set[int], new: List[str]) -> List[str]:
+    """Keep unaffected scenarios in their original order and append the new ones."""
+    kept = [s for i, s in enumerate(existing) if i not in removed]
+    seen = {s.strip().lower() for s in kept}
+    return kept + [s for s in new if s.strip().lower() not in seen]
@@ -0,0 +1,94 @@
+"""
+Registry Module
+
+Maps AI provider names to ``"module:Class"`` targets and imports each
+provider only when it is first used, recording import and client
+construction cost per provider for the metrics endpoint.
+"""
+
+import importlib
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Type
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# name -> "module:Class"; modules are imported on first use only, so the
+# provider SDKs (e.g. google-genai) stay out of application start-up
+_REGISTRY: Dict[str, str] = {
+    "google": "ai.google_ai:GoogleAIChat",
+    "fake": "ai.fake_ai:FakeAIChat",
+}
+
+_loaded: Dict[str, Type[Any]] = {}
+_stats: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+
+
+def register_provider(name: str, target: str) -> None:
+    """Register a provider as ``"package.module:ClassName"`` under ``name``."""
+    if ':' not in target:
+        raise ValueError(f"Provider target must look like 'module:Class', got {target!r}")
+    with _lock:
+        _REGISTRY[name.lower()] = target
+        _loaded.pop(name.lower(), None)
+
+
+def default_provider() -> str:
+    """Provider selected by the AI_PROVIDER environment variable (default: google)."""
+    return os.environ.get("AI_PROVIDER", "google").strip().lower()
+
+
+def get_provider(name: Optional[str] = None) -> Type[Any]:
+    """Resolve a provider class by name, importing its module on first use."""
+    name = (name or default_provider()).lower()
+    cls = _loaded.get(name)
+    if cls is not None:
+        return cls
+    with _lock:
+        cls = _loaded.get(name)
+        if cls is not None:
+            return cls
+        target = _REGISTRY.get(name)
+        if target is None:
+            raise ValueError(f"Unknown AI provider: {name!r}")
+        module_name, _, class_name = target.partition(':')
+        start = time.perf_counter()
+        cls = getattr(importlib.import_module(module_name), class_name)
+        import_seconds = time.perf_counter() - start
+        _stats.setdefault(name, {"import_seconds": 0.0, "inits": 0, "init_seconds_total": 0.0})
+        _stats[name]["import_seconds"] = import_seconds
+        _loaded[name] = cls
+    logger.info('Loaded AI provider %s (%s) in %.3fs', name, target, import_seconds)
+    return cls
+
+
+def create_chat(api_key: Optional[str], provider: Optional[str] = None) -> Any:
+    """Instantiate a chat client for ``provider`` (default: AI_PROVIDER)."""
+    name = (provider or default_provider()).lower()
+    cls = get_provider(name)
+    start = time.perf_counter()
+    chat = cls(api_key)
+    elapsed = time.perf_counter() - start
+    with _lock:
+        stats = _stats.setdefault(name, {"import_seconds": 0.0, "inits": 0, "init_seconds_total": 0.0})
+        stats["inits"] += 1
+        stats["init_seconds_total"] += elapsed
+        stats["last_init_seconds"] = elapsed
+    return chat
+
+
+def record_import(name: str, seconds: float) -> None:
+    """Add the cost of an SDK a provider imports lazily to its ``import_seconds``."""
+    with _lock:
+        stats = _stats.setdefault(name.lower(), {"import_seconds": 0.0, "inits": 0, "init_seconds_total": 0.0})
+        stats["import_seconds"] += seconds
+
+
+def provider_stats() -> Dict[str, Dict[str, float]]:
+    """Import and client-construction cost per provider loaded so far."""
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
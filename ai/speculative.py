@@ -0,0 +1,111 @@
+"""
+Speculative Module
+
+Background scenario generation started when a ticket is selected, so the
+result is often ready by the time the user asks for it. Jobs are keyed by
+owner, ticket and description digest and handed out at most once.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256((text or '').strip().encode('utf-8')).hexdigest()
+
+
+class _Job:
+    __slots__ = ('ticket_key', 'digest', 'future', 'created')
+
+    def __init__(self, ticket_key: str, digest: str, future: Future):
+        self.ticket_key = ticket_key
+        self.digest = digest
+        self.future = future
+        self.created = time.monotonic()
+
+
+class SpeculativeGenerator:
+    """Runs default-prompt scenario generation ahead of the user's click.
+
+    At most one job is kept per owner (browser session): selecting another
+    ticket cancels the previous job. Work runs on a small bounded pool and new
+    jobs are refused when too many are already queued, so speculation can
+    never crowd out requests a user is actually waiting for.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, ttl: float = 600.0):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='ai-speculative')
+        self._max_pending = max(1, max_pending)
+        self._ttl = ttl
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, ticket_key: str, description: str, func: Callable[[], Any]) -> bool:
+        """Start ``func`` in the background for this owner's newly selected ticket.
+
+        Returns True if a job was queued (or an identical one already exists).
+        """
+        digest = _digest(description)
+        with self._lock:
+            self._expire_locked()
+            current = self._jobs.get(owner)
+            if current and current.ticket_key == ticket_key and current.digest == digest:
+                return True
+            if current:
+                self._cancel_job(owner, current)
+            pending = sum(1 for job in self._jobs.values() if not job.future.done())
+            if pending >= self._max_pending:
+                logger.info('Speculative generation skipped for %s: %d jobs pending', ticket_key, pending)
+                return False
+            self._jobs[owner] = _Job(ticket_key, digest, self._pool.submit(func))
+        logger.info('Speculative scenario generation queued for %s', ticket_key)
+        return True
+
+    def take(self, owner: str, ticket_key: str, description: str, timeout: Optional[float] = None) -> Optional[Any]:
+        """Return the speculative result for this ticket and description, if any.
+
+        A job that is still running is awaited (up to ``timeout``), since it is
+        always closer to finishing than a fresh request would be. The result is
+        handed out once; None means the caller should generate normally.
+        """
+        with self._lock:
+            job = self._jobs.get(owner)
+            if not job or job.ticket_key != ticket_key or job.digest != _digest(description):
+                return None
+            del self._jobs[owner]
+        try:
+            result = job.future.result(timeout=timeout)
+        except (CancelledError, FutureTimeoutError):
+            return None
+        except Exception:
+            logger.exception('Speculative generation for %s failed', ticket_key)
+            return None
+        logger.info('Speculative scenario result used for %s (%.1fs after select)',
+                    ticket_key, time.monotonic() - job.created)
+        return result
+
+    def cancel(self, owner: str) -> None:
+        """Drop the owner's pending job (e.g. on a new selection or logout)."""
+        with self._lock:
+            job = self._jobs.get(owner)
+            if job:
+                self._cancel_job(owner, job)
+
+    def _cancel_job(self, owner: str, job: _Job) -> None:
+        # A job that already started cannot be interrupted; its result is simply discarded
+        job.future.cancel()
+        del self._jobs[owner]
+        logger.debug('Speculative generation for %s cancelled', job.ticket_key)
+
+    def _expire_locked(self) -> None:
+        now = time.monotonic()
+        for owner in [o for o, job in self._jobs.items() if now - job.created > self._ttl]:
+            self._cancel_job(owner, self._jobs[owner])
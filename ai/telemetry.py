@@ -0,0 +1,153 @@
+"""
+Telemetry Module
+
+Per-call AI metrics: request counts, errors, latency, time to first token
+and token usage by provider, model and calling endpoint, recorded through
+``CallTimer`` into the shared metrics registry and summarized in a periodic
+log line.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from logger import add_timing, get_logger
+from metrics import REGISTRY, TOKEN_BUCKETS
+
+from .chunking import estimate_tokens
+
+logger = get_logger(__name__)
+
+AI_REQUESTS = REGISTRY.counter(
+    "ai_requests_total", "AI calls by provider, model, calling endpoint and outcome",
+    ("provider", "model", "endpoint", "outcome"))
+AI_ERRORS = REGISTRY.counter(
+    "ai_errors_total", "Failed AI calls by error class",
+    ("provider", "model", "endpoint", "error_class"))
+AI_LATENCY = REGISTRY.histogram(
+    "ai_request_duration_seconds", "Total AI call latency",
+    ("provider", "model", "endpoint"))
+AI_TTFT = REGISTRY.histogram(
+    "ai_time_to_first_token_seconds", "Time until the first response text arrived",
+    ("provider", "model", "endpoint"))
+AI_PROMPT_TOKENS = REGISTRY.histogram(
+    "ai_prompt_tokens", "Prompt tokens per call (SDK usage metadata, estimated if absent)",
+    ("provider", "model"), buckets=TOKEN_BUCKETS)
+AI_RESPONSE_TOKENS = REGISTRY.histogram(
+    "ai_response_tokens", "Response tokens per call (SDK usage metadata, estimated if absent)",
+    ("provider", "model"), buckets=TOKEN_BUCKETS)
+
+SUMMARY_INTERVAL = float(os.environ.get("AI_TELEMETRY_LOG_INTERVAL", "300"))
+
+_reporter_started = False
+_reporter_lock = threading.Lock()
+
+
+def _current_endpoint() -> str:
+    """Flask endpoint of the request making the call, or 'background' outside requests."""
+    try:
+        from flask import has_request_context, request
+        if has_request_context():
+            return request.endpoint or request.path
+    except Exception:
+        pass
+    return "background"
+
+
+class CallTimer:
+    """Measures one AI call; create it right before the provider request."""
+
+    def __init__(self, provider: str, model: Optional[str], prompt: str = ""):
+        self.provider = provider
+        self.model = model or "unknown"
+        self.endpoint = _current_endpoint()
+        self.prompt = prompt
+        self.start = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished = False
+        _ensure_reporter()
+
+    def first_token(self) -> None:
+        """Mark the arrival of the first streamed chunk."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def finish(self, response_text: Optional[str] = None, prompt_tokens: Optional[int] = None,
+               response_tokens: Optional[int] = None, error_class: Optional[str] = None) -> float:
+        """Record the call and return its total latency in seconds.
+
+        Only the first call records anything, so stream generators can finish
+        the timer again from a ``finally`` block when they are closed early.
+        """
+        elapsed = time.perf_counter() - self.start
+        if self.finished:
+            return elapsed
+        self.finished = True
+        add_timing('ai', elapsed)
+        labels = {"provider": self.provider, "model": self.model, "endpoint": self.endpoint}
+        AI_REQUESTS.inc(outcome="error" if error_class else "ok", **labels)
+        AI_LATENCY.observe(elapsed, **labels)
+        if error_class:
+            AI_ERRORS.inc(error_class=error_class, **labels)
+            return elapsed
+        # Without streaming the first token arrives with the whole response
+        AI_TTFT.observe((self.first_token_at or time.perf_counter()) - self.start, **labels)
+        AI_PROMPT_TOKENS.observe(prompt_tokens if prompt_tokens is not None else estimate_tokens(self.prompt),
+                                 provider=self.provider, model=self.model)
+        AI_RESPONSE_TOKENS.observe(response_tokens if response_tokens is not None else estimate_tokens(response_text or ""),
+                                   provider=self.provider, model=self.model)
+        return elapsed
+
+
+def usage_tokens(response) -> tuple:
+    """Return (prompt_tokens, response_tokens) from google-genai usage metadata, if present."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return None, None
+    return getattr(usage, 'prompt_token_count', None), getattr(usage, 'candidates_token_count', None)
+
+
+def summary() -> dict:
+    """Aggregate AI telemetry as plain data (used by the metrics endpoint and log line)."""
+    return REGISTRY.snapshot(prefix="ai_")
+
+
+def _summary_line() -> Optional[str]:
+    calls = sum(v["value"] for v in AI_REQUESTS.snapshot())
+    if not calls:
+        return None
+    errors = sum(v["value"] for v in AI_ERRORS.snapshot())
+    parts = []
+    for item in AI_LATENCY.snapshot():
+        labels = item["labels"]
+        parts.append(f"{labels['provider']}/{labels['model']}@{labels['endpoint']} n={item['count']} "
+                     f"avg={item['sum'] / item['count']:.2f}s p95<={item['p95']}s")
+    prompt = sum(v["sum"] for v in AI_PROMPT_TOKENS.snapshot())
+    response = sum(v["sum"] for v in AI_RESPONSE_TOKENS.snapshot())
+    return (f"AI telemetry: calls={int(calls)} errors={int(errors)} tokens_in={int(prompt)} "
+            f"tokens_out={int(response)} | " + "; ".join(parts))
+
+
+def _report_loop() -> None:
+    last_calls = 0.0
+    while True:
+        time.sleep(SUMMARY_INTERVAL)
+        try:
+            calls = sum(v["value"] for v in AI_REQUESTS.snapshot())
+            if calls != last_calls:
+                last_calls = calls
+                logger.info(_summary_line())
+        except Exception:
+            logger.exception('Failed to log AI telemetry summary')
+
+
+def _ensure_reporter() -> None:
+    """Start the periodic summary logger on first use (disabled when interval <= 0)."""
+    global _reporter_started
+    if _reporter_started or SUMMARY_INTERVAL <= 0:
+        return
+    with _reporter_lock:
+        if not _reporter_started:
+            threading.Thread(target=_report_loop, name='ai-telemetry', daemon=True).start()
+            _reporter_started = True
@@ -6,28 +6,167 @@ import os
 import re
 import time
 import json
+import hashlib
+import hmac
+import functools
+import uuid
 import logger as logutil
-from ai.google_ai import GoogleAIChat
+from ai import create_chat, provider_stats
+from ai.registry import default_provider
+from ai import telemetry as ai_telemetry
+from ai.chunking import estimate_tokens, map_reduce_text
+from ai.incremental import build_incremental_prompt, diff_criteria, merge_scenarios, split_removals
+from ai.speculative import SpeculativeGenerator
+from ai.conversations import ConversationStore
+from ai.admission import AdmissionController, AdmissionRejected
 import logging as _logging
 logger = logutil.get_logger(__name__)
 # Import new JIRA client
 from jira_client import JiraClient, get_jira_client
+from bulk_update import (BulkJobRunner, BulkJournal, BulkTestPlanUpdater, FAILED_STATUSES,
+                         new_job_id, prune_journals)
+from adf import adf_to_markup, adf_to_text, escape_markup, text_to_adf
+from markup import markdown_to_html
+from testplan import DEFAULT_TEMPLATE, TestPlan, clean_scenario, update_test_plan_field
+from html_sanitizer import sanitize_html
+from session_store import SqliteSessionInterface
+from session_serializer import SessionSerializer
+from chat_history import ChatHistoryStore
+from scenario_store import SCENARIOS, TEST_CASES, KINDS, ScenarioStore
+from shared_cache import CACHE as shared_cache
+from render_cache import RenderCache
+from metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, exposition
 
 # Configuration
 app = Flask(__name__, template_folder="templates", static_folder="static")
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "change-me-in-production")
-app.config["SESSION_TYPE"] = "filesystem"
 app.config["SESSION_PERMANENT"] = False
-Session(app)
+# Server-side sessions: "sqlite" (default) stores each session key as its own
+# row and only rewrites keys that changed; "filesystem" keeps the Flask-Session
+# backend that pickles the whole session into one file per request
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "sqlite")
+if SESSION_BACKEND == "filesystem":
+    app.config["SESSION_TYPE"] = "filesystem"
+    Session(app)
+else:
+    app.session_interface = SqliteSessionInterface(
+        idle_timeout=float(os.environ.get("SESSION_IDLE_TIMEOUT", str(7 * 24 * 3600))),
+        cleanup_interval=float(os.environ.get("SESSION_CLEANUP_INTERVAL", "600")),
+        serializer=SessionSerializer(
+            compress_min_bytes=int(os.environ.get("SESSION_COMPRESS_MIN_BYTES", "1024")))
+    )
+
+# Upper bound on tickets accepted by one bulk Test Plan update request
+BULK_MAX_ITEMS = int(os.environ.get("JIRA_BULK_MAX_ITEMS", "100"))
+# Bulk jobs run in the background; this many run at once per worker process
+bulk_jobs = BulkJobRunner(int(os.environ.get("JIRA_BULK_MAX_JOBS", "2")))
+
+# Token budgets for scenario generation: descriptions estimated above
+# AI_DESCRIPTION_TOKEN_BUDGET are split into AI_CHUNK_TOKENS-sized chunks and
+# summarized in parallel before the scenarios prompt is sent
+AI_DESCRIPTION_TOKEN_BUDGET = int(os.environ.get("AI_DESCRIPTION_TOKEN_BUDGET", "6000"))
+AI_CHUNK_TOKENS = int(os.environ.get("AI_CHUNK_TOKENS", "2000"))
+AI_MAP_MAX_WORKERS = int(os.environ.get("AI_MAP_MAX_WORKERS", "4"))
+# Condensed descriptions are kept in the host-wide shared cache for this long
+AI_CONDENSED_CACHE_TTL = float(os.environ.get("AI_CONDENSED_CACHE_TTL", str(24 * 3600)))
+
+# Regenerating with the same prompt after a description edit only sends the
+# changed requirement lines, unless more than this share of lines changed
+AI_INCREMENTAL_MAX_CHANGE = float(os.environ.get("AI_INCREMENTAL_MAX_CHANGE", "0.5"))
+
+# Opt-in: start default-prompt scenario generation in the background as soon as
+# a ticket is selected, so the "generate" button can return the cached result
+AI_SPECULATIVE_GENERATION = os.environ.get("AI_SPECULATIVE_GENERATION") in ("1", "true", "True")
+AI_SPECULATIVE_WAIT_SECONDS = float(os.environ.get("AI_SPECULATIVE_WAIT_SECONDS", "30"))
+speculative_generator = SpeculativeGenerator(
+    max_workers=int(os.environ.get("AI_SPECULATIVE_WORKERS", "2")),
+    max_pending=int(os.environ.get("AI_SPECULATIVE_MAX_PENDING", "8"))
+)
+
+# Conversation mode for manual prompts: one chat per (session, ticket) keeps the
+# story, so refinements only send the instruction. Stories estimated at
+# AI_CONTEXT_CACHE_MIN_TOKENS or more go into a provider-side context cache.
+AI_CONVERSATION_MODE = os.environ.get("AI_CONVERSATION_MODE") in ("1", "true", "True")
+AI_CONVERSATION_TTL = float(os.environ.get("AI_CONVERSATION_TTL", "1800"))
+AI_CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("AI_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+conversations = ConversationStore(
+    max_conversations=int(os.environ.get("AI_CONVERSATION_MAX", "200")),
+    ttl=AI_CONVERSATION_TTL
+)
+
+# Fair-share admission control for AI calls: per-user concurrency and rate
+# limits, a process-wide concurrency cap and a bounded queue; requests that
+# cannot be admitted in time get a 429 with a Retry-After hint
+ai_admission = AdmissionController(
+    max_concurrency=int(os.environ.get("AI_MAX_CONCURRENT", "8")),
+    per_user_concurrency=int(os.environ.get("AI_USER_MAX_CONCURRENT", "2")),
+    per_user_rate=float(os.environ.get("AI_USER_RATE_PER_MINUTE", "30")) / 60.0,
+    per_user_burst=float(os.environ.get("AI_USER_BURST", "5")),
+    max_queued=int(os.environ.get("AI_USER_MAX_QUEUED", "4")),
+    max_wait=float(os.environ.get("AI_ADMISSION_MAX_WAIT", "10"))
+)
+
+# AI chat history lives in an append-only store, not in the session
+chat_history = ChatHistoryStore(
+    retention_days=float(os.environ.get("AI_HISTORY_RETENTION_DAYS", "90")),
+    max_entries=int(os.environ.get("AI_HISTORY_MAX_ENTRIES", "1000")),
+    compact_interval=float(os.environ.get("AI_HISTORY_COMPACT_INTERVAL", "3600"))
+)
+
+# Generated scenarios and test cases are kept per ticket outside the session
+scenario_store = ScenarioStore()
+
+# Converted field content per issue version, so select/refresh/preview of an
+# unchanged ticket does not re-run the converters
+render_cache = RenderCache(
+    max_entries=int(os.environ.get("RENDER_CACHE_MAX_ENTRIES", "512")),
+    enabled=os.environ.get("RENDER_CACHE_ENABLED", "1") not in ("0", "false", "False")
+)
+
+# Upper bound on sanitized Jira HTML kept per field in the session and /select responses
+RENDERED_HTML_MAX_BYTES = int(os.environ.get("RENDERED_HTML_MAX_BYTES", "200000"))
+
+# Strings GoogleAIChat returns instead of raising on failure
+AI_ERROR_RESPONSES = ("Invalid API Key or unauthorized", "AI service unavailable")
 
 # Initialize logger
 logger = logutil.get_logger(__name__)
 ai_logger = _logging.getLogger('ai_chat')
 
+# Incoming X-Request-ID values are reused only when they look like an id
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Optional bearer token required to scrape /metrics
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+
+def _metrics_authorized() -> bool:
+    """True when METRICS_TOKEN is unset or sent as a bearer token."""
+    return not METRICS_TOKEN or hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}')
+
+# Labelled by route pattern (e.g. /api/tickets/<key>), never by raw path, to
+# keep the number of series bounded
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requests handled, by route and status", ("method", "route", "status"))
+HTTP_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to build the response, by route", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "Requests being handled right now", ("method", "route"))
+
 # Request/response logging: record start time and log after response
 @app.before_request
 def _start_timer():
     g._start_time = time.time()
+    g._metric_labels = {'method': request.method,
+                        'route': request.url_rule.rule if request.url_rule else '<unmatched>'}
+    HTTP_IN_FLIGHT.inc(**g._metric_labels)
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+    # Every record logged while handling the request carries these fields (JSON logs)
+    logutil.start_context(request_id=g.request_id, method=request.method,
+                          route=request.url_rule.rule if request.url_rule else request.path)
+    if request.endpoint != 'static' and session.get('jira_email'):
+        logutil.bind_context(user=session.get('jira_email'))
 
 @app.after_request
 def _log_request_response(response):
@@ -36,12 +175,95 @@ def _log_request_response(response):
         payload_size = request.content_length or 0
         # response.status may not exist on stub; use getattr
         status = getattr(response, 'status', getattr(response, 'status_code', ''))
-        logger.info("%s %s %s %sB %.3fs", request.method if hasattr(request, 'method') else 'N/A', request.path if hasattr(request, 'path') else 'N/A', status, payload_size, duration)
+        timings = logutil.current_context().get('timings')
+        upstream = ''.join(' %s=%.3fs' % item for item in sorted(timings.items())) if timings else ''
+        logger.info("%s %s %s %sB %.3fs%s", request.method if hasattr(request, 'method') else 'N/A', request.path if hasattr(request, 'path') else 'N/A', status, payload_size, duration, upstream)
+        labels = getattr(g, '_metric_labels', None)
+        if labels:
+            HTTP_REQUESTS.inc(status=getattr(response, 'status_code', 0), **labels)
+            HTTP_DURATION.observe(duration, **labels)
+        if getattr(g, 'request_id', None):
+            response.headers['X-Request-ID'] = g.request_id
     except Exception:
         logger.exception("Error logging request/response")
     return response
 
+@app.teardown_request
+def _clear_log_context(exc):
+    labels = g.pop('_metric_labels', None)
+    if labels:
+        HTTP_IN_FLIGHT.dec(**labels)
+    logutil.clear_context()
+
 # Helpers
+def session_owner():
+    """Return a stable identifier for the current browser session."""
+    return getattr(session, 'sid', None) or session.get('jira_email') or 'anonymous'
+
+def scenario_owner():
+    """Owner recorded with generated scenarios: the Jira user, so history survives logout."""
+    return session.get('jira_email') or session_owner()
+
+def jira_identity():
+    """Return ``(site, user)`` for a connected session, or None.
+
+    The user is the id the Jira site itself reported at /connect (accountId, or
+    the username on Jira Server), so state keyed by the pair cannot be reached
+    by connecting to another server with someone else's email.
+    """
+    if not session.get('jira_connected') or not session.get('jira_url'):
+        return None
+    return session['jira_url'], session.get('jira_account_id') or session.get('jira_email', '')
+
+def history_owner():
+    """``(site, user)`` that AI chat history is stored under; the browser session when not connected."""
+    return jira_identity() or ('', session_owner())
+
+def admission_owner():
+    """Key for AI admission limits: the Jira identity once connected, else the browser session."""
+    identity = jira_identity()
+    return '|'.join(identity) if identity else session_owner()
+
+def record_generation(ticket_key, kind, items, prompt=None, description=None):
+    """Append a generation to the scenario store; failures are logged, never raised."""
+    if not ticket_key:
+        return None
+    try:
+        return scenario_store.record(session.get('jira_url', ''), ticket_key, kind, scenario_owner(),
+                                     items, prompt=prompt, description=description)
+    except Exception:
+        logger.exception("Failed to record %s for %s", kind, ticket_key)
+        return None
+
+def ai_admitted(view):
+    """Run an AI route under per-user admission control, answering 429 when shed."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            with ai_admission.admit(admission_owner()):
+                return view(*args, **kwargs)
+        except AdmissionRejected as e:
+            return admission_rejected_response(e)
+    return wrapper
+
+def admission_rejected_response(e):
+    """429 response telling the client when to retry a shed AI request."""
+    return (jsonify({'error': f'Too many AI requests. Please try again in {e.retry_after} seconds.',
+                     'retry_after': e.retry_after}),
+            429, {'Retry-After': str(e.retry_after)})
+
+def speculative_scenarios(ai_user, description, api_key):
+    """Background default-prompt generation; only runs when ``ai_user`` has a free AI slot.
+
+    ``ai_user`` is the admission_owner() of the request that queued the job,
+    since the background thread has no session.
+    """
+    try:
+        with ai_admission.admit(ai_user, max_wait=0):
+            return generate_scenarios_with_ai(description, api_key=api_key)
+    except AdmissionRejected as e:
+        return None, f'Speculative generation skipped: {e.reason}'
+
 @logutil.log_exceptions
 def validate_jira_connection(jira_url, email, api_token):
     """
@@ -70,7 +292,7 @@ def validate_jira_connection(jira_url, email, api_token):
         return None
 
 @logutil.log_exceptions
-def search_issues(jira_url, email, api_token, jql, max_results=50):
+def search_issues(jira_url, email, api_token, jql, max_results=50, cached=True):
     """
     Search issues using the new JIRA client.
     
@@ -80,13 +302,15 @@ def search_issues(jira_url, email, api_token, jql, max_results=50):
         api_token: API token
         jql: JQL query string
         max_results: Maximum results to return
+        cached: False to bypass the shared cache (explicit refresh)
         
     Returns:
         Search results dict
     """
     try:
-        client = JiraClient(jira_url, email, api_token)
-        results = client.search_issues(jql, max_results)
+        # Connects lazily, so searches served from the shared cache cost no Jira round trip
+        client = JiraClient(jira_url, email, api_token, connect=False)
+        results = client.search_issues(jql, max_results, cached=cached)
         
         if "error" in results:
             logger.error("Search error: %s", results["error"])
@@ -98,43 +322,9 @@ def search_issues(jira_url, email, api_token, jql, max_results=50):
         logger.exception("Exception during search_issues for JQL: %s", jql)
         return {"error": str(e)}
 
-@logutil.log_exceptions
-def adf_to_text(node):
-    """Recursively extract plain text from Atlassian Document Format (ADF)."""
-    if node is None:
-        return ""
-    if isinstance(node, str):
-        return node
-    text_parts = []
-    if isinstance(node, dict):
-        # Text node
-        if 'text' in node:
-            text_parts.append(node.get('text', ''))
-        # If node has content, recurse
-        if 'content' in node and isinstance(node['content'], list):
-            for child in node['content']:
-                child_text = adf_to_text(child)
-                if child_text:
-                    text_parts.append(child_text)
-        # Handle different node types
-        node_type = node.get('type', '')
-        if node_type == 'paragraph':
-            text_parts.append('\n')
-        elif node_type == 'hardBreak':
-            text_parts.append('\n')
-        elif node_type in ['bulletList', 'orderedList']:
-            text_parts.append('\n')
-        elif node_type == 'listItem':
-            text_parts.insert(0, '• ')
-            text_parts.append('\n')
-    elif isinstance(node, list):
-        for n in node:
-            child_text = adf_to_text(n)
-            if child_text:
-                text_parts.append(child_text)
-    result = ''.join([p for p in text_parts if p])
-    logger.debug("Extracted text from ADF node: %s", (result[:200] + '...') if len(result) > 200 else result)
-    return result
+def sanitize_rendered_html(value):
+    """Sanitize and size-cap HTML rendered by Jira; relative links resolve against the connected site."""
+    return sanitize_html(value, base_url=session.get('jira_url'), max_bytes=RENDERED_HTML_MAX_BYTES)
 
 @logutil.log_exceptions
 def process_test_scenarios_content(content):
@@ -144,77 +334,35 @@ def process_test_scenarios_content(content):
     """
     if not content:
         return ''
-    
     if isinstance(content, str):
-        # If it's a string, check if it contains HTML tags
+        # Content that already contains HTML tags is sanitized, not converted
         if '<' in content and '>' in content:
-            return content
-        else:
-            # Convert plain text to HTML with proper line breaks
-            html_content = content.replace('\n', '<br>\n')
-            # If it looks like markdown, convert basic markdown elements
-            import re
-            # Convert **bold** to <strong>bold</strong>
-            html_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_content)
-            # Convert *italic* to <em>italic</em>  
-            html_content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html_content)
-            # Convert markdown links [text](url) to <a href="url">text</a>
-            html_content = re.sub(r'\[([^\]]+)\]\(([^\)]+)\)', r'<a href="\2">\1</a>', html_content)
-            
-            # Convert markdown lists
-            lines = html_content.split('\n')
-            processed_lines = []
-            in_list = False
-            list_type = None
-            
-            for line in lines:
-                if re.match(r'^\s*[-*+]\s+', line):
-                    if not in_list:
-                        processed_lines.append('<ul>')
-                        in_list = True
-                        list_type = 'ul'
-                    elif list_type != 'ul':
-                        processed_lines.append('</ol>')
-                        processed_lines.append('<ul>')
-                        list_type = 'ul'
-                    processed_lines.append(f'<li>{re.sub(r"^\s*[-*+]\s+", "", line)}</li>')
-                elif re.match(r'^\s*\d+\.\s+', line):
-                    if not in_list:
-                        processed_lines.append('<ol>')
-                        in_list = True
-                        list_type = 'ol'
-                    elif list_type != 'ol':
-                        processed_lines.append('</ul>')
-                        processed_lines.append('<ol>')
-                        list_type = 'ol'
-                    processed_lines.append(f'<li>{re.sub(r"^\s*\d+\.\s+", "", line)}</li>')
-                else:
-                    if in_list:
-                        if list_type == 'ul':
-                            processed_lines.append('</ul>')
-                        else:
-                            processed_lines.append('</ol>')
-                        in_list = False
-                        list_type = None
-                    processed_lines.append(line)
-            
-            # Close any open list at the end
-            if in_list:
-                if list_type == 'ul':
-                    processed_lines.append('</ul>')
-                else:
-                    processed_lines.append('</ol>')
-            
-            return '\n'.join(processed_lines)
-    else:
-        # Handle ADF or other structured content
-        return adf_to_text(content)
+            return sanitize_html(content, max_bytes=RENDERED_HTML_MAX_BYTES)
+        return markdown_to_html(content)
+    # Handle ADF or other structured content
+    return adf_to_text(content)
 
 # Routes
 @app.route("/", methods=["GET"])
 def index():
     search_results = session.get("search_results", [])
-    return render_template("search.html", search_results=search_results)
+    scenario_history, generated_test_cases = [], []
+    selected = session.get("selected_ticket")
+    if selected and selected.get("key"):
+        site, owner = session.get("jira_url", ""), scenario_owner()
+        try:
+            # The generation shown as current scenarios is not repeated in the
+            # history; newer ones (e.g. from another tab) still are
+            shown_id = selected.get("test_scenarios_id")
+            entries, _ = scenario_store.history(site, selected["key"], SCENARIOS, owner=owner, limit=21)
+            entries = [e for e in entries if e["id"] != shown_id][:20]
+            scenario_history = [{"prompt": e["prompt"], "scenarios": e["items"]} for e in reversed(entries)]
+            latest_cases = scenario_store.latest(site, selected["key"], TEST_CASES, owner=owner)
+            generated_test_cases = latest_cases["items"] if latest_cases else []
+        except Exception:
+            logger.exception("Failed to load scenario history for %s", selected["key"])
+    return render_template("search.html", search_results=search_results,
+                           scenario_history=scenario_history, generated_test_cases=generated_test_cases)
 
 @app.route("/connect", methods=["POST"])
 def connect():
@@ -240,6 +388,8 @@ def connect():
     session["jira_url"] = jira_url.rstrip("/")
     session["jira_email"] = email
     session["jira_api_token"] = api_token
+    # The user as this site identifies it; keys per-user state together with jira_url
+    session["jira_account_id"] = user.get("accountId") or user.get("name") or email
     # Store user info
     display_name = user.get("displayName") or user.get("name") or ""
     email_addr = user.get("emailAddress") or email
@@ -254,8 +404,10 @@ def connect():
 @app.route("/logout", methods=["POST"])
 def logout():
     # Clear connection-related session data
-    keys = ["jira_connected", "jira_authenticated", "jira_url", "jira_email", "jira_api_token", "user_full_name", "user_email", "user_initials", "search_results", "last_query", "selected_ticket"]
+    keys = ["jira_connected", "jira_authenticated", "jira_url", "jira_email", "jira_api_token", "jira_account_id", "user_full_name", "user_email", "user_initials", "search_results", "last_query", "selected_ticket"]
     
+    speculative_generator.cancel(session_owner())
+    conversations.drop(session_owner())
     for k in keys:
         session.pop(k, None)
     logger.info("User logged out and session cleared")
@@ -339,7 +491,7 @@ def search():
         if updated:
             try:
                 from datetime import datetime
-                logger.debug(f"Processing updated field for {key}: {updated}")
+                logutil.log_sampled(logger, _logging.DEBUG, "Processing updated field for %s: %s", key, updated)
                 
                 # Handle different date formats from Jira
                 if updated.endswith('Z'):
@@ -354,9 +506,10 @@ def search():
                 dt = datetime.fromisoformat(updated.replace('Z', '+00:00'))
                 # Send ISO timestamp to frontend for client-side timezone conversion
                 updated_display = dt.isoformat()
-                logger.debug(f"Sending ISO timestamp for {key}: {updated_display}")
+                logutil.log_sampled(logger, _logging.DEBUG, "Sending ISO timestamp for %s: %s", key, updated_display)
             except Exception as e:
-                logger.warning(f"Failed to parse updated date '{updated}' for {key}: {e}")
+                logutil.log_rate_limited(logger, _logging.WARNING, "updated-date-parse", 60,
+                                         "Failed to parse updated date '%s' for %s: %s", updated, key, e)
                 # Fallback: try to extract just the date part
                 if len(updated) >= 10:
                     updated_display = updated[:10]  # Get YYYY-MM-DD part
@@ -403,20 +556,23 @@ def select_ticket():
         api_token = session.get('jira_api_token')
         if jira_url and email and api_token:
             logger.debug("Fetching issue %s using JIRA client", key)
-            client = JiraClient(jira_url, email, api_token)
+            client = JiraClient(jira_url, email, api_token, connect=False)
             issue_data = client.get_issue(key, expand="description,renderedFields")
             
             if "error" not in issue_data:
                 # Get plain text description
                 desc = issue_data.get('fields', {}).get('description')
+                issue_updated = issue_data.get('fields', {}).get('updated')
                 if isinstance(desc, str):
                     description_text = desc
                 else:
-                    description_text = adf_to_text(desc)
+                    description_text = render_cache.render(jira_url, key, 'description', desc,
+                                                           adf_to_text, updated=issue_updated)
                 # Get HTML rendered description
                 rendered_desc = issue_data.get('renderedFields', {}).get('description')
                 if rendered_desc:
-                    description_html = rendered_desc
+                    description_html = render_cache.render(jira_url, key, 'description_html', rendered_desc,
+                                                           sanitize_rendered_html, updated=issue_updated)
                 
                 # Get test scenarios from custom field
                 test_scenarios_raw = issue_data.get('fields', {}).get('customfield_11334')
@@ -425,12 +581,16 @@ def select_ticket():
                     # Try to get rendered version first
                     rendered_test_scenarios = issue_data.get('renderedFields', {}).get('customfield_11334')
                     if rendered_test_scenarios:
-                        test_scenarios_html = rendered_test_scenarios
+                        test_scenarios_html = render_cache.render(
+                            jira_url, key, 'customfield_11334_html', rendered_test_scenarios,
+                            sanitize_rendered_html, updated=issue_updated)
                     else:
                         # Process the raw content (could be ADF, markdown, or plain text)
-                        test_scenarios_html = process_test_scenarios_content(test_scenarios_raw)
+                        test_scenarios_html = render_cache.render(
+                            jira_url, key, 'customfield_11334', test_scenarios_raw,
+                            process_test_scenarios_content, updated=issue_updated)
                 else:
-                    logger.debug(f"No test scenarios found for {key}")
+                    logutil.log_sampled(logger, _logging.DEBUG, "No test scenarios found for %s", key)
             else:
                 logger.warning("Failed to fetch issue %s: %s", key, issue_data.get('error'))
                 description_text = ''
@@ -442,6 +602,16 @@ def select_ticket():
         description_html = ''
         test_scenarios_html = ''
 
+    # Selecting a ticket supersedes any speculative work for the previous one
+    owner = session_owner()
+    speculative_generator.cancel(owner)
+    api_key = session.get('genai_api_key')
+    if AI_SPECULATIVE_GENERATION and api_key and description_text.strip():
+        ai_user = admission_owner()
+        speculative_generator.submit(
+            owner, key, description_text,
+            lambda: speculative_scenarios(ai_user, description_text.strip(), api_key))
+
     # store ticket info including description in session
     session['selected_ticket'] = {
         'key': key,
@@ -452,7 +622,13 @@ def select_ticket():
         'test_scenarios_field': test_scenarios_html
     }
     logger.info("Ticket selected: %s", key)
-    return jsonify({'success': True, 'selected': session['selected_ticket']})
+    selected = dict(session['selected_ticket'])
+    try:
+        latest_cases = scenario_store.latest(session.get('jira_url', ''), key, TEST_CASES, owner=scenario_owner())
+        selected['generated_test_cases'] = latest_cases['items'] if latest_cases else []
+    except Exception:
+        logger.exception("Failed to load stored test cases for %s", key)
+    return jsonify({'success': True, 'selected': selected})
 
 @app.route("/clear", methods=["POST"])
 def clear_results():
@@ -498,7 +674,8 @@ def refresh():
     jira_url = session.get("jira_url")
     email = session.get("jira_email")
     api_token = session.get("jira_api_token")
-    resp = search_issues(jira_url, email, api_token, jql, max_results)
+    # A refresh must show Jira's current state, not a cached page
+    resp = search_issues(jira_url, email, api_token, jql, max_results, cached=False)
     if isinstance(resp, dict) and resp.get("error"):
         logger.error("Refresh search error: %s", resp.get("error"))
         return jsonify({'success': False, 'message': resp.get('error')}), 500
@@ -531,7 +708,7 @@ def refresh():
         if updated:
             try:
                 from datetime import datetime
-                logger.debug(f"Processing updated field for {key}: {updated}")
+                logutil.log_sampled(logger, _logging.DEBUG, "Processing updated field for %s: %s", key, updated)
                 
                 # Handle different date formats from Jira
                 if updated.endswith('Z'):
@@ -546,9 +723,10 @@ def refresh():
                 dt = datetime.fromisoformat(updated.replace('Z', '+00:00'))
                 # Send ISO timestamp to frontend for client-side timezone conversion
                 updated_display = dt.isoformat()
-                logger.debug(f"Sending ISO timestamp for {key}: {updated_display}")
+                logutil.log_sampled(logger, _logging.DEBUG, "Sending ISO timestamp for %s: %s", key, updated_display)
             except Exception as e:
-                logger.warning(f"Failed to parse updated date '{updated}' for {key}: {e}")
+                logutil.log_rate_limited(logger, _logging.WARNING, "updated-date-parse", 60,
+                                         "Failed to parse updated date '%s' for %s: %s", updated, key, e)
                 # Fallback: try to extract just the date part
                 if len(updated) >= 10:
                     updated_display = updated[:10]  # Get YYYY-MM-DD part
@@ -581,18 +759,21 @@ def refresh():
         test_scenarios_html = ''
         try:
             logger.debug("Refreshing issue %s using JIRA client", key)
-            client = JiraClient(jira_url, email, api_token)
-            issue_data = client.get_issue(key, expand="description,renderedFields")
+            client = JiraClient(jira_url, email, api_token, connect=False)
+            issue_data = client.get_issue(key, expand="description,renderedFields", cached=False)
             
             if "error" not in issue_data:
                 desc = issue_data.get('fields', {}).get('description')
+                issue_updated = issue_data.get('fields', {}).get('updated')
                 if isinstance(desc, str):
                     description_text = desc
                 else:
-                    description_text = adf_to_text(desc)
+                    description_text = render_cache.render(jira_url, key, 'description', desc,
+                                                           adf_to_text, updated=issue_updated)
                 rendered_desc = issue_data.get('renderedFields', {}).get('description')
                 if rendered_desc:
-                    description_html = rendered_desc
+                    description_html = render_cache.render(jira_url, key, 'description_html', rendered_desc,
+                                                           sanitize_rendered_html, updated=issue_updated)
                 
                 # Get test scenarios from custom field
                 test_scenarios_raw = issue_data.get('fields', {}).get('customfield_11334')
@@ -601,12 +782,16 @@ def refresh():
                     # Try to get rendered version first
                     rendered_test_scenarios = issue_data.get('renderedFields', {}).get('customfield_11334')
                     if rendered_test_scenarios:
-                        test_scenarios_html = rendered_test_scenarios
+                        test_scenarios_html = render_cache.render(
+                            jira_url, key, 'customfield_11334_html', rendered_test_scenarios,
+                            sanitize_rendered_html, updated=issue_updated)
                     else:
                         # Process the raw content (could be ADF, markdown, or plain text)
-                        test_scenarios_html = process_test_scenarios_content(test_scenarios_raw)
+                        test_scenarios_html = render_cache.render(
+                            jira_url, key, 'customfield_11334', test_scenarios_raw,
+                            process_test_scenarios_content, updated=issue_updated)
                 else:
-                    logger.debug(f"No test scenarios found for {key}")
+                    logutil.log_sampled(logger, _logging.DEBUG, "No test scenarios found for %s", key)
             else:
                 logger.warning("Failed to refresh issue %s: %s", key, issue_data.get('error'))
                 # Preserve existing description if refresh fails
@@ -621,8 +806,9 @@ def refresh():
             test_scenarios_html = selected.get('test_scenarios_field', '')
         # Preserve generated test scenarios if they exist
         existing_test_scenarios = selected.get('test_scenarios', [])
-        existing_scenario_history = selected.get('scenario_history', [])
+        existing_test_scenarios_id = selected.get('test_scenarios_id')
         existing_last_prompt = selected.get('last_prompt', '')
+        existing_last_description = selected.get('last_description', '')
         
         selected_info = {
             'key': key,
@@ -632,8 +818,9 @@ def refresh():
             'description_html': description_html,
             'test_scenarios_field': test_scenarios_html,
             'test_scenarios': existing_test_scenarios,
-            'scenario_history': existing_scenario_history,
-            'last_prompt': existing_last_prompt
+            'test_scenarios_id': existing_test_scenarios_id,
+            'last_prompt': existing_last_prompt,
+            'last_description': existing_last_description
         }
         session['selected_ticket'] = selected_info
     logger.info("Refresh completed: %d results", len(results))
@@ -641,10 +828,19 @@ def refresh():
 
 @app.route('/clear_selected', methods=['POST'])
 def clear_selected():
+    speculative_generator.cancel(session_owner())
     session.pop('selected_ticket', None)
     logger.info("Cleared selected ticket")
     return jsonify({'success': True})
 
+# Stored size and encoding of each key of the current session (SQLite backend only)
+@app.route('/api/session/stats', methods=['GET'])
+def session_stats():
+    if not isinstance(app.session_interface, SqliteSessionInterface):
+        return jsonify({'error': 'Session statistics require the sqlite session backend'}), 404
+    keys = app.session_interface.key_sizes(session.sid)
+    return jsonify({'keys': keys, 'total_bytes': sum(k['bytes'] for k in keys)}), 200
+
 # New endpoint: UI event logging (for client-side events like theme toggles, AI chat interactions)
 @app.route('/log_event', methods=['POST'])
 def log_event():
@@ -687,6 +883,7 @@ def api_ai_set_key():
 
 # AI API: send chat message
 @app.route('/api/ai/chat', methods=['POST'])
+@ai_admitted
 def api_ai_chat():
     try:
         data = request.get_json() or {}
@@ -701,21 +898,20 @@ def api_ai_chat():
             return jsonify({'error': 'API key missing'}), 403
 
         ai_logger.info('Forwarding message to GoogleAI')
-        chat = GoogleAIChat(api_key)
+        chat = create_chat(api_key)
         # optionally start chat (GoogleAIChat will auto-start on send_message)
         resp = chat.send_message(message)
 
-        if resp in ("Invalid API Key or unauthorized", "AI service unavailable"):
+        if resp in AI_ERROR_RESPONSES:
             ai_logger.error('AI backend returned error: %s', resp)
             return jsonify({'error': resp}), 503
 
-        # persist response in session for viewing on the AI page
+        # persist response for viewing on the AI page
         try:
-            session.setdefault('ai_history', [])
-            session['ai_history'].append({'prompt': message, 'response': resp, 'ts': time.time()})
+            chat_history.append(*history_owner(), message, resp)
             session['last_ai_response'] = resp
         except Exception:
-            ai_logger.exception('Failed to persist AI response to session')
+            ai_logger.exception('Failed to persist AI response')
 
         ai_logger.info('AI response ready (len=%d)', len(resp))
         return jsonify({'response': resp}), 200
@@ -723,6 +919,43 @@ def api_ai_chat():
         ai_logger.exception('Unhandled exception in /api/ai/chat')
         return jsonify({'error': 'internal server error'}), 500
 
+# AI API: page through stored chat history, newest first
+@app.route('/api/ai/history', methods=['GET'])
+def api_ai_history():
+    try:
+        before = request.args.get('before', type=int)
+        limit = request.args.get('limit', default=20, type=int)
+        entries, next_before = chat_history.page(*history_owner(), before=before, limit=limit)
+        return jsonify({'history': entries, 'next_before': next_before}), 200
+    except Exception:
+        ai_logger.exception('Failed to load AI chat history')
+        return jsonify({'error': 'internal error'}), 500
+
+# AI API: latency, token and error telemetry aggregated per provider, model and endpoint
+@app.route('/api/ai/metrics', methods=['GET'])
+def api_ai_metrics():
+    if not _metrics_authorized():
+        return jsonify({'error': 'unauthorized'}), 401
+    try:
+        return jsonify({'metrics': ai_telemetry.summary(), 'providers': provider_stats(),
+                        'admission': ai_admission.stats(), 'shared_cache': shared_cache.stats(),
+                        'render_cache': render_cache.stats()}), 200
+    except Exception:
+        ai_logger.exception('Failed to collect AI metrics')
+        return jsonify({'error': 'internal error'}), 500
+
+# Prometheus scrape endpoint: request, Jira, AI, session, cache and logging
+# metrics, summed over all workers when METRICS_MULTIPROC_DIR is set
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if not _metrics_authorized():
+        return jsonify({'error': 'unauthorized'}), 401
+    try:
+        return app.response_class(exposition(), content_type=PROMETHEUS_CONTENT_TYPE)
+    except Exception:
+        logger.exception('Failed to render metrics')
+        return jsonify({'error': 'internal error'}), 500
+
 # AI API: clear API key from session (logout). Accept GET or POST to be resilient to client variations.
 @app.route('/api/ai/clear_key', methods=['POST', 'GET'])
 def api_ai_clear_key():
@@ -748,7 +981,9 @@ def api_ai_clear_session():
                 session.pop(key, None)
                 cleared_count += 1
         
-        ai_logger.info('AI session data cleared: %d items removed', cleared_count)
+        stored = chat_history.clear(*history_owner())
+        ai_logger.info('AI session data cleared: %d items removed, %d stored history entries deleted',
+                       cleared_count, stored)
         return jsonify({'success': True, 'cleared_items': cleared_count}), 200
     except Exception:
         ai_logger.exception('Failed to clear AI session')
@@ -756,13 +991,25 @@ def api_ai_clear_session():
 
 @app.route('/api/generate_test_scenarios', methods=['POST'])
 def generate_test_scenarios():
+    # Admission is taken only around a fresh generation: waiting for the
+    # speculative job must not hold one of the user's AI slots
     try:
         data = request.get_json() or {}
         description = data.get('description', '').strip()
         custom_prompt = data.get('prompt', '')
         
-        # Use the common generate_scenarios_with_ai function
-        scenarios, error = generate_scenarios_with_ai(description, custom_prompt)
+        # Default-prompt results may already have been generated when the ticket was selected
+        speculative = None
+        if not custom_prompt:
+            ticket_key = session.get('selected_ticket', {}).get('key')
+            speculative = speculative_generator.take(session_owner(), ticket_key, description,
+                                                     timeout=AI_SPECULATIVE_WAIT_SECONDS)
+        if speculative and not speculative[1]:
+            scenarios, error = speculative
+        else:
+            # Use the common generate_scenarios_with_ai function
+            with ai_admission.admit(admission_owner()):
+                scenarios, error = generate_scenarios_with_ai(description, custom_prompt)
         
         if error:
             return jsonify({'error': error}), 400 if 'required' in error.lower() else 503
@@ -787,14 +1034,21 @@ def generate_test_scenarios():
             filtered_scenarios = scenarios
         selected = session.get('selected_ticket', {})
         selected['test_scenarios'] = filtered_scenarios
+        selected['last_description'] = description
+        selected['test_scenarios_id'] = record_generation(
+            selected.get('key'), SCENARIOS, filtered_scenarios, prompt=custom_prompt or 'Default',
+            description=description)
         session['selected_ticket'] = selected
         
         return jsonify({'scenarios': filtered_scenarios})
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
     except Exception as e:
         logger.exception(f"Error generating test scenarios: {str(e)}")
         return jsonify({'error': f'Error: {str(e)}'}), 500
 
 @app.route('/api/manual_prompt_scenarios', methods=['POST'])
+@ai_admitted
 def manual_prompt_scenarios():
     try:
         data = request.get_json() or {}
@@ -804,7 +1058,8 @@ def manual_prompt_scenarios():
         # If description is not provided, use the one from the selected ticket
         if not description:
             description = selected.get('description', '').strip()
-        logger.info(f"Manual prompt request: description='{description[:100]}', prompt='{prompt[:100]}'")
+        logger.info("Manual prompt request: description='%s', prompt='%s'",
+                    logutil.truncated(description, 100), logutil.truncated(prompt, 100))
         api_key = session.get('genai_api_key')
         if not selected or not selected.get('key'):
             logger.error('Manual prompt error: No selected ticket in session')
@@ -818,7 +1073,21 @@ def manual_prompt_scenarios():
         if not prompt:
             logger.error('Manual prompt error: No prompt provided')
             return jsonify({'error': 'Prompt is required.'}), 400
-        scenarios, error = generate_scenarios_with_ai(description, prompt)
+        scenarios, error = None, None
+        incremental = False
+        followup = None
+        previous_description = selected.get('last_description')
+        if data.get('conversation', AI_CONVERSATION_MODE):
+            # Persistent per-ticket chat: follow-ups send only the new instruction
+            scenarios, error, followup = converse_scenarios(description, prompt, selected)
+        elif (data.get('incremental', True) and previous_description and selected.get('test_scenarios')
+                and prompt == selected.get('last_prompt') and description != previous_description):
+            # Same prompt on an edited description: ask only about the changed lines
+            scenarios, error = regenerate_scenarios_incrementally(
+                previous_description, description, selected['test_scenarios'], prompt)
+            incremental = scenarios is not None
+        if scenarios is None and not error:
+            scenarios, error = generate_scenarios_with_ai(description, prompt)
         if error:
             logger.error(f"Manual prompt failed: {error}")
             # Map specific errors to appropriate HTTP status codes
@@ -828,14 +1097,14 @@ def manual_prompt_scenarios():
                 return jsonify({'error': error}), 503
             else:
                 return jsonify({'error': error}), 400
-        # Update scenario history in session
-        history = selected.get('scenario_history', [])
-        # Save previous scenarios if present
+        # The scenarios being replaced become the latest history item
+        last_history = None
         if selected.get('test_scenarios'):
-            history.append({
+            last_history = {
                 'prompt': selected.get('last_prompt', 'Default'),
-                'scenarios': selected['test_scenarios']
-            })
+                'scenarios': selected['test_scenarios'],
+                'description': selected.get('last_description', '')
+            }
         # Apply formatting rules but be less aggressive to preserve AI responses
         if scenarios:
             # Filter out only clear introductory or conclusion text, be more permissive
@@ -853,87 +1122,20 @@ def manual_prompt_scenarios():
             filtered_scenarios = scenarios
         selected['test_scenarios'] = filtered_scenarios
         selected['last_prompt'] = prompt
-        selected['scenario_history'] = history
+        selected['last_description'] = description
+        # History is persisted in the scenario store, not the session
+        selected.pop('scenario_history', None)
+        selected['test_scenarios_id'] = record_generation(
+            selected['key'], SCENARIOS, filtered_scenarios or [], prompt=prompt, description=description)
         session['selected_ticket'] = selected
-        # Return new scenarios and last history item
-        last_history = history[-1] if history else None
         scenario_count = len(filtered_scenarios) if filtered_scenarios else 0
-        logger.info(f"Manual prompt success: {scenario_count} scenarios generated.")
-        return jsonify({'scenarios': filtered_scenarios, 'history': last_history}), 200
+        logger.info(f"Manual prompt success: {scenario_count} scenarios generated (incremental={incremental}).")
+        return jsonify({'scenarios': filtered_scenarios, 'history': last_history, 'incremental': incremental,
+                        'conversation_followup': followup}), 200
     except Exception as e:
         logger.error(f"Manual prompt error: {e}")
         return jsonify({'error': 'internal error'}), 500
 
-@logutil.log_exceptions
-def text_to_adf(text):
-    """Convert plain text to Atlassian Document Format (ADF).
-    
-    Args:
-        text: Plain text to convert
-        
-    Returns:
-        Dict: ADF-formatted document structure
-    """
-    if not text:
-        return {
-            "type": "doc",
-            "version": 1,
-            "content": []
-        }
-    
-    # Split text into paragraphs
-    paragraphs = text.split('\n\n')
-    content = []
-    
-    for paragraph in paragraphs:
-        paragraph = paragraph.strip()
-        if not paragraph:
-            continue
-            
-        # Check if this is a list (scenarios)
-        lines = paragraph.split('\n')
-        if len(lines) > 1 and any(line.strip().startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '-', '•', '*')) for line in lines):
-            # Create a bullet list
-            list_items = []
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                # Remove list markers
-                clean_line = re.sub(r'^(?:\d+\.|-|•|\*)\s*', '', line)
-                if clean_line:
-                    list_items.append({
-                        "type": "listItem",
-                        "content": [{
-                            "type": "paragraph",
-                            "content": [{
-                                "type": "text",
-                                "text": clean_line
-                            }]
-                        }]
-                    })
-            
-            if list_items:
-                content.append({
-                    "type": "bulletList",
-                    "content": list_items
-                })
-        else:
-            # Regular paragraph
-            content.append({
-                "type": "paragraph",
-                "content": [{
-                    "type": "text",
-                    "text": paragraph
-                }]
-            })
-    
-    return {
-        "type": "doc",
-        "version": 1,
-        "content": content
-    }
-
 @logutil.log_exceptions
 def update_jira_issue_description(issue_key, new_description):
     """
@@ -941,18 +1143,17 @@ def update_jira_issue_description(issue_key, new_description):
     
     Args:
         issue_key: The Jira issue key (e.g., PROJECT-123)
-        new_description: The new description in ADF format
+        new_description: The new description as an ADF document or markup text
         
     Returns:
         Tuple: (success: bool, error_message: str or None)
     """
     try:
-        client = get_jira_client()
-        
-        if not client.is_authenticated():
-            return False, 'Jira connection not available.'
+        client = JiraClient.from_session(connect=False)
+        if isinstance(new_description, str):
+            new_description = text_to_adf(new_description)
         
-        # Update the issue description
+        # Update the issue description (a single PUT; bad credentials come back as an error)
         result = client.update_issue(issue_key, description=new_description)
         
         if result.get('success'):
@@ -998,7 +1199,8 @@ def update_ticket_with_scenarios():
                 logger.error(f"Not authenticated with Jira for issue {issue_key}")
                 return jsonify({'success': False, 'error': 'Not authenticated with Jira.'}), 403
             
-            issue_data = client.get_issue(issue_key)
+            # Read-modify-write: start from Jira's current copy, not the shared cache
+            issue_data = client.get_issue(issue_key, cached=False)
             
             if "error" in issue_data:
                 logger.error(f"Failed to fetch issue {issue_key}: {issue_data['error']}")
@@ -1006,21 +1208,38 @@ def update_ticket_with_scenarios():
             
             # Get the current Test Plan custom field content
             current_test_plan = issue_data.get('fields', {}).get('customfield_11334', '')
+            issue_updated = issue_data.get('fields', {}).get('updated', '')
             
-            # Convert ADF to text if needed
-            if isinstance(current_test_plan, dict):
-                current_test_plan = adf_to_text(current_test_plan)
+            # Rich text (ADF) fields are edited as markup and written back as ADF,
+            # so lists, numbering, headings and formatting survive the round trip
+            test_plan_format = 'adf' if isinstance(current_test_plan, dict) else 'text'
+            if test_plan_format == 'adf':
+                current_test_plan = render_cache.render(session.get('jira_url', ''), issue_key, 'customfield_11334',
+                                                        current_test_plan, adf_to_markup, updated=issue_updated)
             elif current_test_plan is None:
                 current_test_plan = ''
             
-            logger.debug(f"Current Test Plan content for {issue_key}: {current_test_plan[:200]}...")
+            logger.debug("Current Test Plan content for %s: %s", issue_key, logutil.truncated(current_test_plan))
+            
+            # Remember which version of the ticket the preview was built from so
+            # the confirm step can refuse to overwrite a concurrent edit
+            selected['test_plan_base_updated'] = issue_updated
+            selected['test_plan_format'] = test_plan_format
+            session['selected_ticket'] = selected
             
         except Exception as e:
             logger.error(f"Error fetching issue {issue_key}: {str(e)}")
             return jsonify({'success': False, 'error': 'Failed to fetch current ticket information.'}), 500
         
-        # Parse and update the Test Plan content
-        updated_test_plan = update_test_plan_scenarios(current_test_plan, test_scenarios)
+        # Parse the Test Plan into sections and rewrite only Test Scenarios
+        base_text = current_test_plan or DEFAULT_TEMPLATE
+        current_plan, updated_plan = TestPlan.parse(base_text), TestPlan.parse(base_text)
+        if test_plan_format == 'adf':
+            # The markup is parsed back into ADF on confirm; generated text like
+            # "2*3*4" must stay literal rather than turn into emphasis
+            test_scenarios = [escape_markup(clean_scenario(s)) for s in test_scenarios]
+        updated_plan.set_scenarios(test_scenarios)
+        updated_test_plan = updated_plan.serialize()
         
         # Return preview for user confirmation
         return jsonify({
@@ -1028,6 +1247,8 @@ def update_ticket_with_scenarios():
             'preview': True,
             'current_content': current_test_plan,
             'updated_content': updated_test_plan,
+            'changed_sections': updated_plan.changed_sections(current_plan),
+            'updated': issue_updated,
             'message': 'Preview of Test Plan update. Please confirm to proceed.'
         }), 200
             
@@ -1067,21 +1288,28 @@ def confirm_update_ticket_with_scenarios():
         if not updated_content:
             return jsonify({'success': False, 'error': 'No updated content provided.'}), 400
         
+        # Version of the ticket the preview was computed from (optimistic concurrency)
+        expected_updated = data.get('expected_updated') or selected.get('test_plan_base_updated') or None
+        
         # Update the custom field using JIRA client
         try:
-            client = get_jira_client()
-            
-            if not client.is_authenticated():
-                logger.error(f"Not authenticated with Jira for issue {issue_key}")
-                return jsonify({'success': False, 'error': 'Authentication failed with Jira.'}), 403
+            # No connect/is_authenticated probe: the PUT itself rejects bad credentials,
+            # so the confirm step costs a single write (plus a fields=updated check)
+            client = JiraClient.from_session(connect=False)
             
-            # Use JIRA library method to update the custom field
-            result = client.update_issue(issue_key, **{"customfield_11334": updated_content})
+            field_value = text_to_adf(updated_content) if selected.get('test_plan_format') == 'adf' else updated_content
+            result = client.update_issue(issue_key, expected_updated=expected_updated,
+                                         **{"customfield_11334": field_value})
             
             if result.get('success'):
-                # Update the session with new test plan content
+                # Update the session with new test plan content; the written
+                # content is rendered here instead of re-fetching the ticket
                 selected['test_plan_field'] = updated_content
+                selected['test_scenarios_field'] = process_test_scenarios_content(updated_content)
+                selected.pop('test_plan_base_updated', None)
+                selected.pop('test_plan_format', None)
                 session['selected_ticket'] = selected
+                render_cache.invalidate(session.get('jira_url', ''), issue_key)
                 
                 logger.info(f"Successfully updated Test Plan for issue {issue_key}")
                 return jsonify({
@@ -1089,8 +1317,18 @@ def confirm_update_ticket_with_scenarios():
                     'message': f'Test Plan updated for {issue_key}.',
                     'reload_page': True  # Add this flag to indicate page should be reloaded
                 }), 200
+            elif result.get('conflict'):
+                logger.warning(f"Test Plan update for {issue_key} rejected: ticket changed since preview")
+                return jsonify({
+                    'success': False,
+                    'conflict': True,
+                    'error': 'This ticket was modified in Jira after the preview was generated. Reload the preview and try again.'
+                }), 409
             else:
                 error_msg = result.get('error', 'Failed to update Test Plan.')
+                if error_msg == 'Not authenticated with Jira' or result.get('status') == 401:
+                    logger.error(f"Not authenticated with Jira for issue {issue_key}")
+                    return jsonify({'success': False, 'error': 'Authentication failed with Jira.'}), 403
                 # Handle specific JIRA field error
                 if "Field 'customfield_11334' cannot be set" in error_msg:
                     error_msg = "Test Plan field not available on this ticket type."
@@ -1118,101 +1356,147 @@ def confirm_update_ticket_with_scenarios():
             'error': 'Internal server error occurred while updating ticket.'
         }), 500
 
-@logutil.log_exceptions
-def update_test_plan_scenarios(current_content, test_scenarios):
+@app.route('/api/bulk_update_test_plans', methods=['POST'])
+def bulk_update_test_plans():
+    """Start writing test scenarios into the Test Plan field of several tickets.
+
+    Expects JSON ``{"items": [{"key": "ABC-1", "scenarios": [...]}, ...], "job_id": optional}``.
+    The job runs in the background; the response (202) carries the ``job_id`` to poll
+    at ``GET /api/bulk_update_test_plans/<job_id>``. Re-submitting with the ``job_id``
+    of an interrupted run resumes it from its journal.
     """
-    Update the Test Scenarios section in the Test Plan content.
+    try:
+        if not session.get('jira_connected'):
+            logger.warning("Bulk update attempted without Jira connection")
+            return jsonify({'success': False, 'error': 'Not connected to Jira.'}), 403
+
+        data = request.get_json() or {}
+        raw_items = data.get('items')
+        if not isinstance(raw_items, list) or not raw_items:
+            return jsonify({'success': False, 'error': 'No items provided.'}), 400
+        if len(raw_items) > BULK_MAX_ITEMS:
+            return jsonify({'success': False, 'error': f'At most {BULK_MAX_ITEMS} tickets per bulk update.'}), 400
+
+        items = {}
+        for item in raw_items:
+            key = str((item or {}).get('key', '')).strip().upper()
+            scenarios = (item or {}).get('scenarios')
+            if not re.match(r"^[A-Z0-9]+-\d+$", key):
+                return jsonify({'success': False, 'error': f'Invalid ticket key: {key or "(empty)"}'}), 400
+            if not isinstance(scenarios, list) or not scenarios or not all(isinstance(s, str) for s in scenarios):
+                return jsonify({'success': False, 'error': f'No test scenarios provided for {key}.'}), 400
+            items[key] = scenarios
+
+        try:
+            journal = BulkJournal(data.get('job_id') or new_job_id(), session.get('jira_url', ''), scenario_owner())
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        client = get_jira_client()
+        if not client.is_authenticated():
+            logger.error("Not authenticated with Jira for bulk update")
+            return jsonify({'success': False, 'error': 'Authentication failed with Jira.'}), 403
+
+        prune_journals()
+        updater = BulkTestPlanUpdater(client, update_test_plan_field, journal)
+        if not bulk_jobs.submit(updater, items):
+            return jsonify({'success': False, 'job_id': journal.job_id,
+                            'error': 'This bulk job is already running.'}), 409
+
+        logger.info("Bulk update %s started for %d tickets", journal.job_id, len(items))
+        return jsonify({
+            'success': True,
+            'job_id': journal.job_id,
+            'status_url': url_for('bulk_update_status', job_id=journal.job_id)
+        }), 202
+
+    except Exception as e:
+        logger.exception(f"Unexpected error in bulk_update_test_plans: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error occurred while updating tickets.'
+        }), 500
+
+@app.route('/api/bulk_update_test_plans/<job_id>', methods=['GET'])
+def bulk_update_status(job_id):
+    """Report the progress of a bulk job started by the current user."""
+    try:
+        if not session.get('jira_connected'):
+            return jsonify({'success': False, 'error': 'Not connected to Jira.'}), 403
+        try:
+            journal = BulkJournal(job_id, session.get('jira_url', ''), scenario_owner())
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        status = journal.status()
+        if status is None:
+            return jsonify({'success': False, 'error': 'Bulk job not found.'}), 404
+        failed = sum(status['summary'].get(s, 0) for s in FAILED_STATUSES)
+        return jsonify(dict(status, success=failed == 0, running=bulk_jobs.is_running(journal)))
+
+    except Exception as e:
+        logger.exception(f"Unexpected error in bulk_update_status: {str(e)}")
+        return jsonify({'success': False, 'error': 'Internal server error occurred.'}), 500
+
+def condense_description(description, api_key):
+    """
+    Summarize an over-budget story description chunk by chunk, in parallel.
     
     Args:
-        current_content: Current Test Plan content
-        test_scenarios: List of test scenarios to add
+        description: Full story description
+        api_key: Google GenAI API key used for the summary calls
         
     Returns:
-        Updated Test Plan content with scenarios
+        Tuple: (condensed description or None, error message or None)
     """
-    if not current_content:
-        # If no existing content, create a basic template
-        current_content = (
-            "Testing Environment URL: \n\n"
-            "Permissions: \n\n"
-            "Prerequisites: \n\n"
-            "Testing Tools: \n\n"
-            "Navigation: \n\n"
-            "Test Data: \n\n"
-            "Test Scenarios: \n\n"
-            "Approved By: \n\n\n"
+    def summarize(chunk, index, total):
+        chat = create_chat(api_key)
+        resp = chat.send_message(
+            f"This is part {index} of {total} of a user story. Summarize it for test design. "
+            "Keep every acceptance criterion, business rule, constraint and data value, "
+            "copying acceptance criteria verbatim as separate lines. "
+            "Drop background, boilerplate and repetition. Output only the summary.\n\n"
+            f"Story part:\n{chunk}"
         )
-    
-    # Find the Test Scenarios section
-    lines = current_content.split('\n')
-    updated_lines = []
-    scenarios_section_found = False
-    scenarios_added = False
-    
-    for i, line in enumerate(lines):
-        if 'Test Scenarios:' in line and not scenarios_section_found:
-            scenarios_section_found = True
-            updated_lines.append(line)
-            
-            # Add an empty line after "Test Scenarios:"
-            updated_lines.append('')
-            
-            # Add the numbered test scenarios with strict formatting
-            for j, scenario in enumerate(test_scenarios, 1):
-                # Ensure consistent formatting by removing any existing markers
-                clean_scenario = re.sub(r'^(?:\d+\.|-|•|\*)\s*', '', scenario.strip())
-                updated_lines.append(f"{j}. {clean_scenario}")
-            
-            updated_lines.append('')  # Add empty line after scenarios
-            scenarios_added = True
-            
-            # Skip existing content until we find the next section or "Approved By:"
-            k = i + 1
-            while k < len(lines):
-                next_line = lines[k].strip()
-                # Stop when we find the next section (containing ":" and not empty)
-                if next_line and ':' in next_line and not next_line.startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.')):
-                    break
-                k += 1
-            
-            # Continue from the next section
-            for remaining_line in lines[k:]:
-                updated_lines.append(remaining_line)
-            break
-        else:
-            updated_lines.append(line)
-    
-    # If Test Scenarios section wasn't found, append it before "Approved By:"
-    if not scenarios_added:
-        # Look for "Approved By:" and insert before it
-        for i, line in enumerate(updated_lines):
-            if 'Approved By:' in line:
-                # Insert Test Scenarios section before Approved By
-                updated_lines.insert(i, 'Test Scenarios: ')
-                updated_lines.insert(i + 1, '')
-                
-                for j, scenario in enumerate(test_scenarios, 1):
-                    updated_lines.insert(i + 2 + j, f"{j}. {scenario}")
-                
-                updated_lines.insert(i + 2 + len(test_scenarios), '')
-                break
-        else:
-            # If "Approved By:" not found, append at the end
-            updated_lines.extend([
-                'Test Scenarios: ',
-                ''
-            ])
-            for j, scenario in enumerate(test_scenarios, 1):
-                updated_lines.append(f"{j}. {scenario}")
-            updated_lines.extend(['', 'Approved By: ', '', ''])
-    
-    return '\n'.join(updated_lines)
+        if resp in AI_ERROR_RESPONSES:
+            raise RuntimeError(resp)
+        return resp
+
+    # The same story is condensed once per host, whichever worker or user asks first
+    digest = hashlib.sha256(description.encode('utf-8')).hexdigest()
+    cache_key = f"ai_condensed:{default_provider()}:{AI_DESCRIPTION_TOKEN_BUDGET}:{AI_CHUNK_TOKENS}:{digest}"
+    condensed = shared_cache.get(cache_key)
+    if condensed is not None:
+        logger.info("Using cached condensed description")
+        return condensed, None
 
-def generate_scenarios_with_ai(description, prompt=None):
+    try:
+        condensed = map_reduce_text(description, summarize, AI_DESCRIPTION_TOKEN_BUDGET,
+                                    AI_CHUNK_TOKENS, max_workers=AI_MAP_MAX_WORKERS)
+    except RuntimeError as e:
+        logger.error(f"Description summarization failed: {e}")
+        return None, str(e)
+    logger.info(f"Condensed description from ~{estimate_tokens(description)} to ~{estimate_tokens(condensed)} tokens")
+    shared_cache.set(cache_key, condensed, AI_CONDENSED_CACHE_TTL)
+    return condensed, None
+
+def generate_scenarios_with_ai(description, prompt=None, api_key=None):
     if not description:
         logger.error('No description provided for scenario generation')
         return None, 'Description is required.'
         
+    # Use Google AI for test scenario generation; background callers pass the key explicitly
+    api_key = api_key or session.get('genai_api_key')
+    if not api_key:
+        logger.error('AI API key missing for scenario generation')
+        return None, 'AI API key missing.'
+        
+    # Very long stories are summarized first so one prompt stays within budget
+    if estimate_tokens(description) > AI_DESCRIPTION_TOKEN_BUDGET:
+        description, error = condense_description(description, api_key)
+        if error:
+            return None, error
+        
     # Prepare the prompt with strict formatting instructions
     if prompt:
         full_prompt = f"{prompt}\n\nStory:\n{description}\n\nTest Scenarios:"
@@ -1235,20 +1519,17 @@ def generate_scenarios_with_ai(description, prompt=None):
             \n\nStory:\n{description}\n\nTest Scenarios:
             """
         
-    
-    # Use Google AI for test scenario generation
-    api_key = session.get('genai_api_key')
-    if not api_key:
-        logger.error('AI API key missing for scenario generation')
-        return None, 'AI API key missing.'
-        
-    chat = GoogleAIChat(api_key)
+    chat = create_chat(api_key)
     try:
         resp = chat.send_message(full_prompt)
         logger.info(f"Google AI prompt executed: {prompt if prompt else 'default'}")
     except Exception as e:
         logger.error(f"Google AI error: {e}")
         return None, 'AI error: ' + str(e)
+    return parse_scenarios(resp), None
+
+def parse_scenarios(resp):
+    """Extract scenario lines from a model response (numbered, bulleted or plain lines)."""
     scenarios = []
     if resp:
         for line in resp.splitlines():
@@ -1270,7 +1551,112 @@ def generate_scenarios_with_ai(description, prompt=None):
                 # Check if it's a valid scenario by ensuring it's not just introductory text
                 if len(line) > 10 and not line.lower().startswith(("note:", "important:", "reminder:")):
                     scenarios.append(line)
-    return scenarios, None
+    return scenarios
+
+def converse_scenarios(description, prompt, selected):
+    """
+    Generate or refine scenarios in a persistent chat for the selected ticket.
+    
+    The story is sent once, when the conversation starts (into a provider-side
+    context cache when it is large enough); follow-up prompts send only the new
+    instruction. Editing the description starts a new conversation.
+    
+    Conversations live in this worker's memory only: they are lost on restart
+    and not shared between workers, so a follow-up served by another worker
+    starts a new conversation (and re-sends the story).
+    
+    Args:
+        description: Current story description
+        prompt: User instruction
+        selected: Selected ticket dict from the session
+        
+    Returns:
+        Tuple: (scenarios or None, error message or None, whether this was a follow-up)
+    """
+    api_key = session.get('genai_api_key')
+    if not api_key:
+        logger.error('AI API key missing for scenario generation')
+        return None, 'AI API key missing.', False
+
+    ticket_key = selected.get('key')
+    if not ticket_key:
+        logger.error('Conversation requested without a selected ticket')
+        return None, 'No selected ticket. Please select a ticket first.', False
+
+    owner = session_owner()
+    conversation = conversations.get(owner, ticket_key, description)
+    followup = conversation is not None
+    if followup:
+        message = (f"{prompt}\n\nApply this to the latest test scenarios in this conversation and reply "
+                   "with the complete updated numbered list only.")
+    else:
+        story = description
+        if estimate_tokens(story) > AI_DESCRIPTION_TOKEN_BUDGET:
+            story, error = condense_description(story, api_key)
+            if error:
+                return None, error, False
+        chat = create_chat(api_key)
+        cached = (estimate_tokens(story) >= AI_CONTEXT_CACHE_MIN_TOKENS
+                  and chat.start_cached_context(f"Story:\n{story}", ttl_seconds=int(AI_CONVERSATION_TTL)))
+        conversation = conversations.put(owner, ticket_key, description, chat, cached)
+        # Scenarios generated before the conversation existed give refinements something to refer to
+        current = ''
+        if selected.get('test_scenarios'):
+            current = "\n\nCurrent test scenarios:\n" + '\n'.join(
+                f"{i}. {s}" for i, s in enumerate(selected['test_scenarios'], 1))
+        story_part = '' if cached else f"\n\nStory:\n{story}"
+        message = f"{prompt}{story_part}{current}\n\nTest Scenarios:"
+
+    with conversation.lock:
+        resp = conversation.chat.send_message(message)
+        conversation.turns += 1
+    if resp in AI_ERROR_RESPONSES:
+        conversations.drop(owner, ticket_key)
+        return None, resp, followup
+    logger.info(f"Conversation turn {conversation.turns} for {ticket_key} (follow-up={followup}, "
+                f"cached context={conversation.cached_context}, ~{estimate_tokens(message)} prompt tokens)")
+    return parse_scenarios(resp), None, followup
+
+def regenerate_scenarios_incrementally(previous_description, description, previous_scenarios, prompt):
+    """
+    Update existing scenarios by asking the model only about changed requirement lines.
+    
+    Args:
+        previous_description: Description the existing scenarios were generated from
+        description: Current description
+        previous_scenarios: Scenarios generated from previous_description
+        prompt: User instruction used for the previous generation
+        
+    Returns:
+        Tuple: (merged scenarios or None, error message or None). (None, None) means
+        the change is too large for an incremental update and a full run is needed.
+    """
+    diff = diff_criteria(previous_description, description)
+    if not diff.added and not diff.removed:
+        return None, None
+    if diff.change_ratio > AI_INCREMENTAL_MAX_CHANGE:
+        logger.info(f"Description changed too much for incremental regeneration ({diff.change_ratio:.0%})")
+        return None, None
+
+    api_key = session.get('genai_api_key')
+    if not api_key:
+        logger.error('AI API key missing for scenario generation')
+        return None, 'AI API key missing.'
+
+    chat = create_chat(api_key)
+    try:
+        resp = chat.send_message(build_incremental_prompt(prompt, previous_scenarios, diff))
+    except Exception as e:
+        logger.error(f"Google AI error: {e}")
+        return None, 'AI error: ' + str(e)
+    if resp in AI_ERROR_RESPONSES:
+        return None, resp
+
+    removed, rest = split_removals(resp, len(previous_scenarios))
+    merged = merge_scenarios(previous_scenarios, removed, parse_scenarios(rest))
+    logger.info(f"Incremental regeneration: {len(diff.added)} added / {len(diff.removed)} removed lines, "
+                f"{len(removed)} scenarios dropped, {len(merged) - len(previous_scenarios) + len(removed)} added")
+    return merged, None
 
 def expand_ticket_sequence(query):
     """
@@ -1302,7 +1688,7 @@ def expand_ticket_sequence(query):
 
 @app.route('/api/store_test_cases', methods=['POST'])
 def store_test_cases():
-    """Store generated test cases in the backend session for persistence across page refreshes."""
+    """Store generated test cases in the scenario store for persistence across page refreshes."""
     try:
         # Check if user has a selected ticket
         selected = session.get('selected_ticket', {})
@@ -1318,9 +1704,12 @@ def store_test_cases():
             logger.warning("Invalid test cases data format")
             return jsonify({'success': False, 'error': 'Invalid test cases format.'}), 400
 
-        # Store test cases in session
-        selected['generated_test_cases'] = test_cases
-        session['selected_ticket'] = selected
+        # Persist test cases in the scenario store; older sessions may still carry a copy
+        if record_generation(selected['key'], TEST_CASES, test_cases) is None:
+            return jsonify({'success': False, 'error': 'Failed to store test cases.'}), 500
+        if 'generated_test_cases' in selected:
+            selected.pop('generated_test_cases')
+            session['selected_ticket'] = selected
 
         logger.info(f"Stored {len(test_cases)} test cases for ticket {selected['key']}")
         return jsonify({'success': True, 'stored_count': len(test_cases)}), 200
@@ -1329,5 +1718,47 @@ def store_test_cases():
         logger.exception(f"Error storing test cases: {str(e)}")
         return jsonify({'success': False, 'error': 'Failed to store test cases.'}), 500
 
+@app.route('/api/scenarios/history', methods=['GET'])
+def scenario_history_page():
+    """
+    Page through stored generations for a ticket, newest first.
+    
+    Query args: ticket (defaults to the selected ticket), kind (scenarios or
+    test_cases), before (cursor), limit. Only the current user's generations
+    are returned.
+    """
+    ticket_key = request.args.get('ticket') or session.get('selected_ticket', {}).get('key')
+    kind = request.args.get('kind', SCENARIOS)
+    if not ticket_key:
+        return jsonify({'error': 'ticket is required'}), 400
+    if kind not in KINDS:
+        return jsonify({'error': f'kind must be one of {", ".join(KINDS)}'}), 400
+    owner = scenario_owner()
+    try:
+        entries, next_before = scenario_store.history(
+            session.get('jira_url', ''), ticket_key, kind, owner=owner,
+            before=request.args.get('before', type=int), limit=request.args.get('limit', default=20, type=int))
+    except Exception:
+        logger.exception("Failed to read scenario history for %s", ticket_key)
+        return jsonify({'error': 'internal error'}), 500
+    return jsonify({'ticket': ticket_key, 'kind': kind, 'history': entries, 'next_before': next_before}), 200
+
+@app.route('/api/scenarios/latest', methods=['GET'])
+def scenario_latest():
+    """Most recent stored generation of a kind for a ticket (same query args as history)."""
+    ticket_key = request.args.get('ticket') or session.get('selected_ticket', {}).get('key')
+    kind = request.args.get('kind', SCENARIOS)
+    if not ticket_key:
+        return jsonify({'error': 'ticket is required'}), 400
+    if kind not in KINDS:
+        return jsonify({'error': f'kind must be one of {", ".join(KINDS)}'}), 400
+    owner = scenario_owner()
+    try:
+        entry = scenario_store.latest(session.get('jira_url', ''), ticket_key, kind, owner=owner)
+    except Exception:
+        logger.exception("Failed to read latest %s for %s", kind, ticket_key)
+        return jsonify({'error': 'internal error'}), 500
+    return jsonify({'ticket': ticket_key, 'kind': kind, 'latest': entry}), 200
+
 if __name__ == "__main__":
     app.run(debug=False)
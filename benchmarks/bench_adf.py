@@ -0,0 +1,132 @@
+"""
+Micro-benchmark for adf.adf_to_text on large synthetic ADF documents.
+
+Compares the iterative walker with the previous recursive implementation
+(reproduced below, including its per-node debug logging) and checks that
+deeply nested documents no longer hit the recursion limit.
+
+Usage:
+    python benchmarks/bench_adf.py [--paragraphs 2000] [--repeat 5]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adf import adf_to_text  # noqa: E402
+from logger import log_exceptions  # noqa: E402
+
+legacy_logger = logging.getLogger("bench_adf.legacy")
+
+
+def legacy_adf_to_text(node):
+    """The recursive converter previously in app.py; every level goes through log_exceptions."""
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return node
+    text_parts = []
+    if isinstance(node, dict):
+        if 'text' in node:
+            text_parts.append(node.get('text', ''))
+        if 'content' in node and isinstance(node['content'], list):
+            for child in node['content']:
+                child_text = legacy_adf_to_text(child)
+                if child_text:
+                    text_parts.append(child_text)
+        node_type = node.get('type', '')
+        if node_type == 'paragraph':
+            text_parts.append('\n')
+        elif node_type == 'hardBreak':
+            text_parts.append('\n')
+        elif node_type in ['bulletList', 'orderedList']:
+            text_parts.append('\n')
+        elif node_type == 'listItem':
+            text_parts.insert(0, '• ')
+            text_parts.append('\n')
+    elif isinstance(node, list):
+        for n in node:
+            child_text = legacy_adf_to_text(n)
+            if child_text:
+                text_parts.append(child_text)
+    result = ''.join([p for p in text_parts if p])
+    legacy_logger.debug("Extracted text from ADF node: %s", (result[:200] + '...') if len(result) > 200 else result)
+    return result
+
+
+legacy_adf_to_text = log_exceptions(legacy_adf_to_text)
+
+
+def text(value):
+    return {"type": "text", "text": value}
+
+
+def paragraph(*content):
+    return {"type": "paragraph", "content": list(content)}
+
+
+def make_document(paragraphs: int) -> dict:
+    """A story-like document: prose, nested lists, a table and code every 20 blocks."""
+    content = []
+    for i in range(paragraphs):
+        content.append(paragraph(text(f"Paragraph {i} describes a requirement "), text("in some detail, "),
+                                 {"type": "mention", "attrs": {"id": str(i), "text": "@Reviewer"}},
+                                 text(" must confirm it.")))
+        if i % 20 == 0:
+            content.append({"type": "bulletList", "content": [
+                {"type": "listItem", "content": [
+                    paragraph(text(f"Criterion {i}.{j}")),
+                    {"type": "orderedList", "content": [
+                        {"type": "listItem", "content": [paragraph(text(f"Step {k}"))]} for k in range(3)]},
+                ]} for j in range(5)]})
+            content.append({"type": "table", "content": [
+                {"type": "tableRow", "content": [
+                    {"type": "tableCell", "content": [paragraph(text(f"r{r}c{c}"))]} for c in range(4)]}
+                for r in range(5)]})
+            content.append({"type": "codeBlock", "content": [text("assert response.status == 200\n" * 3)]})
+    return {"type": "doc", "version": 1, "content": content}
+
+
+def make_deep_document(depth: int) -> dict:
+    doc = current = {"type": "doc", "content": []}
+    for i in range(depth):
+        nested = {"type": "bulletList", "content": [{"type": "listItem", "content": [paragraph(text(f"level {i}"))]}]}
+        current["content"].append(nested)
+        current = nested["content"][0]
+    return doc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    doc = make_document(args.paragraphs)
+    size = len(adf_to_text(doc))
+    print(f"Synthetic document: {args.paragraphs} paragraphs, {size} characters of text")
+    for name, func in (("recursive (legacy)", legacy_adf_to_text), ("iterative", adf_to_text)):
+        best = min(timeit.repeat(lambda: func(doc), number=1, repeat=args.repeat))
+        print(f"  {name:<20} {best * 1000:8.2f} ms")
+
+    depth = sys.getrecursionlimit() * 2
+    deep = make_deep_document(depth)
+    # log_exceptions reports the RecursionError once per unwound level
+    logging.disable(logging.CRITICAL)
+    try:
+        legacy_adf_to_text(deep)
+        legacy = "ok"
+    except RecursionError:
+        legacy = "RecursionError"
+    finally:
+        logging.disable(logging.NOTSET)
+    best = min(timeit.repeat(lambda: adf_to_text(deep), number=1, repeat=args.repeat))
+    print(f"Nested lists {depth} levels deep: legacy {legacy}, iterative {best * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark for logger.JsonFormatter with and without orjson.
+
+Formats the same request-scoped record (request id, user, route, upstream
+timings) with the orjson-backed formatter and with the stdlib json module,
+and checks that both produce the same object. Also times compressing one
+rotated segment of such records with gzip and zstd.
+
+Usage:
+    python benchmarks/bench_log_formatter.py [--records 20000] [--repeat 5]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logger as logutil  # noqa: E402
+
+
+def make_record() -> logging.LogRecord:
+    record = logging.makeLogRecord({
+        "name": "app", "levelno": logging.INFO, "levelname": "INFO", "funcName": "select_ticket",
+        "lineno": 512, "msg": "GET /select?key=%s 200 %sB %.3fs", "args": ("QA-123", 2048, 0.412),
+    })
+    record.context = {
+        "request_id": "6f1c2a9e0b7d4c3f8e5a1b2c3d4e5f60", "method": "GET", "route": "/select",
+        "user": "tester@example.com", "timings": {"jira": 0.2841, "ai": 1.9034},
+    }
+    return record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    formatter = logutil.JsonFormatter()
+    record = make_record()
+    fast = formatter.format(record)
+    orjson, logutil.orjson = logutil.orjson, None
+    try:
+        slow = formatter.format(record)
+        stdlib = min(timeit.repeat(lambda: formatter.format(record), number=args.records, repeat=args.repeat))
+    finally:
+        logutil.orjson = orjson
+    same = json.loads(fast) == json.loads(slow)
+    print(f"{args.records} records; identical objects: {same}; orjson installed: {orjson is not None}")
+    print(f"  {'json (stdlib)':<20} {stdlib / args.records * 1e6:8.2f} us/record")
+    if orjson is not None:
+        best = min(timeit.repeat(lambda: formatter.format(record), number=args.records, repeat=args.repeat))
+        print(f"  {'orjson':<20} {best / args.records * 1e6:8.2f} us/record")
+
+    lines = []
+    for i in range(args.records):
+        record.args = (f"QA-{i}", 2048 + i % 977, 0.4 + i % 89 / 100)
+        record.context["timings"] = {"jira": 0.28 + i % 13 / 100, "ai": 1.9 + i % 31 / 10}
+        lines.append(formatter.format(record))
+    segment = ("\n".join(lines) + "\n").encode("utf-8")
+    print(f"Rotated segment of {len(segment) / 1e6:.1f} MB:")
+    codecs = [("gzip", lambda: gzip.compress(segment, compresslevel=6))]
+    if logutil.zstandard is not None:
+        codecs.append(("zstd", lambda: logutil.zstandard.ZstdCompressor(level=3).compress(segment)))
+    for name, compress in codecs:
+        best = min(timeit.repeat(compress, number=1, repeat=args.repeat))
+        print(f"  {name:<20} {best * 1000:8.2f} ms   {len(segment) / len(compress()):6.1f}x smaller")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Micro-benchmark for the logging cost of one search/select/generate request at INFO.
+
+Replays the log calls a request makes (one search over many issues, one issue
+fetch and update, one AI call) in three styles: no logging at all, the
+previous eager style (f-strings, truncation and ``str(response)`` evaluated
+on every call) and the lazy helpers in ``logger.py``. Records go through a
+real logger at INFO into a handler that formats and discards them, so the
+difference is what DEBUG-only arguments cost when nobody reads them.
+
+Usage:
+    python benchmarks/bench_logging.py [--issues 50] [--repeat 200]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logger as logutil  # noqa: E402
+
+
+class DiscardHandler(logging.Handler):
+    """Formats every record, like a real handler would, then drops it."""
+
+    def emit(self, record):
+        self.format(record)
+
+
+bench_logger = logging.getLogger("bench_logging")
+bench_logger.setLevel(logging.INFO)
+bench_logger.addHandler(DiscardHandler())
+bench_logger.propagate = False
+
+
+class FakeResponse:
+    """Stands in for an SDK response whose repr walks a large object tree."""
+
+    __slots__ = ("candidates",)
+
+    def __init__(self, text):
+        self.candidates = [{"content": {"parts": [{"text": text}]}, "index": i} for i in range(20)]
+
+    def __str__(self):
+        return json.dumps({"candidates": self.candidates}, indent=2)
+
+
+def make_request(issues: int):
+    search = [{"key": f"QA-{i}", "updated": f"2024-01-{i % 28 + 1:02d}T10:30:00.000+0000"} for i in range(issues)]
+    rendered = "<p>" + "Rendered scenario text. " * 400 + "</p>"
+    adf = {"type": "doc", "version": 1, "content": [
+        {"type": "paragraph", "content": [{"type": "text", "text": f"Scenario {i}: " + "step " * 20}]}
+        for i in range(100)]}
+    message = "Generate test scenarios for this story. " * 500
+    return search, rendered, adf, message, FakeResponse(message)
+
+
+def eager(search, rendered, adf, message, response):
+    log = bench_logger
+    jql = "project = QA ORDER BY updated DESC"
+    log.debug(f"Searching Jira with JQL: {jql}")
+    for issue in search:
+        key, updated = issue["key"], issue["updated"]
+        log.debug(f"Processing updated field for {key}: {updated}")
+        log.debug(f"Sending ISO timestamp for {key}: {updated}")
+        log.debug(f"No test scenarios found for {key}")
+    log.info(f"Search completed: {len(search)} results found")
+    log.debug(f"Found rendered customfield_11334: {str(rendered)[:200]}...")
+    log.debug(f"Found customfield_11334: {str(adf)[:200]}...")
+    log.debug(f"Update payload: {{'fields': {{'customfield_11334': {adf}}}}}")
+    log.info('Sending message to GenAI (truncated): %s', (message[:200] + '...') if len(message) > 200 else message)
+    log.debug('Request payload: %s', {'message': message})
+    log.debug('Response raw payload: %s', getattr(response, '__dict__', str(response)))
+
+
+def lazy(search, rendered, adf, message, response):
+    log = bench_logger
+    log.debug("Searching Jira with JQL: %s", "project = QA ORDER BY updated DESC")
+    for issue in search:
+        key, updated = issue["key"], issue["updated"]
+        logutil.log_sampled(log, logging.DEBUG, "Processing updated field for %s: %s", key, updated)
+        logutil.log_sampled(log, logging.DEBUG, "Sending ISO timestamp for %s: %s", key, updated)
+        logutil.log_sampled(log, logging.DEBUG, "No test scenarios found for %s", key)
+    log.info("Search completed: %d results found", len(search))
+    log.debug("Found rendered customfield_11334: %s", logutil.truncated(rendered))
+    log.debug("Found customfield_11334: %s", logutil.truncated(adf))
+    log.debug("Update payload: %s",
+              logutil.truncated(logutil.lazy(json.dumps, {"fields": {"customfield_11334": adf}}), 10000))
+    log.info('Sending message to GenAI (%d chars): %s', len(message), logutil.truncated(message))
+    log.debug('Request payload: %s', logutil.truncated(message, 10000))
+    log.debug('Response raw payload: %s', logutil.object_state(response))
+
+
+def silent(search, rendered, adf, message, response):
+    for issue in search:
+        key, updated = issue["key"], issue["updated"]
+
+
+def parse_failures(style, issues: int):
+    """Every issue in the search has a malformed timestamp."""
+    for i in range(issues):
+        if style == "eager":
+            bench_logger.warning(f"Failed to parse updated date 'garbage' for QA-{i}: invalid isoformat string")
+        else:
+            logutil.log_rate_limited(bench_logger, logging.WARNING, "bench-parse", 60,
+                                     "Failed to parse updated date '%s' for %s: %s",
+                                     "garbage", f"QA-{i}", "invalid isoformat string")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--issues", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    request = make_request(args.issues)
+    print(f"One request at INFO: {args.issues} search results, one fetch/update, one AI call")
+    baseline = None
+    for name, func in (("no logging", silent), ("eager (legacy)", eager), ("lazy helpers", lazy)):
+        best = min(timeit.repeat(lambda: func(*request), number=1, repeat=args.repeat))
+        baseline = best if baseline is None else baseline
+        print(f"  {name:<20} {best * 1e6:10.1f} us   overhead {(best - baseline) * 1e6:10.1f} us")
+
+    print(f"Search with {args.issues} malformed timestamps (WARNING records written):")
+    for style in ("eager", "rate-limited"):
+        logutil._rate_limit_state.clear()
+        best = min(timeit.repeat(lambda: parse_failures(style, args.issues), number=1, repeat=args.repeat))
+        print(f"  {style:<20} {best * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for markup.markdown_to_html on large Test Plan fields.
+
+Compares the single-pass renderer with the previous multi-pass converter
+(reproduced below) and checks that both produce identical HTML for content
+the previous converter supported: paragraphs, bold, italic, links and flat
+bullet and numbered lists.
+
+Usage:
+    python benchmarks/bench_markup.py [--sections 500] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logger import log_exceptions  # noqa: E402
+from markup import markdown_to_html  # noqa: E402
+
+
+@log_exceptions
+def legacy_markdown_to_html(content):
+    """The string branch of the previous app.process_test_scenarios_content."""
+    html_content = content.replace('\n', '<br>\n')
+    import re
+    html_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_content)
+    html_content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html_content)
+    html_content = re.sub(r'\[([^\]]+)\]\(([^\)]+)\)', r'<a href="\2">\1</a>', html_content)
+
+    lines = html_content.split('\n')
+    processed_lines = []
+    in_list = False
+    list_type = None
+
+    for line in lines:
+        if re.match(r'^\s*[-*+]\s+', line):
+            if not in_list:
+                processed_lines.append('<ul>')
+                in_list = True
+                list_type = 'ul'
+            elif list_type != 'ul':
+                processed_lines.append('</ol>')
+                processed_lines.append('<ul>')
+                list_type = 'ul'
+            processed_lines.append('<li>' + re.sub(r"^\s*[-*+]\s+", "", line) + '</li>')
+        elif re.match(r'^\s*\d+\.\s+', line):
+            if not in_list:
+                processed_lines.append('<ol>')
+                in_list = True
+                list_type = 'ol'
+            elif list_type != 'ol':
+                processed_lines.append('</ul>')
+                processed_lines.append('<ol>')
+                list_type = 'ol'
+            processed_lines.append('<li>' + re.sub(r"^\s*\d+\.\s+", "", line) + '</li>')
+        else:
+            if in_list:
+                processed_lines.append('</ul>' if list_type == 'ul' else '</ol>')
+                in_list = False
+                list_type = None
+            processed_lines.append(line)
+
+    if in_list:
+        processed_lines.append('</ul>' if list_type == 'ul' else '</ol>')
+
+    return '\n'.join(processed_lines)
+
+
+def make_test_plan(sections: int) -> str:
+    """A Test Plan made of the constructs both converters support."""
+    lines = []
+    for i in range(sections):
+        lines.append(f"**Section {i}** covers the *checkout* flow, see [spec](https://example.com/spec/{i}).")
+        lines.append("Preconditions are listed below.")
+        lines.extend(f"- Precondition {j} with **emphasis**" for j in range(4))
+        lines.append("")
+        lines.extend(f"{j}. Step {j}: submit the form and verify the *result*" for j in range(1, 6))
+        lines.append("* Mixed bullet after a numbered list")
+        lines.append("Expected: the order is confirmed.")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sections", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_test_plan(args.sections)
+    same = legacy_markdown_to_html(text) == markdown_to_html(text)
+    print(f"Test Plan: {args.sections} sections, {len(text)} characters; identical output: {same}")
+    for name, func in (("multi-pass (legacy)", legacy_markdown_to_html), ("single-pass", markdown_to_html)):
+        best = min(timeit.repeat(lambda: func(text), number=1, repeat=args.repeat))
+        print(f"  {name:<20} {best * 1000:8.2f} ms")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Bulk Test Plan Update Module
+
+Writes generated test scenarios into the Test Plan custom field of many Jira
+issues in parallel. Calls are throttled by a shared token bucket so a large
+batch stays inside Jira's rate limits, issues whose Test Plan would not change
+are skipped, and every outcome is appended to a small on-disk journal so an
+interrupted job can be resumed by re-submitting it with the same job id.
+
+Journals are scoped to the Jira site and user that started the job, so a job
+id only ever resumes (or reports) that user's own job, and journals not
+written to for JIRA_BULK_JOURNAL_RETENTION_DAYS are deleted. Jobs run on
+background threads (``BulkJobRunner``) so a large batch never holds a
+request worker.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from logger import get_logger
+from storage import data_path
+
+logger = get_logger(__name__)
+
+TEST_PLAN_FIELD = "customfield_11334"
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("JIRA_BULK_MAX_WORKERS", "4"))
+DEFAULT_RATE_PER_SEC = float(os.environ.get("JIRA_BULK_RATE_PER_SEC", "5"))
+DEFAULT_MAX_RETRIES = int(os.environ.get("JIRA_BULK_MAX_RETRIES", "3"))
+JOURNAL_RETENTION_DAYS = float(os.environ.get("JIRA_BULK_JOURNAL_RETENTION_DAYS", "7"))
+
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# HTTP statuses worth retrying: rate limiting and transient gateway errors
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+# Journal statuses that mean "nothing left to do for this issue"
+_DONE_STATUSES = ("updated", "unchanged")
+
+# Statuses that make a job report partial failure
+FAILED_STATUSES = ("failed", "conflict")
+
+
+def content_hash(text: Optional[str]) -> str:
+    """
+    Hash Test Plan text after normalising whitespace that Jira does not preserve.
+
+    Args:
+        text: Test Plan content
+
+    Returns:
+        Hex SHA-256 digest of the normalised content
+    """
+    lines = [line.rstrip() for line in (text or "").strip().splitlines()]
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def scenarios_hash(scenarios: List[str]) -> str:
+    """Hash the requested scenario list so a resumed job can tell if its input changed."""
+    return hashlib.sha256(json.dumps(scenarios, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by all workers of a bulk job.
+
+    A 429 from Jira calls ``pause`` so every worker backs off, not just the one
+    that was throttled.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: Optional[int] = None):
+        self.rate = max(rate_per_sec, 0.1)
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request slot is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out slots for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+def summarize(results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """Count per-issue results by status."""
+    summary: Dict[str, int] = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return summary
+
+
+class BulkJournal:
+    """
+    Append-only JSON-lines journal of per-issue outcomes for one bulk job.
+
+    Each line is flushed and fsynced before the worker moves on, so after a
+    crash the journal reflects every write that Jira acknowledged. The file
+    name is derived from the Jira site and user as well as the job id, so
+    another account submitting the same job id gets a journal of its own.
+
+    Args:
+        job_id: Client-supplied or generated job id
+        site: Jira base URL the job writes to
+        owner: Jira user running the job
+    """
+
+    def __init__(self, job_id: str, site: str, owner: str):
+        if not _JOB_ID_RE.match(job_id or ""):
+            raise ValueError(f"Invalid bulk job id: {job_id!r}")
+        self.job_id = job_id
+        scope = hashlib.sha256(f"{site}\n{owner}".encode("utf-8")).hexdigest()[:16]
+        self.path = data_path("bulk_jobs", f"{scope}-{job_id}.jsonl")
+        self._lock = threading.Lock()
+
+    def _entries(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write; everything before it is valid
+                    logger.warning("Skipping unreadable line in bulk journal %s", self.job_id)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the journal.
+
+        Returns:
+            Dict mapping issue key to its most recent journal entry
+        """
+        return {entry["key"]: entry for entry in self._entries() if entry.get("key")}
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """
+        Progress of the job as recorded in the journal.
+
+        Returns:
+            Dict with ``finished``, ``total``, ``summary`` and the latest
+            per-issue ``results``, or None when the job has no journal
+        """
+        if not os.path.exists(self.path):
+            return None
+        results: Dict[str, Dict[str, Any]] = {}
+        total, summary = None, None
+        for entry in self._entries():
+            event = entry.get("event")
+            if event == "started":
+                total, summary = entry.get("total"), None
+            elif event == "finished":
+                summary = entry.get("summary")
+            elif entry.get("key"):
+                results[entry["key"]] = entry
+        return {"job_id": self.job_id, "finished": summary is not None, "total": total,
+                "summary": summary if summary is not None else summarize(results.values()),
+                "results": list(results.values())}
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Append one outcome (or a job ``event``) to the journal and force it to disk."""
+        line = json.dumps(dict(entry, ts=time.time()), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+
+
+def prune_journals(retention_days: float = JOURNAL_RETENTION_DAYS) -> int:
+    """
+    Delete journals that have not been written to for ``retention_days``.
+
+    Args:
+        retention_days: Age limit; 0 keeps every journal
+
+    Returns:
+        Number of journals removed
+    """
+    if retention_days <= 0:
+        return 0
+    directory = os.path.dirname(data_path("bulk_jobs", "_"))
+    cutoff = time.time() - retention_days * 86400
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if name.endswith(".jsonl") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            # Removed concurrently by another worker
+            continue
+    if removed:
+        logger.info("Pruned %d bulk journal(s) older than %s days", removed, retention_days)
+    return removed
+
+
+class BulkTestPlanUpdater:
+    """
+    Run Test Plan updates for many issues with bounded concurrency.
+
+    The Test Plan content itself is produced by the caller-supplied
+    ``build_update(current_value, scenarios)`` so this module stays free of
+    the formatting rules (plain text vs. ADF) that live in ``app.py``.
+    """
+
+    def __init__(self, client, build_update: Callable[[Any, List[str]], Tuple[str, str, Any]],
+                 journal: BulkJournal,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 rate_per_sec: float = DEFAULT_RATE_PER_SEC,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        """
+        Initialize the updater.
+
+        Args:
+            client: Authenticated JiraClient shared by all workers
+            build_update: Function taking the raw field value (ADF, str or None)
+                and the scenarios, returning (current text, updated text, value to write)
+            journal: Journal used to record and resume outcomes
+            max_workers: Maximum number of issues processed concurrently
+            rate_per_sec: Maximum Jira calls per second across all workers
+            max_retries: Retries for rate-limited or transient failures
+        """
+        self.client = client
+        self.build_update = build_update
+        self.journal = journal
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(0, max_retries)
+        self.limiter = RateLimiter(rate_per_sec)
+
+    def run(self, items: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        """
+        Update every issue in ``items``.
+
+        Args:
+            items: Mapping of issue key to the scenarios to write
+
+        Returns:
+            Per-issue result dicts in the order the issues were given
+        """
+        done = self.journal.load()
+        logger.info("Bulk job %s: %d issues, %d already journaled", self.journal.job_id, len(items), len(done))
+        self.journal.record({"event": "started", "total": len(items)})
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(items))),
+                                thread_name_prefix="bulk-test-plan") as pool:
+            futures = [
+                (key, pool.submit(self._process, key, scenarios, done.get(key)))
+                for key, scenarios in items.items()
+            ]
+            results = []
+            for key, future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.exception("Bulk job %s: worker crashed for %s", self.journal.job_id, key)
+                    results.append({"key": key, "status": "failed", "error": str(e)})
+        summary = summarize(results)
+        self.journal.record({"event": "finished", "summary": summary})
+        logger.info("Bulk job %s finished: %s", self.journal.job_id, summary)
+        return results
+
+    def _process(self, issue_key: str, scenarios: List[str],
+                 journaled: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fetch, compare and (if needed) write a single issue."""
+        input_hash = scenarios_hash(scenarios)
+        if journaled and journaled.get("status") in _DONE_STATUSES and journaled.get("input_hash") == input_hash:
+            return {"key": issue_key, "status": "skipped", "content_hash": journaled.get("content_hash"),
+                    "message": "Already completed by an earlier run of this job."}
+
+        issue_data = self._call(lambda: self.client.get_issue(issue_key, expand="", cached=False))
+        if "error" in issue_data:
+            return self._fail(issue_key, input_hash, issue_data["error"])
+
+        current_text, updated_text, field_value = self.build_update(
+            issue_data.get("fields", {}).get(TEST_PLAN_FIELD), scenarios)
+        new_hash = content_hash(updated_text)
+
+        if content_hash(current_text) == new_hash:
+            result = {"key": issue_key, "status": "unchanged", "content_hash": new_hash}
+            self.journal.record(dict(result, input_hash=input_hash))
+            return result
+
+        # Refuse the write if the ticket changed after it was read above
+        expected_updated = issue_data.get("fields", {}).get("updated") or None
+        update = self._call(lambda: self.client.update_issue(
+            issue_key, expected_updated=expected_updated, **{TEST_PLAN_FIELD: field_value}))
+        if update.get("conflict"):
+            logger.warning("Bulk job %s: %s changed in Jira during the update", self.journal.job_id, issue_key)
+            result = {"key": issue_key, "status": "conflict",
+                      "error": "Ticket was modified in Jira during the update; re-submit the job to retry it."}
+            self.journal.record(dict(result, input_hash=input_hash))
+            return result
+        if not update.get("success"):
+            error_msg = update.get("error", "Failed to update Test Plan.")
+            if f"Field '{TEST_PLAN_FIELD}' cannot be set" in error_msg:
+                error_msg = "Test Plan field not available on this ticket type."
+            return self._fail(issue_key, input_hash, error_msg)
+
+        result = {"key": issue_key, "status": "updated", "content_hash": new_hash}
+        self.journal.record(dict(result, input_hash=input_hash))
+        logger.info("Bulk job %s: updated Test Plan for %s", self.journal.job_id, issue_key)
+        return result
+
+    def _call(self, func: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Invoke a JiraClient method under the rate limiter, retrying on throttling."""
+        result: Dict[str, Any] = {}
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            result = func()
+            error = str(result.get("error", ""))
+            if not error or not _is_retryable(result):
+                return result
+            delay = min(2 ** attempt, 30)
+            logger.warning("Jira throttled or unavailable (attempt %d), backing off %ss: %s", attempt + 1, delay, error)
+            self.limiter.pause(delay)
+        return result
+
+    def _fail(self, issue_key: str, input_hash: str, error: str) -> Dict[str, Any]:
+        logger.error("Bulk job %s: %s failed: %s", self.journal.job_id, issue_key, error)
+        result = {"key": issue_key, "status": "failed", "error": error}
+        self.journal.record(dict(result, input_hash=input_hash))
+        return result
+
+
+def _is_retryable(result: Dict[str, Any]) -> bool:
+    """Return True for rate limiting and transient failures, judged by the status JiraClient reports."""
+    return result.get("status") in RETRYABLE_STATUSES or bool(result.get("transient"))
+
+
+class BulkJobRunner:
+    """
+    Runs bulk jobs on a small pool of background threads.
+
+    A journal is run by at most one thread of this process at a time, so a
+    re-submitted job id cannot race with the run it is resuming.
+
+    Args:
+        max_jobs: Jobs run concurrently; further jobs wait in the pool's queue
+    """
+
+    def __init__(self, max_jobs: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_jobs), thread_name_prefix="bulk-job")
+        self._running: set = set()
+        self._lock = threading.Lock()
+
+    def submit(self, updater: BulkTestPlanUpdater, items: Dict[str, List[str]]) -> bool:
+        """Start ``updater.run(items)`` in the background; False if that journal is already running."""
+        path = updater.journal.path
+        with self._lock:
+            if path in self._running:
+                return False
+            self._running.add(path)
+
+        def run() -> None:
+            try:
+                updater.run(items)
+            except Exception:
+                logger.exception("Bulk job %s crashed", updater.journal.job_id)
+            finally:
+                with self._lock:
+                    self._running.discard(path)
+
+        self._pool.submit(run)
+        return True
+
+    def is_running(self, journal: BulkJournal) -> bool:
+        with self._lock:
+            return journal.path in self._running
+
+
+def new_job_id() -> str:
+    """Generate an id for a new bulk job."""
+    return uuid.uuid4().hex
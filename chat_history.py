@@ -0,0 +1,135 @@
+"""
+Chat History Module
+
+Append-only store for AI chat prompts and responses, kept outside the
+session so request cost does not grow with conversation length. Entries are
+paged newest-first with an id cursor (``before``), which stays an index range
+scan however long the history gets. Old entries are removed by age and by a
+per-user cap in a periodic compaction pass.
+
+Entries are keyed by Jira site and user together: a user id is only
+meaningful on the site that reported it, and anyone can connect to a Jira
+server of their own that reports any id.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import logger as logutil
+from storage import SqliteDatabase, data_path
+
+logger = logutil.get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_chat_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL DEFAULT '',
+    owner TEXT NOT NULL,
+    ts REAL NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL
+);
+DROP INDEX IF EXISTS ai_chat_history_owner;
+CREATE INDEX IF NOT EXISTS ai_chat_history_site_owner ON ai_chat_history (site, owner, id);
+CREATE INDEX IF NOT EXISTS ai_chat_history_ts ON ai_chat_history (ts);
+"""
+
+MAX_PAGE_SIZE = 100
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Add the ``site`` column to databases created before history was scoped by site.
+
+    Rows written before then keep site '' and are no longer returned to
+    anyone; compaction removes them once they pass the retention period.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(ai_chat_history)")}
+    if columns and "site" not in columns:
+        conn.execute("ALTER TABLE ai_chat_history ADD COLUMN site TEXT NOT NULL DEFAULT ''")
+        logger.info("Added site column to AI chat history; existing entries are no longer listed")
+
+
+class ChatHistoryStore:
+    """Per-user AI chat history in SQLite, keyed by (site, owner).
+
+    Args:
+        path: Database file (defaults to ``data/chat_history.db``)
+        retention_days: Entries older than this are deleted on compaction (0 keeps them)
+        max_entries: Newest entries kept per user on compaction (0 means unlimited)
+        compact_interval: Seconds between background compactions (0 disables the thread)
+    """
+
+    def __init__(self, path: Optional[str] = None, retention_days: float = 90,
+                 max_entries: int = 1000, compact_interval: float = 3600):
+        self.db = SqliteDatabase(path or data_path("chat_history.db"), SCHEMA, migrate=_migrate)
+        self.retention_days = retention_days
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self._compactor_started = False
+        self._compactor_lock = threading.Lock()
+
+    def append(self, site: str, owner: str, prompt: str, response: str, ts: Optional[float] = None) -> int:
+        """Store one prompt/response pair; returns its id."""
+        self._ensure_compactor()
+        cursor = self.db.connect().execute(
+            "INSERT INTO ai_chat_history (site, owner, ts, prompt, response) VALUES (?, ?, ?, ?, ?)",
+            (site, owner, time.time() if ts is None else ts, prompt, response))
+        return cursor.lastrowid
+
+    def page(self, site: str, owner: str, before: Optional[int] = None,
+             limit: int = 20) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Return (entries newest first, cursor for the next older page or None)."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        rows = self.db.connect().execute(
+            "SELECT id, ts, prompt, response FROM ai_chat_history "
+            "WHERE site = ? AND owner = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (site, owner, before if before is not None else 2 ** 63 - 1, limit + 1)).fetchall()
+        entries = [{"id": r[0], "ts": r[1], "prompt": r[2], "response": r[3]} for r in rows[:limit]]
+        next_before = entries[-1]["id"] if len(rows) > limit else None
+        return entries, next_before
+
+    def clear(self, site: str, owner: str) -> int:
+        """Delete all of a user's history; returns the number of entries removed."""
+        return self.db.connect().execute(
+            "DELETE FROM ai_chat_history WHERE site = ? AND owner = ?", (site, owner)).rowcount
+
+    def compact(self) -> int:
+        """Apply retention: drop entries past ``retention_days`` and beyond ``max_entries`` per user."""
+        removed = 0
+        with self.db.transaction() as conn:
+            if self.retention_days > 0:
+                removed += conn.execute("DELETE FROM ai_chat_history WHERE ts < ?",
+                                        (time.time() - self.retention_days * 86400,)).rowcount
+            if self.max_entries > 0:
+                owners = conn.execute(
+                    "SELECT site, owner FROM ai_chat_history GROUP BY site, owner HAVING COUNT(*) > ?",
+                    (self.max_entries,)).fetchall()
+                for site, owner in owners:
+                    removed += conn.execute(
+                        "DELETE FROM ai_chat_history WHERE site = ? AND owner = ? AND id <= ("
+                        "SELECT id FROM ai_chat_history WHERE site = ? AND owner = ? "
+                        "ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                        (site, owner, site, owner, self.max_entries)).rowcount
+        if removed:
+            self.db.connect().execute("PRAGMA optimize")
+        return removed
+
+    def _compact_loop(self) -> None:
+        while True:
+            try:
+                removed = self.compact()
+                if removed:
+                    logger.info("Compacted AI chat history: %d entries removed", removed)
+            except Exception:
+                logger.exception("AI chat history compaction failed")
+            time.sleep(self.compact_interval)
+
+    def _ensure_compactor(self) -> None:
+        if self._compactor_started or self.compact_interval <= 0:
+            return
+        with self._compactor_lock:
+            if not self._compactor_started:
+                threading.Thread(target=self._compact_loop, name="chat-history-compact", daemon=True).start()
+                self._compactor_started = True
@@ -0,0 +1,210 @@
+"""
+HTML Sanitizer Module
+
+Cleans HTML rendered by Jira (``renderedFields``) before it is stored in the
+session and inserted into the page with ``innerHTML``. Built on the standard
+library ``html.parser``: only allowlisted tags and attributes are kept,
+scripts, styles, frames and forms are dropped with their content, links are
+limited to safe schemes, whitespace is collapsed outside ``<pre>``, images
+become lazy placeholders (``data-src``, loaded by ``main.js`` when visible),
+and output stops at a size cap with a truncation notice.
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from logger import get_logger, log_exceptions
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BYTES = 200_000
+
+ALLOWED_TAGS = {
+    "a", "abbr", "b", "blockquote", "br", "caption", "code", "del", "div", "em", "h1", "h2", "h3", "h4",
+    "h5", "h6", "hr", "i", "img", "ins", "kbd", "li", "ol", "p", "pre", "q", "s", "samp", "small",
+    "span", "strike", "strong", "sub", "sup", "table", "tbody", "td", "tfoot", "th", "thead", "tr",
+    "tt", "u", "ul",
+}
+VOID_TAGS = {"br", "hr", "img"}
+# Dropped together with everything inside them
+DROP_CONTENT_TAGS = {
+    "script", "style", "iframe", "frame", "frameset", "object", "embed", "applet", "form", "input",
+    "button", "select", "textarea", "noscript", "template", "svg", "math", "head", "title", "meta",
+    "link", "base",
+}
+# Members of DROP_CONTENT_TAGS that never have content or an end tag
+_DROP_VOID_TAGS = {"meta", "link", "base", "input"}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan", "scope"},
+    "ol": {"start", "type"},
+    "abbr": {"title"},
+}
+SAFE_SCHEMES = {"http", "https", "mailto"}
+NUMERIC_ATTRIBUTES = {"width", "height", "colspan", "rowspan", "start"}
+# Start tags that implicitly close an open element of the same kind (<li>a<li>b)
+IMPLIED_END = {"li": {"li"}, "p": {"p"}, "tr": {"tr", "td", "th"}, "td": {"td", "th"}, "th": {"td", "th"}}
+
+LAZY_IMAGE_CLASS = "lazy-image"
+TRUNCATED_NOTICE = '<p class="text-muted content-truncated">Content truncated. Open the ticket in Jira to see all of it.</p>'
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def safe_url(url: Optional[str], base_url: Optional[str] = None) -> Optional[str]:
+    """Resolve ``url`` against ``base_url``; None unless it is http(s), mailto or a fragment."""
+    url = (url or "").strip()
+    if not url:
+        return None
+    if url.startswith("#"):
+        return url
+    if base_url:
+        url = urljoin(base_url.rstrip("/") + "/", url)
+    scheme = urlparse(url).scheme.lower()
+    return url if scheme in SAFE_SCHEMES else None
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self, base_url: Optional[str], max_bytes: int):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.max_bytes = max_bytes
+        self.out: List[str] = []
+        self.size = 0
+        self.open_tags: List[str] = []
+        self.drop_depth = 0
+        self.pre_depth = 0
+        self.truncated = False
+        self.images = 0
+
+    def _emit(self, piece: str) -> bool:
+        if self.truncated:
+            return False
+        size = len(piece.encode("utf-8"))
+        if self.size + size > self.max_bytes:
+            self.truncated = True
+            return False
+        self.out.append(piece)
+        self.size += size
+        return True
+
+    def _attributes(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> Dict[str, str]:
+        allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+        kept: Dict[str, str] = {}
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed or value is None:
+                continue
+            if name in ("href", "src"):
+                value = safe_url(value, self.base_url)
+                if value is None:
+                    continue
+            elif name in NUMERIC_ATTRIBUTES and not value.strip().isdigit():
+                continue
+            kept[name] = value
+        return kept
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            if tag not in _DROP_VOID_TAGS:
+                self.drop_depth += 1
+            return
+        if self.drop_depth or tag not in ALLOWED_TAGS:
+            return
+        implied = IMPLIED_END.get(tag)
+        while implied and self.open_tags and self.open_tags[-1] in implied:
+            self.handle_endtag(self.open_tags[-1])
+        kept = self._attributes(tag, attrs)
+        if tag == "img":
+            src = kept.pop("src", None)
+            if not src:
+                return
+            # Placeholder: main.js copies data-src to src when the image scrolls into view
+            kept = {"data-src": src, "class": LAZY_IMAGE_CLASS, "loading": "lazy", **kept}
+            self.images += 1
+        elif tag == "a" and "href" in kept and not kept["href"].startswith("#"):
+            kept.update(target="_blank", rel="noopener noreferrer")
+        rendered = "".join(f' {name}="{html.escape(value, quote=True)}"' for name, value in kept.items())
+        if not self._emit(f"<{tag}{rendered}>"):
+            return
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+            if tag == "pre":
+                self.pre_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            if self.drop_depth and tag not in _DROP_VOID_TAGS:
+                self.drop_depth -= 1
+            return
+        if self.drop_depth or tag not in self.open_tags:
+            return
+        # Close anything left open inside ``tag`` (unbalanced Jira markup)
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.out.append(f"</{current}>")
+            if current == "pre":
+                self.pre_depth -= 1
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        # Once output was cut (by a tag or an earlier text run) nothing more
+        # is added, or text would resume after the gap
+        if self.truncated or self.drop_depth or not data:
+            return
+        if not self.pre_depth:
+            data = _WHITESPACE.sub(" ", data)
+        text = html.escape(data, quote=False)
+        if self._emit(text):
+            return
+        # Keep the part of an oversized text run that still fits, without
+        # splitting a character or an entity
+        cut = text.encode("utf-8")[:self.max_bytes - self.size].decode("utf-8", "ignore")
+        if cut.rfind("&") > cut.rfind(";"):
+            cut = cut[:cut.rfind("&")]
+        self.out.append(cut)
+        self.size += len(cut.encode("utf-8"))
+
+    def result(self) -> str:
+        # Closing tags are not counted against the cap so output stays well formed
+        closing = "".join(f"</{tag}>" for tag in reversed(self.open_tags))
+        body = "".join(self.out).strip() + closing
+        return body + TRUNCATED_NOTICE if self.truncated else body
+
+
+@log_exceptions
+def sanitize_html(value: Optional[str], base_url: Optional[str] = None,
+                  max_bytes: int = DEFAULT_MAX_BYTES) -> str:
+    """
+    Sanitize, minify and size-cap an HTML fragment.
+
+    Args:
+        value: HTML from Jira (or any untrusted source)
+        base_url: Jira base URL used to resolve relative links and images
+        max_bytes: Approximate UTF-8 size limit of the returned HTML
+
+    Returns:
+        Safe HTML fragment
+    """
+    if not value:
+        return ""
+    parser = _Sanitizer(base_url, max_bytes)
+    parser.feed(value)
+    parser.close()
+    result = parser.result()
+    if parser.truncated:
+        logger.info("Sanitized HTML truncated from %d to %d bytes", len(value.encode("utf-8")), parser.size)
+    return result
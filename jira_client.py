@@ -7,14 +7,94 @@ It replaces the previous MCP-based implementation with direct API calls for bett
 
 import os
 import json
+import hashlib
+import contextvars
+import functools
+import time
 from typing import Dict, List, Any, Optional, Tuple
+import requests
 from jira import JIRA
 from jira.exceptions import JIRAError
 from flask import session
-from logger import get_logger, log_exceptions
+from logger import add_timing, get_logger, lazy, log_exceptions, truncated
+from metrics import REGISTRY
+from shared_cache import CACHE
 
 logger = get_logger(__name__)
 
+# Shared cache lifetimes in seconds; issue entries are also invalidated on update
+ISSUE_CACHE_TTL = float(os.environ.get("JIRA_CACHE_ISSUE_TTL", "60"))
+SEARCH_CACHE_TTL = float(os.environ.get("JIRA_CACHE_SEARCH_TTL", "30"))
+PROJECTS_CACHE_TTL = float(os.environ.get("JIRA_CACHE_PROJECTS_TTL", "3600"))
+
+JIRA_CALL_SECONDS = REGISTRY.histogram(
+    "jira_client_call_duration_seconds", "JiraClient method latency, cache hits included",
+    ("method", "outcome"))
+JIRA_HTTP_SECONDS = REGISTRY.histogram(
+    "jira_http_request_duration_seconds", "Time to the response of each HTTP request to Jira",
+    ("method", "status"))
+
+# JiraClient method on whose behalf HTTP requests are currently made
+_current_method: "contextvars.ContextVar[str]" = contextvars.ContextVar("jira_method", default="other")
+
+
+def instrumented(func):
+    """Time a JiraClient method and attribute the HTTP requests it makes to it.
+
+    The outcome is ``error`` when the method returns False or a dict with an
+    ``error`` entry (the client's ways of reporting failures) and ``exception``
+    when it raises.
+    """
+    name = func.__name__.lstrip('_')
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_method.set(name)
+        start = time.perf_counter()
+        outcome = 'exception'
+        try:
+            result = func(*args, **kwargs)
+            failed = result is False or (isinstance(result, dict) and bool(result.get('error')))
+            outcome = 'error' if failed else 'ok'
+            return result
+        finally:
+            _current_method.reset(token)
+            JIRA_CALL_SECONDS.observe(time.perf_counter() - start, method=name, outcome=outcome)
+
+    return wrapper
+
+
+def _record_jira_response(response, *args, **kwargs):
+    seconds = response.elapsed.total_seconds()
+    add_timing('jira', seconds)
+    JIRA_HTTP_SECONDS.observe(seconds, method=_current_method.get(), status=response.status_code)
+
+
+def _time_upstream(http) -> None:
+    """Record every Jira response on ``http`` in the metrics and the request's log context."""
+    if http is not None and hasattr(http, 'hooks'):
+        http.hooks.setdefault('response', []).append(_record_jira_response)
+
+
+def _error_result(message: str, exc: Optional[Exception] = None, status: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Build the client's JSON error dict.
+
+    Besides the message it carries ``status`` (the HTTP status, when Jira
+    answered) and ``transient`` (timeouts and connection failures), so callers
+    can classify failures without parsing message text.
+    """
+    result: Dict[str, Any] = {"error": message}
+    if status is None and exc is not None:
+        status = getattr(exc, 'status_code', None)
+        if status is None and getattr(exc, 'response', None) is not None:
+            status = getattr(exc.response, 'status_code', None)
+    if status:
+        result["status"] = int(status)
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        result["transient"] = True
+    return result
+
 
 class JiraClient:
     """
@@ -24,7 +104,8 @@ class JiraClient:
     replacing the previous MCP-based implementation.
     """
     
-    def __init__(self, jira_url: Optional[str] = None, email: Optional[str] = None, api_token: Optional[str] = None):
+    def __init__(self, jira_url: Optional[str] = None, email: Optional[str] = None, api_token: Optional[str] = None,
+                 connect: bool = True):
         """
         Initialize the Jira client.
         
@@ -32,21 +113,27 @@ class JiraClient:
             jira_url: Base URL of the Jira instance
             email: User email for Jira API token authentication
             api_token: Jira API token
+            connect: Verify the credentials immediately. Pass False for callers
+                that only need ``update_issue``, which works from credentials alone.
         """
         self.jira_url = jira_url
         self.email = email
         self.api_token = api_token
         self.jira = None
         self._authenticated = False
+        self._http_session = None
         
-        if self.jira_url and self.email and self.api_token:
+        if connect and self.jira_url and self.email and self.api_token:
             self._connect()
     
     @classmethod
-    def from_session(cls) -> 'JiraClient':
+    def from_session(cls, connect: bool = True) -> 'JiraClient':
         """
         Create a JiraClient instance from Flask session data.
         
+        Args:
+            connect: Verify the credentials immediately (see ``__init__``)
+            
         Returns:
             JiraClient instance initialized with session credentials
         """
@@ -58,9 +145,10 @@ class JiraClient:
             logger.warning("Incomplete Jira credentials in session")
             return cls()
         
-        return cls(jira_url, email, api_token)
+        return cls(jira_url, email, api_token, connect=connect)
     
     @log_exceptions
+    @instrumented
     def _connect(self) -> bool:
         """
         Establish connection to Jira.
@@ -85,6 +173,7 @@ class JiraClient:
                 basic_auth=(self.email, self.api_token),
                 options={'verify': True}
             )
+            _time_upstream(getattr(self.jira, '_session', None))
             
             # Test the connection by fetching current user info
             current_user = self.jira.current_user()
@@ -102,7 +191,30 @@ class JiraClient:
             self._authenticated = False
             return False
     
+    def _ensure_connected(self) -> bool:
+        """Connect on first use for clients created with ``connect=False``, else verify the session."""
+        if self.jira is None and self.jira_url and self.email and self.api_token:
+            return self._connect()
+        return self.is_authenticated()
+    
+    def _site(self) -> str:
+        return (self.jira_url or "").rstrip("/")
+    
+    def _cache_key(self, kind: str, *parts: Any) -> str:
+        """
+        Shared cache key for this Jira site and these credentials.
+        
+        Permissions differ per user, so entries are never shared between
+        credentials; the token is hashed so a revoked token stops matching.
+        """
+        scope = hashlib.sha256(f"{self._site()}|{self.email}|{self.api_token}".encode("utf-8")).hexdigest()[:16]
+        return ":".join([f"jira_{kind}", self._site(), scope] + [str(p) for p in parts])
+    
+    def _issue_tag(self, issue_key: str) -> str:
+        return f"jira_issue:{self._site()}:{issue_key}"
+    
     @log_exceptions
+    @instrumented
     def is_authenticated(self) -> bool:
         """
         Check if the client is authenticated with valid credentials.
@@ -124,6 +236,7 @@ class JiraClient:
             return False
     
     @log_exceptions
+    @instrumented
     def validate_connection(self) -> Optional[Dict[str, Any]]:
         """
         Validate the Jira connection and return user info.
@@ -163,7 +276,9 @@ class JiraClient:
             return None
     
     @log_exceptions
-    def search_issues(self, jql: str, max_results: int = 50, expand: Optional[str] = None) -> Dict[str, Any]:
+    @instrumented
+    def search_issues(self, jql: str, max_results: int = 50, expand: Optional[str] = None,
+                      cached: bool = True) -> Dict[str, Any]:
         """
         Search for Jira issues using JQL.
         
@@ -171,15 +286,22 @@ class JiraClient:
             jql: JQL query string
             max_results: Maximum number of results to return
             expand: Fields to expand (comma-separated string)
+            cached: Serve and store the result through the shared cache
             
         Returns:
             Dict containing search results in Jira API format
         """
-        if not self.is_authenticated():
+        cache_key = self._cache_key("search", max_results, expand or "", jql)
+        if cached:
+            hit = CACHE.get(cache_key)
+            if hit is not None:
+                return hit
+        
+        if not self._ensure_connected():
             return {"error": "Not authenticated with Jira"}
         
         try:
-            logger.debug(f"Searching Jira with JQL: {jql}")
+            logger.debug("Searching Jira with JQL: %s", jql)
             
             if not self.jira:
                 return {"error": "JIRA client not initialized"}
@@ -241,32 +363,44 @@ class JiraClient:
                 results["issues"].append(issue_data)
             
             logger.info(f"Search completed: {len(issues)} results found")
+            if cached:
+                CACHE.set(cache_key, results, SEARCH_CACHE_TTL, tag=f"jira_search:{self._site()}")
             return results
             
         except JIRAError as e:
             logger.error(f"JIRA search error: {e}")
-            return {"error": f"JIRA search failed: {str(e)}"}
+            return _error_result(f"JIRA search failed: {e}", e)
         except Exception as e:
             logger.error(f"Unexpected search error: {e}")
-            return {"error": f"Search failed: {str(e)}"}
+            return _error_result(f"Search failed: {e}", e)
     
     @log_exceptions
-    def get_issue(self, issue_key: str, expand: str = "description,renderedFields") -> Dict[str, Any]:
+    @instrumented
+    def get_issue(self, issue_key: str, expand: str = "description,renderedFields",
+                  cached: bool = True) -> Dict[str, Any]:
         """
         Get a specific Jira issue by key.
         
         Args:
             issue_key: The Jira issue key (e.g., PROJECT-123)
             expand: Fields to expand (comma-separated string)
+            cached: Serve and store the issue through the shared cache. Pass
+                False before read-modify-write so the edit starts from Jira's copy.
             
         Returns:
             Dict containing issue details in Jira API format
         """
-        if not self.is_authenticated():
+        cache_key = self._cache_key("issue", issue_key, expand or "")
+        if cached:
+            hit = CACHE.get(cache_key)
+            if hit is not None:
+                return hit
+        
+        if not self._ensure_connected():
             return {"error": "Not authenticated with Jira"}
         
         try:
-            logger.debug(f"Fetching issue: {issue_key}")
+            logger.debug("Fetching issue: %s", issue_key)
             
             if not self.jira:
                 return {"error": "JIRA client not initialized"}
@@ -324,25 +458,28 @@ class JiraClient:
                 custom_field_rendered = getattr(rendered_fields, 'customfield_11334', None)
                 if custom_field_rendered:
                     issue_data["renderedFields"]["customfield_11334"] = custom_field_rendered
-                    logger.debug(f"Found rendered customfield_11334: {str(custom_field_rendered)[:200]}...")
+                    logger.debug("Found rendered customfield_11334: %s", truncated(custom_field_rendered))
             
             # Add custom field for test scenarios (raw value)
             if hasattr(issue.fields, 'customfield_11334'):
                 test_scenarios_raw = getattr(issue.fields, 'customfield_11334')
                 issue_data["fields"]["customfield_11334"] = test_scenarios_raw
-                logger.debug(f"Found customfield_11334: {str(test_scenarios_raw)[:200]}...")
+                logger.debug("Found customfield_11334: %s", truncated(test_scenarios_raw))
             
             logger.info(f"Successfully fetched issue: {issue_key}")
+            # Fresh reads refresh the cache too, so later cached reads see them
+            CACHE.set(cache_key, issue_data, ISSUE_CACHE_TTL, tag=self._issue_tag(issue_key))
             return issue_data
             
         except JIRAError as e:
             logger.error(f"JIRA get issue error for {issue_key}: {e}")
-            return {"error": f"Failed to get issue {issue_key}: {str(e)}"}
+            return _error_result(f"Failed to get issue {issue_key}: {e}", e)
         except Exception as e:
             logger.error(f"Unexpected error getting issue {issue_key}: {e}")
-            return {"error": f"Failed to get issue {issue_key}: {str(e)}"}
+            return _error_result(f"Failed to get issue {issue_key}: {e}", e)
     
     @log_exceptions
+    @instrumented
     def create_issue(self, project_key: str, summary: str, description: Optional[str] = None, 
                     issue_type: str = "Task", **fields) -> Dict[str, Any]:
         """
@@ -362,7 +499,7 @@ class JiraClient:
             return {"error": "Not authenticated with Jira"}
         
         try:
-            logger.debug(f"Creating issue in project {project_key}")
+            logger.debug("Creating issue in project %s", project_key)
             
             if not self.jira:
                 return {"error": "JIRA client not initialized"}
@@ -396,105 +533,142 @@ class JiraClient:
             
         except JIRAError as e:
             logger.error(f"JIRA create issue error: {e}")
-            return {"error": f"Failed to create issue: {str(e)}"}
+            return _error_result(f"Failed to create issue: {e}", e)
         except Exception as e:
             logger.error(f"Unexpected error creating issue: {e}")
-            return {"error": f"Failed to create issue: {str(e)}"}
+            return _error_result(f"Failed to create issue: {e}", e)
     
     @log_exceptions
-    def update_issue(self, issue_key: str, **fields) -> Dict[str, Any]:
+    @instrumented
+    def update_issue(self, issue_key: str, expected_updated: Optional[str] = None, **fields) -> Dict[str, Any]:
         """
-        Update an existing Jira issue.
+        Update an existing Jira issue with a PUT request.
+        
+        Without ``expected_updated`` this is a single PUT; the issue is not
+        fetched first. With it, the issue's current ``updated`` timestamp is
+        read with a field-limited GET before the PUT and the write is refused
+        if it differs. Jira's REST API has no conditional PUT, so this is a
+        best-effort check rather than an atomic one: an edit landing between
+        the GET and the PUT is still overwritten.
         
         Args:
             issue_key: The Jira issue key (e.g., PROJECT-123)
+            expected_updated: ``fields.updated`` value the caller last saw, optional
             **fields: Fields to update on the issue
             
         Returns:
-            Dict containing update status
+            Dict containing update status; conflicts carry ``conflict: True``
+            and HTTP failures, including those of the version check, carry
+            the response ``status``
         """
-        if not self.is_authenticated():
+        # Only credentials are required here: an invalid token surfaces as a 401
+        # from the PUT itself instead of costing an extra current_user() round trip
+        if not self.jira_url or not self.email or not self.api_token:
             return {"error": "Not authenticated with Jira"}
         
         try:
-            logger.debug(f"Updating issue: {issue_key}")
+            logger.debug("Updating issue: %s", issue_key)
+            
+            if expected_updated:
+                current = self._get_updated_timestamp(issue_key)
+                if current.get('error'):
+                    return current
+                current_updated = current.get('updated')
+                if current_updated != expected_updated:
+                    logger.warning(f"Refusing to update {issue_key}: modified at {current_updated}, expected {expected_updated}")
+                    return {
+                        "error": f"Issue {issue_key} was modified in Jira after it was loaded.",
+                        "conflict": True,
+                        "current_updated": current_updated
+                    }
             
-            if not self.jira:
-                return {"error": "JIRA client not initialized"}
+            # ADF documents need REST API v3; plain strings for custom fields
+            # keep using v2, matching what the JIRA library sends
+            is_adf = any(isinstance(value, dict) and value.get('type') == 'doc' for value in fields.values())
+            api_url = f"{self.jira_url}/rest/api/{3 if is_adf else 2}/issue/{issue_key}"
             
-            # Special handling for description field with ADF content
-            # Use direct REST API call for ADF content to ensure proper handling
-            if 'description' in fields and isinstance(fields['description'], dict):
-                # Ensure we have valid credentials for REST API call
-                if not self.email or not self.api_token:
-                    return {"error": "Missing email or API token for REST API call"}
-                
-                # Use direct REST API for ADF content
-                import requests
-                from requests.auth import HTTPBasicAuth
-                
-                logger.debug(f"Updating issue {issue_key} with ADF description: {fields['description']}")
-                
-                # Construct the API URL (ensure we use API v3 for ADF support)
-                api_url = f"{self.jira_url}/rest/api/3/issue/{issue_key}"
-                
-                # Prepare the update payload
-                update_payload = {
-                    "fields": fields
-                }
-                
-                logger.debug(f"API URL: {api_url}")
-                logger.debug(f"Update payload: {update_payload}")
-                
-                # Make the API call
-                response = requests.put(
-                    api_url,
-                    auth=HTTPBasicAuth(self.email, self.api_token),
-                    headers={
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    },
-                    json=update_payload,
-                    timeout=30
-                )
-                
-                logger.debug(f"Response status: {response.status_code}")
-                logger.debug(f"Response text: {response.text[:500]}...")
-                
-                if response.status_code == 204:  # No Content - success
-                    logger.info(f"Successfully updated issue {issue_key} via REST API")
-                    return {"success": True}
-                else:
-                    error_msg = f"Failed to update issue {issue_key}: HTTP {response.status_code}"
-                    if response.text:
-                        try:
-                            error_data = response.json()
-                            if 'errors' in error_data:
-                                error_details = ', '.join([f"{k}: {v}" for k, v in error_data['errors'].items()])
-                                error_msg += f" - {error_details}"
-                            elif 'errorMessages' in error_data:
-                                error_msg += f" - {', '.join(error_data['errorMessages'])}"
-                        except:
-                            error_msg += f" - {response.text[:200]}"
-                    
-                    logger.error(error_msg)
-                    return {"error": error_msg}
-            else:
-                # For custom fields and non-ADF content, use the standard JIRA library method
-                issue = self.jira.issue(issue_key)
-                issue.update(fields=fields)
-                
-                logger.info(f"Successfully updated issue: {issue_key}")
+            logger.debug("API URL: %s", api_url)
+            logger.debug("Update payload: %s", truncated(lazy(json.dumps, {"fields": fields}, default=str), 10000))
+            
+            response = self._http().put(api_url, json={"fields": fields}, timeout=30)
+            
+            logger.debug("Response status: %s", response.status_code)
+            
+            if response.status_code == 204:  # No Content - success
+                logger.info(f"Successfully updated issue {issue_key} via REST API")
+                CACHE.invalidate_tag(self._issue_tag(issue_key))
+                CACHE.invalidate_tag(f"jira_search:{self._site()}")
                 return {"success": True}
             
-        except JIRAError as e:
-            logger.error(f"JIRA update issue error for {issue_key}: {e}")
-            return {"error": f"Failed to update issue {issue_key}: {str(e)}"}
+            error_msg = self._format_http_error(f"Failed to update issue {issue_key}", response)
+            logger.error(error_msg)
+            return _error_result(error_msg, status=response.status_code)
+            
         except Exception as e:
             logger.error(f"Unexpected error updating issue {issue_key}: {e}")
-            return {"error": f"Failed to update issue {issue_key}: {str(e)}"}
+            return _error_result(f"Failed to update issue {issue_key}: {e}", e)
+    
+    def _http(self):
+        """
+        Return a requests session authenticated with the client's credentials.
+        
+        The session is created once per client so repeated REST calls reuse the
+        same connection.
+        """
+        if self._http_session is None:
+            import requests
+            from requests.auth import HTTPBasicAuth
+            
+            http = requests.Session()
+            http.auth = HTTPBasicAuth(self.email, self.api_token)
+            http.headers.update({
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            })
+            _time_upstream(http)
+            self._http_session = http
+        return self._http_session
+    
+    @instrumented
+    def _get_updated_timestamp(self, issue_key: str) -> Dict[str, Any]:
+        """
+        Fetch only the ``updated`` field of an issue.
+        
+        Args:
+            issue_key: The Jira issue key (e.g., PROJECT-123)
+            
+        Returns:
+            Dict with ``updated``, or an error dict carrying the HTTP ``status``
+        """
+        response = self._http().get(
+            f"{self.jira_url}/rest/api/2/issue/{issue_key}",
+            params={"fields": "updated"},
+            timeout=30
+        )
+        if response.status_code != 200:
+            error_msg = self._format_http_error(f"Failed to read current version of issue {issue_key}", response)
+            logger.error(error_msg)
+            return _error_result(error_msg, status=response.status_code)
+        return {"updated": (response.json().get('fields') or {}).get('updated')}
+    
+    @staticmethod
+    def _format_http_error(prefix: str, response) -> str:
+        """Build an error message from a failed Jira REST response."""
+        error_msg = f"{prefix}: HTTP {response.status_code}"
+        if response.text:
+            try:
+                error_data = response.json()
+                if error_data.get('errors'):
+                    error_details = ', '.join([f"{k}: {v}" for k, v in error_data['errors'].items()])
+                    error_msg += f" - {error_details}"
+                elif error_data.get('errorMessages'):
+                    error_msg += f" - {', '.join(error_data['errorMessages'])}"
+            except ValueError:
+                error_msg += f" - {response.text[:200]}"
+        return error_msg
     
     @log_exceptions
+    @instrumented
     def add_comment(self, issue_key: str, comment: str) -> Dict[str, Any]:
         """
         Add a comment to a Jira issue.
@@ -510,7 +684,7 @@ class JiraClient:
             return {"error": "Not authenticated with Jira"}
         
         try:
-            logger.debug(f"Adding comment to issue: {issue_key}")
+            logger.debug("Adding comment to issue: %s", issue_key)
             
             if not self.jira:
                 return {"error": "JIRA client not initialized"}
@@ -533,12 +707,13 @@ class JiraClient:
             
         except JIRAError as e:
             logger.error(f"JIRA add comment error for {issue_key}: {e}")
-            return {"error": f"Failed to add comment to issue {issue_key}: {str(e)}"}
+            return _error_result(f"Failed to add comment to issue {issue_key}: {e}", e)
         except Exception as e:
             logger.error(f"Unexpected error adding comment to {issue_key}: {e}")
-            return {"error": f"Failed to add comment to issue {issue_key}: {str(e)}"}
+            return _error_result(f"Failed to add comment to issue {issue_key}: {e}", e)
     
     @log_exceptions
+    @instrumented
     def get_projects(self) -> List[Dict[str, Any]]:
         """
         Get list of projects accessible to the user.
@@ -546,7 +721,12 @@ class JiraClient:
         Returns:
             List of project dictionaries
         """
-        if not self.is_authenticated():
+        cache_key = self._cache_key("projects")
+        hit = CACHE.get(cache_key)
+        if hit is not None:
+            return hit
+        
+        if not self._ensure_connected():
             return []
         
         try:
@@ -564,6 +744,8 @@ class JiraClient:
                 })
             
             logger.info(f"Retrieved {len(result)} projects")
+            if result:
+                CACHE.set(cache_key, result, PROJECTS_CACHE_TTL)
             return result
             
         except Exception as e:
@@ -1,22 +1,129 @@
+import atexit
+import contextlib
+import contextvars
+import glob
+import gzip
 import logging
 import os
 import json
 import functools
-from logging.handlers import RotatingFileHandler
-from typing import Callable
+import queue
+import random
+import shutil
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from metrics import REGISTRY
 
+try:
+    import orjson
+except ImportError:  # optional: the stdlib json module is used instead
+    orjson = None
 
-# Ensure logs directory
-LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
+try:
+    import zstandard
+except ImportError:  # optional: rotated logs are gzip-compressed instead
+    zstandard = None
+
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: compression is then not coordinated between processes
+    fcntl = None
+
+
+# Ensure logs directory; LOG_DIR lets deployments move it off the code volume
+LOG_DIR = os.environ.get("LOG_DIR") or os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
 # Default formatter required by the project
 DEFAULT_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s:%(funcName)s:%(lineno)d] - %(message)s"
 
+# Records buffered between request threads and the writer thread; when full,
+# new records are dropped (and counted) rather than blocking the caller
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Size at which logs/app.log is rotated, and how many rotated segments are kept
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+# Codec for rotated segments: zstd, gzip or none (default zstd when installed)
+LOG_COMPRESSION = os.getenv("LOG_COMPRESSION", "zstd" if zstandard is not None else "gzip").lower()
+
+# Fraction of per-item DEBUG records (one per issue, per chunk, ...) that
+# log_sampled lets through; 1.0 keeps them all
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+# Longest text a truncated() argument renders
+LOG_TRUNCATE_CHARS = int(os.getenv("LOG_TRUNCATE_CHARS", "200"))
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "Log records discarded because the log queue was full", ("level",))
+LOG_SEGMENTS_COMPRESSED = REGISTRY.counter(
+    "log_segments_compressed_total", "Rotated log files compressed in the background", ("codec", "result"))
+
+# Fields describing the work in progress (request id, user, route, upstream
+# timings); copied onto every record logged while they are bound
+_log_context: "contextvars.ContextVar[Optional[Dict[str, Any]]]" = contextvars.ContextVar("log_context", default=None)
+
+
+def start_context(**fields: Any) -> None:
+    """Replace the log context of the current thread or task, e.g. at the start of a request."""
+    _log_context.set(dict(fields))
+
+
+def bind_context(**fields: Any) -> None:
+    """Add fields to the current log context."""
+    context = _log_context.get()
+    if context is None:
+        _log_context.set(dict(fields))
+    else:
+        context.update(fields)
+
+
+def clear_context() -> None:
+    _log_context.set(None)
+
+
+def add_timing(upstream: str, seconds: float) -> None:
+    """Accumulate time spent waiting on an upstream service (``jira``, ``ai``) in the current context."""
+    context = _log_context.get()
+    if context is None:
+        return
+    timings = context.setdefault("timings", {})
+    timings[upstream] = timings.get(upstream, 0.0) + seconds
+
+
+def current_context() -> Dict[str, Any]:
+    """Snapshot of the current log context (empty outside a request)."""
+    context = _log_context.get()
+    if not context:
+        return {}
+    snapshot = dict(context)
+    if "timings" in snapshot:
+        snapshot["timings"] = dict(snapshot["timings"])
+    return snapshot
+
+
+def _dumps(value: Dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            # e.g. integers wider than 64 bits
+            pass
+    return json.dumps(value, default=str)
+
 
 class JsonFormatter(logging.Formatter):
-    """Simple JSON formatter to make future structured logging easy to enable."""
+    """One JSON object per record, with the bound log context (request id, user, route, timings).
+
+    Serialized with orjson when it is installed, otherwise with the json module.
+    """
 
     def format(self, record: logging.LogRecord) -> str:
         base = {
@@ -27,13 +134,264 @@ class JsonFormatter(logging.Formatter):
             "line": record.lineno,
             "message": record.getMessage(),
         }
-        # Include exception info if present
+        # Records from the queue carry the context of the thread that logged them
+        context = getattr(record, "context", None)
+        if context is None:
+            context = current_context()
+        for name, value in context.items():
+            if name == "timings":
+                base["upstream_ms"] = {upstream: round(seconds * 1000, 1) for upstream, seconds in value.items()}
+            else:
+                base[name] = value
+        # Include exception info if present (records from the queue carry it pre-formatted)
         if record.exc_info:
             base["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(base, default=str)
+        elif record.exc_text:
+            base["exc_info"] = record.exc_text
+        return _dumps(base)
+
+
+class _SegmentCompressor:
+    """Single background thread compressing rotated log segments.
+
+    Started on first use, and again in a forked child (where the parent's
+    thread no longer runs).
+    """
+
+    def __init__(self):
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, job: Callable[[], None]) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._jobs = queue.Queue()
+                self._thread = threading.Thread(target=self._run, args=(self._jobs,),
+                                                name="log-compress", daemon=True)
+                self._thread.start()
+            self._jobs.put(job)
+
+    def wait(self) -> None:
+        """Block until every submitted segment has been compressed."""
+        self._jobs.join()
+
+    @staticmethod
+    def _run(jobs: "queue.Queue") -> None:
+        while True:
+            job = jobs.get()
+            try:
+                job()
+            except Exception:
+                # Failures cannot go through the pipeline that is being rotated
+                traceback.print_exc(file=sys.stderr)
+            finally:
+                jobs.task_done()
+
+
+_compressor = _SegmentCompressor()
+
+
+class _HostLock:
+    """Exclusive lock on a file, shared by every process on the host.
+
+    Each instance is used by one thread at a time. The lock file is reopened
+    after a fork, since a child using the parent's descriptor would share its
+    lock. Without fcntl (Windows) it does nothing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+        self._pid = None
+
+    @contextlib.contextmanager
+    def held(self):
+        if fcntl is None:
+            yield
+            return
+        if self._pid != os.getpid():
+            self._handle = open(self.path, "a")
+            self._pid = os.getpid()
+        fcntl.flock(self._handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler whose rotated segments are compressed off the writer thread.
+
+    On rollover the file is renamed to ``<name>.<timestamp>`` and handed to a
+    background thread that writes ``<name>.<timestamp>.zst`` (or ``.gz``) and
+    removes the original; only the newest ``backupCount`` segments are kept.
+    Timestamped names mean a rollover never has to rename a segment that is
+    still being compressed.
+
+    Several processes (e.g. gunicorn workers) may share the file. Each write
+    and rollover happens under a host-wide lock (``<name>.lock``), and a
+    process whose file was rotated by another one reopens it before writing,
+    so no record lands in a segment after it was renamed. Segments are
+    compressed under a second lock (``<name>.compress.lock``) through
+    per-process temporary files, so a segment is compressed once however
+    many processes find it. Without fcntl (Windows) none of this is
+    coordinated and rotation is only safe with a single process.
+
+    Args:
+        filename: Active log file
+        maxBytes: Size that triggers a rollover
+        backupCount: Rotated segments to keep
+        encoding: Text encoding of the active file
+        compression: ``zstd``, ``gzip`` or ``none``
+    """
+
+    SUFFIXES = {"zstd": ".zst", "gzip": ".gz", "none": ""}
+
+    def __init__(self, filename: str, maxBytes: int = 0, backupCount: int = 0,
+                 encoding: Optional[str] = None, compression: str = "gzip"):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        self.compression = compression if compression in self.SUFFIXES else "gzip"
+        self._write_lock = _HostLock(self.baseFilename + ".lock")
+        self._compress_lock = _HostLock(self.baseFilename + ".compress.lock")
+        # Segments left uncompressed by a previous process that exited mid-way
+        if self.compression != "none":
+            for segment in self._segments():
+                if not segment.endswith((".zst", ".gz")):
+                    _compressor.submit(functools.partial(self._compress, segment))
+
+    def _segments(self) -> List[str]:
+        # Timestamps sort lexically, oldest first
+        return sorted(path for path in glob.glob(glob.escape(self.baseFilename) + ".*")
+                      if not path.endswith((".tmp", ".lock")))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        with self._write_lock.held():
+            # Another process writing the same file may have rotated it
+            if self.stream is not None and self._replaced():
+                self.stream.close()
+                self.stream = None
+            super().emit(record)
+
+    def _replaced(self) -> bool:
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.stream.fileno())
+        return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            now = time.time()
+            segment = "%s.%s-%06d" % (self.baseFilename, time.strftime("%Y%m%d-%H%M%S", time.localtime(now)),
+                                      int(now % 1 * 1e6))
+            while os.path.exists(segment) or os.path.exists(segment + self.SUFFIXES[self.compression]):
+                segment += "0"
+            os.rename(self.baseFilename, segment)
+            if self.compression == "none":
+                self._prune()
+            else:
+                _compressor.submit(functools.partial(self._compress, segment))
+        if not self.delay:
+            self.stream = self._open()
+
+    def _compress(self, segment: str) -> None:
+        target = segment + self.SUFFIXES[self.compression]
+        partial = "%s.%d.tmp" % (target, os.getpid())
+        with self._compress_lock.held():
+            if not os.path.exists(segment):
+                # Already compressed by another process sharing the file
+                return
+            try:
+                with open(segment, "rb") as source, open(partial, "wb") as sink:
+                    if self.compression == "zstd":
+                        zstandard.ZstdCompressor(level=3).copy_stream(source, sink)
+                    else:
+                        with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=6) as gz:
+                            shutil.copyfileobj(source, gz, 1024 * 1024)
+                os.replace(partial, target)
+                os.remove(segment)
+            except OSError:
+                LOG_SEGMENTS_COMPRESSED.inc(codec=self.compression, result="error")
+                if os.path.exists(partial):
+                    os.remove(partial)
+                raise
+            LOG_SEGMENTS_COMPRESSED.inc(codec=self.compression, result="ok")
+            self._prune()
+
+    def _prune(self) -> None:
+        segments = self._segments()
+        for path in segments[:max(0, len(segments) - self.backupCount)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records that do not fit are counted and dropped.
+
+    The next record that does fit is preceded by a warning with the number of
+    records lost, so gaps in the log are visible.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self._dropped: Dict[str, int] = {}
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and pre-format the traceback in the calling thread (the
+        # objects may change before the writer gets to them), but leave the
+        # line layout to the writer's formatter
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        # The writer thread has no request context of its own
+        record.context = current_context()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._unreported:
+            with self._lock:
+                lost, self._unreported = self._unreported, 0
+            if lost:
+                notice = logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": "Log queue full: dropped %d record(s)" % lost, "funcName": "enqueue",
+                })
+                try:
+                    self.queue.put_nowait(notice)
+                except queue.Full:
+                    with self._lock:
+                        self._unreported += lost
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._dropped[record.levelname] = self._dropped.get(record.levelname, 0) + 1
+                self._unreported += 1
+            LOG_RECORDS_DROPPED.inc(level=record.levelname)
+
+    def dropped(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._dropped)
 
 
 _loggers_configured = set()
+_pipeline_lock = threading.Lock()
+_queue_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[QueueListener] = None
 
 
 def _get_level_from_env():
@@ -46,8 +404,75 @@ def _get_level_from_env():
     return logging.INFO
 
 
+def _restart_after_fork() -> None:
+    # The writer thread does not survive fork() and the queue's locks may have
+    # been held by another thread at that moment: give the child fresh ones
+    if _listener is None or _queue_handler is None:
+        return
+    fresh = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler.queue = _listener.queue = fresh
+    _listener._thread = None
+    _listener.start()
+
+
+def configure_logging() -> DroppingQueueHandler:
+    """Start the shared logging pipeline once per process and return its queue handler.
+
+    Loggers enqueue records on a bounded queue; a single writer thread owns
+    the console and rotating file handlers, so request threads never wait on
+    disk and only one handle ever writes (and rotates) ``logs/app.log``.
+    """
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        return _queue_handler
+    with _pipeline_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+
+        level = _get_level_from_env()
+
+        # Human-friendly console handler
+        ch = logging.StreamHandler()
+        ch.setLevel(level)
+
+        # Rotating file handler; rotated segments are compressed in the background
+        fh = CompressingRotatingFileHandler(
+            os.path.join(LOG_DIR, "app.log"), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8", compression=LOG_COMPRESSION
+        )
+        fh.setLevel(level)
+
+        # Choose formatter (JSON if LOG_JSON=1)
+        if os.getenv("LOG_JSON") in ("1", "true", "True"):
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(DEFAULT_FORMAT)
+
+        ch.setFormatter(formatter)
+        fh.setFormatter(formatter)
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        listener = QueueListener(log_queue, ch, fh, respect_handler_level=True)
+        listener.start()
+        # Flush what is still queued on interpreter exit
+        atexit.register(listener.stop)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+        handler = DroppingQueueHandler(log_queue)
+        handler.setLevel(level)
+        _listener, _queue_handler = listener, handler
+        return handler
+
+
+def queue_stats() -> Dict[str, object]:
+    """Current depth, capacity and per-level drop counts of the log queue."""
+    handler = configure_logging()
+    return {"queued": handler.queue.qsize(), "capacity": LOG_QUEUE_SIZE, "dropped": handler.dropped()}
+
+
 def get_logger(name: str) -> logging.Logger:
-    """Create/configure a logger with console + rotating file handlers.
+    """Return a logger that writes through the shared queue pipeline.
 
     The function is idempotent: calling it multiple times for the same name
     will not duplicate handlers.
@@ -56,35 +481,105 @@ def get_logger(name: str) -> logging.Logger:
     if name in _loggers_configured:
         return logger
 
-    level = _get_level_from_env()
-    logger.setLevel(level)
+    logger.setLevel(_get_level_from_env())
+    logger.addHandler(configure_logging())
+
+    # Avoid propagating to root handlers more than once
+    logger.propagate = False
+    _loggers_configured.add(name)
+    return logger
+
 
-    # Human-friendly console handler
-    ch = logging.StreamHandler()
-    ch.setLevel(level)
+class LazyValue:
+    """Log argument computed only when a record is actually formatted.
 
-    # Rotating file handler
-    fh = RotatingFileHandler(
-        os.path.join(LOG_DIR, "app.log"), maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
-    )
-    fh.setLevel(level)
+    ``logger.debug("Payload: %s", lazy(json.dumps, payload))`` costs one small
+    object when DEBUG is off; ``json.dumps`` runs only if the record passes the
+    logger and handler levels.
+    """
 
-    # Choose formatter (JSON if LOG_JSON=1)
-    if os.getenv("LOG_JSON") in ("1", "true", "True"):
-        formatter = JsonFormatter()
-    else:
-        formatter = logging.Formatter(DEFAULT_FORMAT)
+    __slots__ = ("func", "args", "kwargs")
 
-    ch.setFormatter(formatter)
-    fh.setFormatter(formatter)
+    def __init__(self, func: Callable[..., Any], *args: Any, **kwargs: Any):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
 
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    def __str__(self) -> str:
+        return str(self.func(*self.args, **self.kwargs))
 
-    # Avoid propagating to root handlers more than once
-    logger.propagate = False
-    _loggers_configured.add(name)
-    return logger
+    __repr__ = __str__
+
+
+def lazy(func: Callable[..., Any], *args: Any, **kwargs: Any) -> LazyValue:
+    """Defer ``func(*args, **kwargs)`` until the log record is formatted."""
+    return LazyValue(func, *args, **kwargs)
+
+
+def _shorten(value: Any, limit: int) -> str:
+    text = value if isinstance(value, str) else str(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def truncated(value: Any, limit: Optional[int] = None) -> LazyValue:
+    """Lazy ``str(value)`` cut to ``limit`` characters (LOG_TRUNCATE_CHARS by default)."""
+    return LazyValue(_shorten, value, LOG_TRUNCATE_CHARS if limit is None else limit)
+
+
+def _object_state(obj: Any) -> Any:
+    return getattr(obj, "__dict__", obj)
+
+
+def object_state(obj: Any, limit: int = 2000) -> LazyValue:
+    """Lazy, truncated ``obj.__dict__`` (or ``str(obj)``) for debug dumps of SDK objects."""
+    return LazyValue(_shorten, LazyValue(_object_state, obj), limit)
+
+
+def log_sampled(logger: logging.Logger, level: int, msg: str, *args: Any,
+                rate: Optional[float] = None, **kwargs: Any) -> bool:
+    """Emit roughly ``rate`` of the calls (LOG_DEBUG_SAMPLE_RATE by default).
+
+    Meant for records written once per item in a loop. Returns True when the
+    record was logged.
+    """
+    rate = LOG_DEBUG_SAMPLE_RATE if rate is None else rate
+    if rate <= 0 or not logger.isEnabledFor(level):
+        return False
+    if rate < 1 and random.random() >= rate:
+        return False
+    logger.log(level, msg, *args, stacklevel=2, **kwargs)
+    return True
+
+
+_rate_limit_lock = threading.Lock()
+# (logger name, key) -> [monotonic time of the last emitted record, calls suppressed since]
+_rate_limit_state: Dict[Tuple[str, str], List] = {}
+
+
+def log_rate_limited(logger: logging.Logger, level: int, key: str, interval: float,
+                     msg: str, *args: Any, **kwargs: Any) -> bool:
+    """Emit at most one record per ``interval`` seconds for ``key``.
+
+    The next record that gets through reports how many were suppressed.
+    ``key`` should be a fixed string per call site (not per item), since state
+    is kept for every key seen. Returns True when the record was logged.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    now = time.monotonic()
+    state_key = (logger.name, key)
+    with _rate_limit_lock:
+        state = _rate_limit_state.get(state_key)
+        if state is not None and now - state[0] < interval:
+            state[1] += 1
+            return False
+        suppressed = state[1] if state is not None else 0
+        _rate_limit_state[state_key] = [now, 0]
+    if suppressed:
+        msg += " (%d similar record(s) suppressed)"
+        args += (suppressed,)
+    logger.log(level, msg, *args, stacklevel=2, **kwargs)
+    return True
 
 
 def log_exceptions(func: Callable) -> Callable:
@@ -0,0 +1,180 @@
+"""
+Markup Module
+
+Renders the lightweight markdown found in Test Plan fields to HTML in a
+single pass over the lines, with precompiled patterns.
+
+Output matches the previous line-by-line converter for the content it
+handled (paragraph lines ending in ``<br>``, ``**bold**``, ``*italic*``,
+``[text](url)`` links and flat ``-``/``1.`` lists) and adds nested lists by
+indentation, ``#`` headings, fenced code blocks and inline ``code``.
+"""
+
+import html
+import re
+from typing import List
+
+from logger import log_exceptions
+
+BLOCK_PATTERN = re.compile(
+    r"(?P<fence>^\s*```)"
+    r"|(?P<heading>^(?P<hashes>#{1,6})\s+(?P<title>.*?)\s*#*\s*$)"
+    r"|(?P<item>^(?P<indent>\s*)(?:(?P<bullet>[-*+])|(?P<number>\d+)\.)\s+)"
+)
+BOLD_PATTERN = re.compile(r"\*\*(.*?)\*\*")
+ITALIC_PATTERN = re.compile(r"\*(.*?)\*")
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\(([^\)]+)\)")
+CODE_SPAN_PATTERN = re.compile(r"`([^`]+)`")
+
+LINE_BREAK = "<br>"
+TAB_WIDTH = 4
+
+
+def _inline_text(text: str) -> str:
+    if "*" in text:
+        text = BOLD_PATTERN.sub(r"<strong>\1</strong>", text)
+        text = ITALIC_PATTERN.sub(r"<em>\1</em>", text)
+    if "[" in text:
+        text = LINK_PATTERN.sub(r'<a href="\2">\1</a>', text)
+    return text
+
+
+def render_inline(text: str) -> str:
+    """Apply bold, italic, link and code span formatting to one line."""
+    if "`" not in text:
+        return _inline_text(text)
+    parts = CODE_SPAN_PATTERN.split(text)
+    # split() alternates plain text and code span contents
+    return "".join(
+        f"<code>{html.escape(part, quote=False)}</code>" if i % 2 else _inline_text(part)
+        for i, part in enumerate(parts))
+
+
+def _identity(text: str) -> str:
+    return text
+
+
+def _indent_width(indent: str) -> int:
+    return len(indent.expandtabs(TAB_WIDTH))
+
+
+@log_exceptions
+def markdown_to_html(text: str) -> str:
+    """
+    Convert Test Plan markdown to HTML.
+
+    Every line that is not a heading or inside a code block keeps a trailing
+    ``<br>`` (except the last), as the previous converter produced. List items
+    indented deeper than the item above start a nested list inside it.
+
+    Args:
+        text: Markdown or plain text
+
+    Returns:
+        HTML fragment, lines joined with ``\\n``
+    """
+    if not text:
+        return ""
+
+    # Inline rules never cross a line break, so without code spans or fences
+    # (whose contents must stay literal) they can run once over the whole text
+    # instead of once per line
+    inline = render_inline
+    if "`" not in text:
+        text = _inline_text(text)
+        inline = _identity
+
+    lines = text.split("\n")
+    last = len(lines) - 1
+    out: List[str] = []
+    # Open lists, innermost last: [indent width, tag]
+    lists: List[List] = []
+    # Index in ``out`` of the list item whose </li> is deferred until we know
+    # whether a nested list follows
+    open_item = -1
+    code: List[str] = []
+    in_code = False
+
+    def close_item() -> None:
+        nonlocal open_item
+        if open_item >= 0:
+            out[open_item] += "</li>"
+            open_item = -1
+
+    def close_list() -> None:
+        out.append(f"</{lists.pop()[1]}>")
+        if lists:
+            # The parent item was left open to contain this list
+            out.append("</li>")
+
+    append = out.append
+    match_block = BLOCK_PATTERN.match
+    breaks = [LINE_BREAK] * last + [""]
+
+    for line, br in zip(lines, breaks):
+        match = match_block(line)
+        if match is None and not lists and not in_code:
+            # Plain paragraph line outside any block: the common case
+            append(inline(line) + br)
+            continue
+        # The enclosing named group closes last: "fence", "heading" or "item"
+        kind = match.lastgroup if match else None
+
+        if in_code:
+            if kind == "fence":
+                out.append("<pre><code>" + "\n".join(code) + "</code></pre>")
+                code.clear()
+                in_code = False
+            else:
+                code.append(html.escape(line, quote=False))
+            continue
+
+        if kind == "item":
+            indent, number = match.group("indent", "number")
+            width = _indent_width(indent) if indent else 0
+            tag = "ol" if number else "ul"
+            if lists and lists[-1][0] == width and lists[-1][1] == tag and open_item >= 0:
+                # Next item of the current list
+                out[open_item] += "</li>"
+                append(f"<li>{inline(line[match.end():])}{br}")
+                open_item = len(out) - 1
+                continue
+            while len(lists) > 1 and width <= lists[-2][0]:
+                close_item()
+                close_list()
+            if lists and width > lists[-1][0]:
+                out.append(f"<{tag}>")
+                lists.append([width, tag])
+            else:
+                close_item()
+                if not lists:
+                    out.append(f"<{tag}>")
+                    lists.append([width, tag])
+                elif lists[-1][1] != tag:
+                    out.append(f"</{lists[-1][1]}>")
+                    out.append(f"<{tag}>")
+                    lists[-1][1] = tag
+                lists[-1][0] = min(lists[-1][0], width)
+            content = inline(line[match.end():])
+            append(f"<li>{content}{br}")
+            open_item = len(out) - 1
+            continue
+
+        close_item()
+        while lists:
+            close_list()
+
+        if kind == "fence":
+            in_code = True
+        elif kind == "heading":
+            level = len(match.group("hashes"))
+            out.append(f"<h{level}>{inline(match.group('title'))}</h{level}>")
+        else:
+            append(inline(line) + br)
+
+    close_item()
+    while lists:
+        close_list()
+    if in_code:
+        out.append("<pre><code>" + "\n".join(code) + "</code></pre>")
+    return "\n".join(out)
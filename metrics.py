@@ -0,0 +1,435 @@
+"""
+Metrics Module
+
+Small in-process counters, gauges and histograms used to instrument the hub.
+Metrics are created once at module level through the shared ``REGISTRY`` and
+updated from any thread; ``REGISTRY.snapshot()`` returns plain dicts suitable
+for JSON endpoints and log lines, and ``exposition()`` renders them in the
+Prometheus text format.
+
+With several worker processes (gunicorn), set ``METRICS_MULTIPROC_DIR`` to a
+directory shared by the workers and emptied on deploy: each process writes
+its snapshot there every ``METRICS_FLUSH_INTERVAL`` seconds and
+``collect()`` sums the files, so any worker can answer ``/metrics`` for all.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: files of exited workers are never compacted
+    fcntl = None
+
+# Latency buckets in seconds, spanning fast cache hits to slow model calls
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Token count buckets for prompts and responses
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+# Shared directory for per-process metric files; empty means a single process
+MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR", "")
+FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """Shared label handling for counters and histograms."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [{"labels": self._labels(k), "value": v} for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down (in-flight requests, sizes).
+
+    Across worker processes, gauges of live processes are summed.
+    """
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (cumulative on export) with sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [per-bucket counts (+inf last)], sum, count
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._values.items()]
+        result = []
+        for key, counts, total, count in items:
+            result.append({
+                "labels": self._labels(key),
+                "count": count,
+                "sum": total,
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], _cumulative(counts))),
+                "p50": self._quantile(counts, count, 0.5),
+                "p95": self._quantile(counts, count, 0.95),
+            })
+        return result
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty or unbounded)."""
+        if not count:
+            return None
+        rank = q * count
+        running = 0
+        for bound, n in zip(self.buckets, counts):
+            running += n
+            if running >= rank:
+                return bound
+        return None
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    out, running = [], 0
+    for n in counts:
+        running += n
+        out.append(running)
+    return out
+
+
+class Registry:
+    """Holds every metric by name; creating an existing name returns the same metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def reset(self) -> None:
+        """Zero every metric (a forked worker starts counting from scratch)."""
+        for metric in self.metrics():
+            metric.reset()
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Dict[str, object]]:
+        """Return ``{name: {"type", "help", "values"}}`` for metrics starting with ``prefix``."""
+        return {
+            m.name: {"type": m.kind, "help": m.documentation, "values": m.snapshot()}
+            for m in self.metrics() if m.name.startswith(prefix)
+        }
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sum ``Registry.snapshot()`` results from several processes.
+
+    Counter and gauge values are added; histogram counts, sums and
+    (cumulative) buckets are added per label set.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {"type": metric["type"], "help": metric["help"], "values": {}})
+            if target["type"] != metric["type"]:
+                continue
+            for item in metric["values"]:
+                key = tuple(sorted(item["labels"].items()))
+                current = target["values"].get(key)
+                if metric["type"] == "histogram":
+                    if current is None:
+                        current = target["values"][key] = {"labels": dict(item["labels"]), "count": 0,
+                                                           "sum": 0.0, "buckets": {}}
+                    current["count"] += item["count"]
+                    current["sum"] += item["sum"]
+                    for bound, count in item["buckets"].items():
+                        current["buckets"][bound] = current["buckets"].get(bound, 0) + count
+                elif current is None:
+                    target["values"][key] = {"labels": dict(item["labels"]), "value": item["value"]}
+                else:
+                    current["value"] += item["value"]
+    for metric in merged.values():
+        metric["values"] = list(metric["values"].values())
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {_number(value)}"
+    rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+    return f"{name}{{{rendered}}} {_number(value)}"
+
+
+def render_prometheus(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """Render a (merged) snapshot in the Prometheus text exposition format 0.0.4."""
+    lines: List[str] = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}".replace("\n", " "))
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for item in metric["values"]:
+            labels = item["labels"]
+            if metric["type"] != "histogram":
+                lines.append(_sample(name, labels, item["value"]))
+                continue
+            for bound, count in item["buckets"].items():
+                lines.append(_sample(f"{name}_bucket", {**labels, "le": bound}, count))
+            lines.append(_sample(f"{name}_sum", labels, item["sum"]))
+            lines.append(_sample(f"{name}_count", labels, item["count"]))
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to another user
+        return True
+    return True
+
+
+class ProcessAggregator:
+    """Shares one registry's values between worker processes through files.
+
+    Every process writes ``metrics-<pid>.json`` into ``directory`` from a
+    background thread; :meth:`collect` sums all of them. Gauges only count
+    for live processes. Files of exited processes are folded into
+    ``metrics-archive.json`` (without their gauges) so counters never go
+    backwards and the directory does not grow with every restart.
+
+    Args:
+        registry: Registry to export from this process
+        directory: Directory shared by the workers
+        flush_interval: Seconds between writes of this process's file
+    """
+
+    ARCHIVE = "metrics-archive.json"
+
+    def __init__(self, registry: Registry, directory: str, flush_interval: float = FLUSH_INTERVAL):
+        self.registry = registry
+        self.directory = directory
+        self.flush_interval = max(0.5, flush_interval)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    @staticmethod
+    def _write(path: str, snapshot: Dict[str, Any]) -> None:
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(partial, path)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def flush(self) -> None:
+        """Write this process's current values."""
+        with self._flush_lock:
+            self._write(self._path(os.getpid()), self.registry.snapshot())
+
+    def start(self) -> None:
+        """Start the flush thread (again in a forked child, whose registry starts from zero)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            try:
+                self.flush()
+            except OSError:
+                pass
+            time.sleep(self.flush_interval)
+
+    def _after_fork(self) -> None:
+        # The parent's values stay in the parent's file; counting them again
+        # here would double them
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self.registry.reset()
+        self.start()
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Merged snapshot of every worker, this one read live."""
+        own = os.getpid()
+        self.flush()
+        self._compact()
+        snapshots = [self.registry.snapshot()]
+        archive = self._read(os.path.join(self.directory, self.ARCHIVE))
+        if archive:
+            snapshots.append(archive)
+        for entry in os.listdir(self.directory):
+            pid = self._file_pid(entry)
+            if pid is None or pid == own:
+                continue
+            snapshot = self._read(os.path.join(self.directory, entry))
+            if not snapshot:
+                continue
+            if not _pid_alive(pid):
+                snapshot = self._without_gauges(snapshot)
+            snapshots.append(snapshot)
+        return merge_snapshots(snapshots)
+
+    @staticmethod
+    def _file_pid(entry: str) -> Optional[int]:
+        if not (entry.startswith("metrics-") and entry.endswith(".json")):
+            return None
+        pid = entry[len("metrics-"):-len(".json")]
+        return int(pid) if pid.isdigit() else None
+
+    @staticmethod
+    def _without_gauges(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: metric for name, metric in snapshot.items() if metric.get("type") != "gauge"}
+
+    def _compact(self) -> None:
+        """Fold the files of exited processes into the archive, under a cross-process lock."""
+        if fcntl is None:
+            return
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                dead = [entry for entry in os.listdir(self.directory)
+                        if self._file_pid(entry) is not None and not _pid_alive(self._file_pid(entry))]
+                if not dead:
+                    return
+                archive_path = os.path.join(self.directory, self.ARCHIVE)
+                snapshots = [self._read(archive_path) or {}]
+                snapshots += [self._without_gauges(self._read(os.path.join(self.directory, entry)) or {})
+                              for entry in dead]
+                self._write(archive_path, merge_snapshots(snapshots))
+                for entry in dead:
+                    os.remove(os.path.join(self.directory, entry))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+REGISTRY = Registry()
+
+_aggregator: Optional[ProcessAggregator] = None
+if MULTIPROC_DIR:
+    _aggregator = ProcessAggregator(REGISTRY, MULTIPROC_DIR)
+    _aggregator.start()
+    atexit.register(_aggregator.flush)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_aggregator._after_fork)
+
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every metric, summed over all workers in multi-process mode."""
+    if _aggregator is not None:
+        return _aggregator.collect()
+    return REGISTRY.snapshot()
+
+
+def exposition() -> str:
+    """All metrics in the Prometheus text format, for ``/metrics``."""
+    return render_prometheus(collect())
@@ -0,0 +1,185 @@
+"""
+Render Cache Module
+
+Bounded in-process memo for converting Jira field content (ADF to text,
+Test Plan markup to HTML). Entries are keyed by (site, issue key, field,
+converter) and versioned by the issue's ``updated`` timestamp, or by a hash
+of the content when no timestamp is known. Seeing a newer timestamp for an
+issue drops every entry cached for its older version; an older timestamp
+evicts nothing. Selecting, refreshing and previewing an unchanged ticket
+therefore converts each field once.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import logger as logutil
+from metrics import REGISTRY
+
+logger = logutil.get_logger(__name__)
+
+RENDER_REQUESTS = REGISTRY.counter(
+    "render_cache_requests_total", "Field conversions served from the render cache or computed",
+    ("converter", "result"))
+RENDER_SAVED_SECONDS = REGISTRY.counter(
+    "render_cache_saved_seconds_total", "Conversion time avoided by render cache hits",
+    ("converter",))
+RENDER_EVICTIONS = REGISTRY.counter(
+    "render_cache_evictions_total", "Render cache entries dropped because the issue changed or the cache was full",
+    ("reason",))
+
+EntryKey = Tuple[str, str, str, str]
+IssueKey = Tuple[str, str]
+
+# Format of Jira's fields.updated, e.g. 2024-01-31T10:30:00.000+0000
+JIRA_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def _is_newer(updated: str, than: str) -> bool:
+    """True if Jira timestamp ``updated`` is later than ``than``.
+
+    Timestamps that do not parse (or differ only in format) compare as text.
+    """
+    try:
+        return datetime.strptime(updated, JIRA_TIMESTAMP) > datetime.strptime(than, JIRA_TIMESTAMP)
+    except ValueError:
+        return updated > than
+
+
+def content_version(content: Any) -> str:
+    """Stable hash of field content, used when the issue timestamp is unknown."""
+    if isinstance(content, str):
+        data = content.encode("utf-8")
+    else:
+        data = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+class RenderCache:
+    """LRU memo of converter results per issue field.
+
+    Args:
+        max_entries: Least recently used entries beyond this count are dropped
+        enabled: When False every call converts
+    """
+
+    def __init__(self, max_entries: int = 512, enabled: bool = True):
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled
+        # entry key -> (version, result, seconds the conversion took)
+        self._entries: "OrderedDict[EntryKey, Tuple[str, Any, float]]" = OrderedDict()
+        # issue -> (latest timestamp seen, entry keys cached for it)
+        self._issues: Dict[IssueKey, Tuple[str, Set[EntryKey]]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._saved = 0.0
+
+    def render(self, site: str, issue_key: str, field: str, content: Any,
+               converter: Callable[[Any], Any], updated: Optional[str] = None) -> Any:
+        """
+        Return ``converter(content)``, reusing the result cached for this issue version.
+
+        Args:
+            site: Jira base URL (issue keys are only unique per site)
+            issue_key: Issue the content belongs to
+            field: Field name, e.g. ``description``
+            content: Raw field value passed to ``converter``
+            converter: Conversion function; its name is part of the key
+            updated: The issue's ``updated`` timestamp; a content hash is used when empty
+
+        Returns:
+            Converted value
+        """
+        name = getattr(converter, "__name__", "convert")
+        if not self.enabled or not issue_key:
+            return converter(content)
+
+        issue = (site or "", issue_key)
+        key = (issue[0], issue_key, field, name)
+        version = updated or content_version(content)
+        with self._lock:
+            if updated:
+                self._observe_timestamp(issue, updated)
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._saved += cached[2]
+                hit = cached
+            else:
+                hit = None
+        if hit is not None:
+            RENDER_REQUESTS.inc(converter=name, result="hit")
+            RENDER_SAVED_SECONDS.inc(hit[2], converter=name)
+            return hit[1]
+
+        start = time.perf_counter()
+        result = converter(content)
+        elapsed = time.perf_counter() - start
+        RENDER_REQUESTS.inc(converter=name, result="miss")
+        with self._lock:
+            self._misses += 1
+            current = self._issues.get(issue)
+            if updated and current and current[0] != updated:
+                # A newer version of the issue was seen while converting
+                return result
+            self._entries[key] = (version, result, elapsed)
+            self._entries.move_to_end(key)
+            self._issues.setdefault(issue, (updated or "", set()))[1].add(key)
+            self._evict_overflow()
+        return result
+
+    def invalidate(self, site: str, issue_key: str) -> int:
+        """Drop every entry cached for one issue; returns the number removed."""
+        with self._lock:
+            return self._drop_issue((site or "", issue_key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries), "max_entries": self.max_entries, "enabled": self.enabled,
+                "hits": self._hits, "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else None,
+                "conversions_saved": self._hits, "seconds_saved": round(self._saved, 4),
+            }
+
+    def _observe_timestamp(self, issue: IssueKey, updated: str) -> None:
+        current = self._issues.get(issue)
+        if current is None:
+            self._issues[issue] = (updated, set())
+        elif current[0] != updated and _is_newer(updated, current[0]):
+            # An older timestamp (e.g. a stale search page) must not evict the
+            # entries of the version already cached; it simply misses
+            removed = self._drop_issue(issue)
+            if removed:
+                RENDER_EVICTIONS.inc(removed, reason="stale")
+                logger.debug("Render cache dropped %d stale entr(ies) for %s", removed, issue[1])
+            self._issues[issue] = (updated, set())
+
+    def _drop_issue(self, issue: IssueKey) -> int:
+        current = self._issues.pop(issue, None)
+        if current is None:
+            return 0
+        removed = 0
+        for key in current[1]:
+            if self._entries.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            issue = (key[0], key[1])
+            current = self._issues.get(issue)
+            if current is not None:
+                current[1].discard(key)
+                if not current[1]:
+                    del self._issues[issue]
+            RENDER_EVICTIONS.inc(reason="size")
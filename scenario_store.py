@@ -0,0 +1,93 @@
+"""
+Scenario Store Module
+
+Persistent history of generated test scenarios and test cases per ticket.
+Every generation is appended as one row, so history survives logout, is
+shared between browser tabs, and no longer travels inside the session.
+Rows are scoped by Jira site because ticket keys are only unique per site.
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage import SqliteDatabase, data_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenario_generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    ticket_key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    created REAL NOT NULL,
+    prompt TEXT,
+    description TEXT,
+    items TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenario_generations_ticket ON scenario_generations (site, ticket_key, kind, id);
+CREATE INDEX IF NOT EXISTS scenario_generations_owner ON scenario_generations (owner, created);
+"""
+
+# Kinds of generated content
+SCENARIOS = "scenarios"
+TEST_CASES = "test_cases"
+KINDS = (SCENARIOS, TEST_CASES)
+
+MAX_PAGE_SIZE = 100
+
+
+def _row_to_entry(row) -> Dict[str, Any]:
+    return {
+        "id": row[0], "ticket_key": row[1], "kind": row[2], "owner": row[3], "created": row[4],
+        "prompt": row[5], "description": row[6], "items": json.loads(row[7]),
+    }
+
+
+_COLUMNS = "id, ticket_key, kind, owner, created, prompt, description, items"
+
+
+class ScenarioStore:
+    """Append-only generation history in SQLite.
+
+    Args:
+        path: Database file (defaults to ``data/scenarios.db``)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.db = SqliteDatabase(path or data_path("scenarios.db"), SCHEMA)
+
+    def record(self, site: str, ticket_key: str, kind: str, owner: str, items: List[Any],
+               prompt: Optional[str] = None, description: Optional[str] = None) -> int:
+        """Append one generation; returns its id."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown generation kind: {kind}")
+        cursor = self.db.connect().execute(
+            "INSERT INTO scenario_generations (site, ticket_key, kind, owner, created, prompt, description, items) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (site or "", ticket_key, kind, owner, time.time(), prompt, description,
+             json.dumps(items, ensure_ascii=False)))
+        return cursor.lastrowid
+
+    def latest(self, site: str, ticket_key: str, kind: str = SCENARIOS,
+               owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Most recent generation of ``kind`` for a ticket (optionally only ``owner``'s)."""
+        entries, _ = self.history(site, ticket_key, kind, owner=owner, limit=1)
+        return entries[0] if entries else None
+
+    def history(self, site: str, ticket_key: str, kind: str = SCENARIOS, owner: Optional[str] = None,
+                before: Optional[int] = None, limit: int = 20) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Return (generations newest first, cursor for the next older page or None)."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql = (f"SELECT {_COLUMNS} FROM scenario_generations "
+               "WHERE site = ? AND ticket_key = ? AND kind = ? AND id < ?")
+        params: List[Any] = [site or "", ticket_key, kind, before if before is not None else 2 ** 63 - 1]
+        if owner is not None:
+            sql += " AND owner = ?"
+            params.append(owner)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+        rows = self.db.connect().execute(sql, params).fetchall()
+        entries = [_row_to_entry(r) for r in rows[:limit]]
+        next_before = entries[-1]["id"] if len(rows) > limit else None
+        return entries, next_before
@@ -0,0 +1,156 @@
+"""
+Session Serializer Module
+
+Compact, versioned encoding for session values stored by ``session_store``.
+
+Every stored value starts with a two byte header: the format version, then a
+codec byte whose high nibble is the payload format (msgpack, JSON or pickle)
+and whose low nibble is the compression (none, zlib or zstd). Values are
+encoded with msgpack when it is installed, otherwise JSON; values neither can
+represent fall back to pickle. Payloads of at least ``compress_min_bytes``
+are compressed with zstd when available, otherwise zlib, and kept compressed
+only if that is smaller. Rows written before the header existed are plain
+pickles and are still decoded.
+
+Unlike Flask's default cookie serializer, which tags tuples, msgpack and
+JSON do not round-trip every Python type: tuples come back as lists, and
+non-string dict keys survive only under msgpack. Code reading the session
+must not rely on getting a tuple back.
+"""
+
+import hashlib
+import json
+import pickle
+import threading
+import zlib
+from typing import Any, Tuple
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON is used instead
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is used instead
+    zstandard = None
+
+VERSION = 1
+
+FORMAT_MSGPACK = 0x10
+FORMAT_JSON = 0x20
+FORMAT_PICKLE = 0x30
+
+COMPRESS_NONE = 0x0
+COMPRESS_ZLIB = 0x1
+COMPRESS_ZSTD = 0x2
+
+_FORMAT_NAMES = {FORMAT_MSGPACK: "msgpack", FORMAT_JSON: "json", FORMAT_PICKLE: "pickle"}
+_COMPRESS_NAMES = {COMPRESS_NONE: "", COMPRESS_ZLIB: "+zlib", COMPRESS_ZSTD: "+zstd"}
+
+# First byte of a pickle (protocol 2+), i.e. a row written before versioning
+_PICKLE_PROTO = 0x80
+
+
+class SessionSerializer:
+    """Encodes session values into headered, optionally compressed bytes.
+
+    Encoding is split in two so callers can detect changes cheaply:
+    :meth:`encode` produces the uncompressed payload (hashed by
+    :meth:`digest`), and :meth:`pack` compresses and adds the header only
+    for values that are actually written.
+
+    Args:
+        compress_min_bytes: Payloads at least this large are compressed
+        zstd_level: zstd compression level
+        zlib_level: zlib compression level (used when zstandard is missing)
+    """
+
+    def __init__(self, compress_min_bytes: int = 1024, zstd_level: int = 3, zlib_level: int = 6):
+        self.compress_min_bytes = compress_min_bytes
+        self.zstd_level = zstd_level
+        self.zlib_level = zlib_level
+        # zstandard (de)compressor objects must not be shared between threads
+        self._local = threading.local()
+
+    def encode(self, value: Any) -> Tuple[int, bytes]:
+        """Return (format, uncompressed payload) for a value."""
+        try:
+            if msgpack is not None:
+                return FORMAT_MSGPACK, msgpack.packb(value, use_bin_type=True)
+            return FORMAT_JSON, json.dumps(value, separators=(",", ":"), allow_nan=True).encode("utf-8")
+        except (TypeError, ValueError, OverflowError):
+            return FORMAT_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def digest(fmt: int, payload: bytes) -> bytes:
+        """Change-detection digest of an encoded (uncompressed) value."""
+        return hashlib.blake2b(payload, digest_size=16, person=bytes([fmt])).digest()
+
+    def pack(self, fmt: int, payload: bytes) -> bytes:
+        """Compress a payload if worthwhile and prepend the header."""
+        compression = COMPRESS_NONE
+        if len(payload) >= self.compress_min_bytes:
+            if zstandard is not None:
+                compressed = self._zstd_compressor().compress(payload)
+                candidate = COMPRESS_ZSTD
+            else:
+                compressed = zlib.compress(payload, self.zlib_level)
+                candidate = COMPRESS_ZLIB
+            if len(compressed) < len(payload):
+                payload, compression = compressed, candidate
+        return bytes((VERSION, fmt | compression)) + payload
+
+    def dumps(self, value: Any) -> bytes:
+        return self.pack(*self.encode(value))
+
+    def loads(self, data: bytes) -> Any:
+        if not data:
+            raise ValueError("empty session value")
+        if data[0] == _PICKLE_PROTO:
+            return pickle.loads(data)
+        if data[0] != VERSION:
+            raise ValueError(f"unsupported session value version {data[0]}")
+        codec = data[1]
+        fmt, compression = codec & 0xF0, codec & 0x0F
+        payload = data[2:]
+        if compression == COMPRESS_ZSTD:
+            if zstandard is None:
+                raise ValueError("session value is zstd-compressed but zstandard is not installed")
+            payload = self._zstd_decompressor().decompress(payload)
+        elif compression == COMPRESS_ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression != COMPRESS_NONE:
+            raise ValueError(f"unknown session value compression {compression}")
+        if fmt == FORMAT_MSGPACK:
+            if msgpack is None:
+                raise ValueError("session value is msgpack-encoded but msgpack is not installed")
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        if fmt == FORMAT_JSON:
+            return json.loads(payload)
+        if fmt == FORMAT_PICKLE:
+            return pickle.loads(payload)
+        raise ValueError(f"unknown session value format {fmt:#x}")
+
+    def _zstd_compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.zstd_level)
+        return compressor
+
+    def _zstd_decompressor(self):
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+
+def describe(data: bytes) -> str:
+    """Human readable encoding of a stored value, e.g. ``msgpack+zstd``."""
+    if not data:
+        return "empty"
+    if data[0] == _PICKLE_PROTO:
+        return "pickle (legacy)"
+    if data[0] != VERSION or len(data) < 2:
+        return "unknown"
+    return _FORMAT_NAMES.get(data[1] & 0xF0, "unknown") + _COMPRESS_NAMES.get(data[1] & 0x0F, "+unknown")
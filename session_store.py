@@ -0,0 +1,282 @@
+"""
+Session Store Module
+
+Server-side Flask sessions kept in a SQLite (WAL) database, one row per
+session key. Keys are loaded lazily on first access and only keys whose
+serialized value changed during the request are written back, so a request
+that only reads ``jira_url`` does not decode ``search_results`` or rewrite
+``scenario_history``. Values are encoded by ``session_serializer``. Expired
+sessions are removed by a background thread.
+"""
+
+import secrets
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer, want_bytes
+
+import logger as logutil
+from metrics import REGISTRY
+from session_serializer import SessionSerializer, describe
+from storage import SqliteDatabase, data_path
+
+logger = logutil.get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires);
+CREATE TABLE IF NOT EXISTS session_items (
+    sid TEXT NOT NULL,
+    key TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (sid, key)
+) WITHOUT ROWID;
+"""
+
+# Sessions deleted per statement by the expiry thread, to keep write locks short
+EXPIRE_BATCH = 500
+
+# Value sizes in bytes, from small flags up to large ticket payloads
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+SESSION_VALUE_BYTES = REGISTRY.histogram(
+    "session_value_bytes", "Size of session values written, before and after compression",
+    ("key", "form"), buckets=SIZE_BUCKETS)
+SESSION_READ_BYTES = REGISTRY.histogram(
+    "session_value_read_bytes", "Stored size of session values loaded by requests",
+    ("key",), buckets=SIZE_BUCKETS)
+
+_MISSING = object()
+
+
+class SqliteSession(SessionMixin):
+    """Session mapping that fetches values from the store on first access.
+
+    ``_digests`` holds the stored digest of every key the session had when it
+    was opened; ``_values`` holds keys that were read or assigned during the
+    request. Values are mutable objects handed to the view, so changes are
+    detected at save time by re-serializing the loaded keys rather than by
+    intercepting ``__setitem__`` alone.
+    """
+
+    def __init__(self, store: "SqliteSessionInterface", sid: str,
+                 digests: Optional[Dict[str, bytes]] = None, expires: float = 0.0, new: bool = False):
+        self.store = store
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.expires = expires
+        self._digests: Dict[str, bytes] = digests or {}
+        self._values: Dict[str, Any] = {}
+        self._deleted: Set[str] = set()
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            if key not in self._digests or key in self._deleted:
+                raise KeyError(key)
+            value = self._values[key] = self.store.load_value(self.sid, key)
+            if value is _MISSING:
+                # Removed by a concurrent request since this one opened the session
+                del self._values[key]
+                self._digests.pop(key, None)
+                raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._values[key] = value
+        self._deleted.discard(key)
+        self.modified = True
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._values.pop(key, None)
+        if key in self._digests:
+            self._deleted.add(key)
+        self.modified = True
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._values or (key in self._digests and key not in self._deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._digests:
+            if key not in self._deleted:
+                yield key
+        for key in self._values:
+            if key not in self._digests:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def clear(self) -> None:
+        # Avoid MutableMapping.clear, which would load every value via popitem
+        self._deleted.update(self._digests)
+        self._values.clear()
+        self.modified = True
+
+    def changes(self) -> Dict[str, Optional[Tuple[bytes, bytes]]]:
+        """Return (digest, stored bytes) for keys that differ from the store (None means delete).
+
+        Only the uncompressed encoding is hashed; compression runs for changed keys only.
+        """
+        serializer = self.store.serializer
+        changed: Dict[str, Optional[Tuple[bytes, bytes]]] = {key: None for key in self._deleted}
+        for key, value in self._values.items():
+            fmt, payload = serializer.encode(value)
+            digest = serializer.digest(fmt, payload)
+            if self._digests.get(key) != digest:
+                data = serializer.pack(fmt, payload)
+                SESSION_VALUE_BYTES.observe(len(payload), key=key, form="encoded")
+                SESSION_VALUE_BYTES.observe(len(data), key=key, form="stored")
+                changed[key] = (digest, data)
+        return changed
+
+
+class SqliteSessionInterface(SessionInterface):
+    """Flask session interface backed by :class:`SqliteSession` rows.
+
+    The cookie carries only the session id, signed with the app secret key.
+
+    Args:
+        path: Database file (defaults to ``data/sessions.db``)
+        idle_timeout: Seconds without a request after which a session expires
+        cleanup_interval: Seconds between background expiry sweeps (0 disables the thread)
+        serializer: Value encoding (defaults to msgpack/JSON with compression of large values)
+    """
+
+    session_class = SqliteSession
+
+    def __init__(self, path: Optional[str] = None, idle_timeout: float = 7 * 24 * 3600,
+                 cleanup_interval: float = 600, serializer: Optional[SessionSerializer] = None):
+        self.db = SqliteDatabase(path or data_path("sessions.db"), SCHEMA)
+        self.serializer = serializer or SessionSerializer()
+        self.idle_timeout = idle_timeout
+        # Reads only push the expiry forward once this much of the timeout has passed
+        self.touch_after = idle_timeout / 10
+        self.cleanup_interval = cleanup_interval
+        self._cleanup_started = False
+        self._cleanup_lock = threading.Lock()
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt="jira-hub-session", key_derivation="hmac")
+
+    def open_session(self, app, request) -> SqliteSession:
+        self._ensure_cleanup()
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(want_bytes(cookie)).decode("utf-8")
+            except BadSignature:
+                sid = None
+            if sid:
+                session = self._load(sid)
+                if session is not None:
+                    return session
+        return self.session_class(self, secrets.token_urlsafe(32), new=True)
+
+    def _load(self, sid: str) -> Optional[SqliteSession]:
+        conn = self.db.connect()
+        row = conn.execute("SELECT expires FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        digests = dict(conn.execute("SELECT key, digest FROM session_items WHERE sid = ?", (sid,)))
+        return self.session_class(self, sid, digests, expires=row[0])
+
+    def load_value(self, sid: str, key: str) -> Any:
+        row = self.db.connect().execute(
+            "SELECT value FROM session_items WHERE sid = ? AND key = ?", (sid, key)).fetchone()
+        if row is None:
+            return _MISSING
+        SESSION_READ_BYTES.observe(len(row[0]), key=key)
+        return self.serializer.loads(row[0])
+
+    def key_sizes(self, sid: str) -> List[Dict[str, Any]]:
+        """Stored size and encoding of each key of one session, largest first."""
+        rows = self.db.connect().execute(
+            "SELECT key, length(value), substr(value, 1, 2) FROM session_items "
+            "WHERE sid = ? ORDER BY length(value) DESC", (sid,))
+        return [{"key": key, "bytes": size, "encoding": describe(head)} for key, size, head in rows]
+
+    def save_session(self, app, session: SqliteSession, response) -> None:
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        name = self.get_cookie_name(app)
+
+        if not session:
+            if not session.new:
+                with self.db.transaction() as conn:
+                    conn.execute("DELETE FROM session_items WHERE sid = ?", (session.sid,))
+                    conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        now = time.time()
+        changes = session.changes()
+        touch = session.new or session.expires - now < self.idle_timeout - self.touch_after
+        if changes or touch:
+            with self.db.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO sessions (sid, created, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT(sid) DO UPDATE SET expires = excluded.expires",
+                    (session.sid, now, now + self.idle_timeout))
+                for key, change in changes.items():
+                    if change is None:
+                        conn.execute("DELETE FROM session_items WHERE sid = ? AND key = ?", (session.sid, key))
+                    else:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO session_items (sid, key, digest, value) VALUES (?, ?, ?, ?)",
+                            (session.sid, key) + change)
+            if changes:
+                logger.debug("Session %s...: wrote %d changed key(s)", session.sid[:8], len(changes))
+
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, self._signer(app).sign(want_bytes(session.sid)).decode("utf-8"),
+                expires=self.get_expiration_time(app, session), httponly=self.get_cookie_httponly(app),
+                domain=domain, path=path, secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app))
+
+    def delete_expired(self) -> int:
+        """Remove expired sessions and their keys; returns the number of sessions removed."""
+        removed = 0
+        while True:
+            with self.db.transaction() as conn:
+                sids = [row[0] for row in conn.execute(
+                    "SELECT sid FROM sessions WHERE expires < ? LIMIT ?", (time.time(), EXPIRE_BATCH))]
+                if not sids:
+                    return removed
+                placeholders = ",".join("?" * len(sids))
+                conn.execute(f"DELETE FROM session_items WHERE sid IN ({placeholders})", sids)
+                conn.execute(f"DELETE FROM sessions WHERE sid IN ({placeholders})", sids)
+            removed += len(sids)
+
+    def _cleanup_loop(self) -> None:
+        while True:
+            try:
+                removed = self.delete_expired()
+                if removed:
+                    logger.info("Removed %d expired session(s)", removed)
+            except Exception:
+                logger.exception("Session expiry sweep failed")
+            time.sleep(self.cleanup_interval)
+
+    def _ensure_cleanup(self) -> None:
+        # Started on first request rather than at import, so forked workers each get one
+        if self._cleanup_started or self.cleanup_interval <= 0:
+            return
+        with self._cleanup_lock:
+            if not self._cleanup_started:
+                threading.Thread(target=self._cleanup_loop, name="session-expiry", daemon=True).start()
+                self._cleanup_started = True
@@ -0,0 +1,187 @@
+"""
+Shared Cache Module
+
+Host-wide cache shared by every worker process, kept in a SQLite (WAL)
+database so entries survive restarts and one worker's fetch serves the
+others. Entries have a TTL and an optional tag used for group invalidation
+(e.g. every cached copy of one Jira issue). When the stored size exceeds the
+configured limit, the least recently used entries are evicted.
+
+Values must be msgpack/JSON-representable; they are encoded and compressed
+with the same codec as session values. Values that would need pickle are
+not cached: the database is shared by every worker and pickles are neither
+portable nor safe to load from it.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import logger as logutil
+from metrics import REGISTRY
+from session_serializer import FORMAT_PICKLE, SessionSerializer
+from storage import SqliteDatabase, data_path
+
+logger = logutil.get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    tag TEXT,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entries_tag ON cache_entries (tag);
+CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires);
+CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed);
+"""
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "shared_cache_requests_total", "Shared cache lookups by namespace and result",
+    ("namespace", "result"))
+CACHE_EVICTIONS = REGISTRY.counter(
+    "shared_cache_evictions_total", "Shared cache entries removed by expiry or size limit",
+    ("reason",))
+
+# Recording every read would turn each hit into a write; LRU order only
+# needs to be approximately right
+ACCESS_RESOLUTION = 60.0
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class SharedCache:
+    """TTL + size-bounded key/value cache in a SQLite file shared across processes.
+
+    Args:
+        path: Database file (defaults to ``data/shared_cache.db``)
+        max_bytes: Evict least recently used entries beyond this stored size
+        enabled: When False every lookup misses and nothing is stored
+        evict_interval: Minimum seconds between eviction passes in one process
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024,
+                 enabled: bool = True, evict_interval: float = 30.0):
+        self.db = SqliteDatabase(path or data_path("shared_cache.db"), SCHEMA)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.evict_interval = evict_interval
+        self.serializer = SessionSerializer(compress_min_bytes=512)
+        self._last_evict = 0.0
+        self._evict_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            conn = self.db.connect()
+            row = conn.execute("SELECT value, expires, accessed FROM cache_entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                CACHE_REQUESTS.inc(namespace=_namespace(key), result="miss")
+                return None
+            if now - row[2] > ACCESS_RESOLUTION:
+                conn.execute("UPDATE cache_entries SET accessed = ? WHERE key = ?", (now, key))
+            value = self.serializer.loads(row[0])
+        except Exception:
+            logger.exception("Shared cache read failed for %s", key)
+            CACHE_REQUESTS.inc(namespace=_namespace(key), result="error")
+            return None
+        CACHE_REQUESTS.inc(namespace=_namespace(key), result="hit")
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, tag: Optional[str] = None) -> None:
+        """Store a value for ``ttl`` seconds, optionally under a ``tag`` for group invalidation.
+
+        Values that are not msgpack/JSON-representable are logged and skipped.
+        """
+        if not self.enabled or ttl <= 0:
+            return
+        now = time.time()
+        try:
+            fmt, payload = self.serializer.encode(value)
+            if fmt == FORMAT_PICKLE:
+                logger.warning("Not caching %s: %s value is not msgpack/JSON-representable",
+                               key, type(value).__name__)
+                return
+            data = self.serializer.pack(fmt, payload)
+            self.db.connect().execute(
+                "INSERT OR REPLACE INTO cache_entries (key, tag, expires, accessed, size, value) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (key, tag, now + ttl, now, len(data) + len(key), data))
+        except Exception:
+            logger.exception("Shared cache write failed for %s", key)
+            return
+        self._maybe_evict(now)
+
+    def get_or_load(self, key: str, ttl: float, loader: Callable[[], Any], tag: Optional[str] = None,
+                    cacheable: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+        """Return the cached value or call ``loader`` and cache its result if ``cacheable``."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = loader()
+        if cacheable(value):
+            self.set(key, value, ttl, tag=tag)
+        return value
+
+    def invalidate(self, key: str) -> None:
+        if self.enabled:
+            self.db.connect().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Remove every entry stored under ``tag``; returns the number removed."""
+        if not self.enabled:
+            return 0
+        return self.db.connect().execute("DELETE FROM cache_entries WHERE tag = ?", (tag,)).rowcount
+
+    def evict(self) -> int:
+        """Drop expired entries, then LRU entries until under 90% of ``max_bytes``."""
+        removed = 0
+        with self.db.transaction() as conn:
+            expired = conn.execute("DELETE FROM cache_entries WHERE expires < ?", (time.time(),)).rowcount
+            if expired:
+                CACHE_EVICTIONS.inc(expired, reason="expired")
+            removed += expired
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            if total > self.max_bytes:
+                target = total - int(self.max_bytes * 0.9)
+                freed, keys = 0, []
+                for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY accessed"):
+                    keys.append(key)
+                    freed += size
+                    if freed >= target:
+                        break
+                conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(k,) for k in keys])
+                CACHE_EVICTIONS.inc(len(keys), reason="size")
+                removed += len(keys)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        row = self.db.connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        return {"entries": row[0], "bytes": row[1], "max_bytes": self.max_bytes, "enabled": self.enabled}
+
+    def _maybe_evict(self, now: float) -> None:
+        if now - self._last_evict < self.evict_interval or not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_evict = now
+            removed = self.evict()
+            if removed:
+                logger.debug("Shared cache evicted %d entries", removed)
+        except Exception:
+            logger.exception("Shared cache eviction failed")
+        finally:
+            self._evict_lock.release()
+
+
+CACHE = SharedCache(
+    max_bytes=int(float(os.environ.get("SHARED_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    enabled=os.environ.get("SHARED_CACHE_ENABLED", "1") not in ("0", "false", "False"),
+)
@@ -11,6 +11,14 @@ class AiChat {
         this.messages = [];
         this.loadingMessageId = null;
 
+        // stored chat history is paged in newest-first as the user scrolls up
+        this.historyLoaded = false;
+        this.historyCursor = null;
+        this.historyLoading = false;
+        this.messageContainer.addEventListener('scroll', () => {
+            if (this.messageContainer.scrollTop === 0 && this.historyCursor) this.loadHistory();
+        });
+
         // render mode element (text or markdown)
         this.renderModeElem = document.getElementById('aiRenderMode');
         if (this.renderModeElem) {
@@ -146,6 +154,7 @@ class AiChat {
                         // Clear chat messages
                         this.messageContainer.innerHTML = '';
                         this.messages = [];
+                        this.historyCursor = null;
                         
                         // Clear the API key input field in the modal
                         const keyInput = document.getElementById('aiKeyInput');
@@ -235,6 +244,7 @@ class AiChat {
     openSidebar() {
         this.sidebar.classList.add('open');
         this.input.focus();
+        if (!this.historyLoaded) this.loadHistory();
         this.sendUIEvent({ category: 'ui', event: 'ai_chat_open' });
     }
 
@@ -300,6 +310,34 @@ class AiChat {
         }
     }
 
+    async loadHistory() {
+        if (this.historyLoading) return;
+        this.historyLoading = true;
+        try {
+            const params = new URLSearchParams({ limit: 20 });
+            if (this.historyCursor) params.set('before', this.historyCursor);
+            const res = await fetch(`/api/ai/history?${params}`, { headers: { 'Cache-Control': 'no-cache' } });
+            const data = await res.json().catch(() => ({}));
+            if (!res.ok || !data.history) return;
+            // entries arrive newest first; prepend keeps the oldest at the top
+            const previousHeight = this.messageContainer.scrollHeight;
+            const firstPage = !this.historyLoaded;
+            data.history.forEach(entry => {
+                this.addMessage(entry.response, 'ai', true);
+                this.addMessage(entry.prompt, 'user', true);
+            });
+            this.historyLoaded = true;
+            this.historyCursor = data.next_before;
+            this.messageContainer.scrollTop = firstPage
+                ? this.messageContainer.scrollHeight
+                : this.messageContainer.scrollHeight - previousHeight;
+        } catch (e) {
+            console.debug('Loading AI chat history failed', e);
+        } finally {
+            this.historyLoading = false;
+        }
+    }
+
     addLoadingMessage() {
         const messageDiv = document.createElement('div');
         messageDiv.className = `chat-message ai-message loading`;
@@ -340,7 +378,7 @@ class AiChat {
         this.messageContainer.scrollTop = this.messageContainer.scrollHeight;
     }
 
-    addMessage(text, type) {
+    addMessage(text, type, prepend = false) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `chat-message ${type}-message`;
 
@@ -357,6 +395,11 @@ class AiChat {
             this._attachAiActions(messageDiv, text);
         }
 
+        if (prepend) {
+            this.messageContainer.insertBefore(messageDiv, this.messageContainer.firstChild);
+            this.messages.unshift({ type, text, dom: messageDiv });
+            return;
+        }
         this.messageContainer.appendChild(messageDiv);
         this.messageContainer.scrollTop = this.messageContainer.scrollHeight;
         this.messages.push({ type, text, dom: messageDiv });
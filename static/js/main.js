@@ -432,6 +432,9 @@ document.addEventListener('DOMContentLoaded', function () {
       }
     }
 
+    // Images in Jira content are placeholders until they scroll into view
+    loadLazyImages(selInfo);
+
     attachCollapseHandlers();
     attachViewHandler();
     attachDeselectHandler();
@@ -2092,8 +2095,35 @@ document.addEventListener('DOMContentLoaded', function () {
   
   // Convert UTC timestamps to user's local timezone
   convertTimestampsToLocalTime();
+  loadLazyImages(document);
 });
 
+// Load images of sanitized Jira content (rendered with data-src by the server)
+// once they become visible, so long descriptions do not fetch every attachment up front
+function loadLazyImages(root) {
+  const images = (root || document).querySelectorAll('img.lazy-image[data-src]');
+  if (!images.length) return;
+
+  const load = img => {
+    img.src = img.getAttribute('data-src');
+    img.removeAttribute('data-src');
+  };
+
+  if (!('IntersectionObserver' in window)) {
+    images.forEach(load);
+    return;
+  }
+  const observer = new IntersectionObserver((entries, obs) => {
+    entries.forEach(entry => {
+      if (entry.isIntersecting) {
+        load(entry.target);
+        obs.unobserve(entry.target);
+      }
+    });
+  }, { rootMargin: '200px' });
+  images.forEach(img => observer.observe(img));
+}
+
 // Function to convert UTC timestamps to user's local timezone
 function convertTimestampsToLocalTime() {
   const timestampElements = document.querySelectorAll('.utc-timestamp[data-timestamp]');
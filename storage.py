@@ -0,0 +1,90 @@
+"""
+Local Storage Module
+
+Single place that decides where the hub keeps its on-disk state (bulk update
+journals, SQLite databases and similar small files), mirroring how
+``logger.py`` owns ``logs/``.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# Ensure data directory; JIRA_HUB_DATA_DIR lets deployments move it off the code volume
+DATA_DIR = os.environ.get("JIRA_HUB_DATA_DIR") or os.path.join(os.path.dirname(__file__), "data")
+os.makedirs(DATA_DIR, exist_ok=True)
+
+
+def data_path(*parts: str) -> str:
+    """Return a path inside DATA_DIR, creating its parent directory on demand."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+class SqliteDatabase:
+    """A SQLite database file in WAL mode with one connection per thread.
+
+    WAL lets readers proceed while a writer commits, which suits Flask's
+    threaded workers and several gunicorn processes sharing one file.
+    Connections run in autocommit mode; use :meth:`transaction` to group writes.
+
+    Args:
+        path: Database file path (usually from ``data_path``)
+        schema: SQL script run once per process to create tables and indexes
+        migrate: Optional ``migrate(conn)`` run once per process, inside a
+            write transaction and before ``schema``, for changes that
+            ``CREATE ... IF NOT EXISTS`` cannot express (e.g. new columns)
+    """
+
+    def __init__(self, path: str, schema: str = "",
+                 migrate: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.path = path
+        self.schema = schema
+        self.migrate = migrate
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it (and the schema) on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            if not self._initialized:
+                with self._init_lock:
+                    if not self._initialized:
+                        if self.migrate:
+                            self._run_migration(conn)
+                        if self.schema:
+                            conn.executescript(self.schema)
+                        self._initialized = True
+        return conn
+
+    def _run_migration(self, conn: sqlite3.Connection) -> None:
+        # BEGIN IMMEDIATE serializes processes migrating the same file at start-up
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.migrate(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block of writes atomically (``BEGIN IMMEDIATE`` ... ``COMMIT``)."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
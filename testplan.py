@@ -0,0 +1,257 @@
+"""
+Test Plan Module
+
+Section model of the Test Plan custom field. The text is parsed once into
+sections indexed by heading ("Test Scenarios", "Approved By", ...), so a
+section is found with a dict lookup and an update rewrites only that
+section's lines; every other line is serialized back verbatim.
+Rich text (ADF) fields are edited as markup and converted back on write.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from adf import adf_to_markup, escape_markup, text_to_adf
+
+SCENARIOS_HEADING = "Test Scenarios"
+APPROVED_BY_HEADING = "Approved By"
+
+# Skeleton used when a ticket has no Test Plan yet
+DEFAULT_TEMPLATE = (
+    "Testing Environment URL: \n\n"
+    "Permissions: \n\n"
+    "Prerequisites: \n\n"
+    "Testing Tools: \n\n"
+    "Navigation: \n\n"
+    "Test Data: \n\n"
+    "Test Scenarios: \n\n"
+    "Approved By: \n\n\n"
+)
+
+# "Label:" at the start of a line, optionally decorated as **bold** or a
+# markdown heading; the label is at most six words and starts uppercase
+HEADER_LINE = re.compile(
+    r"^\s*(?:#{1,6}\s+)?(?:\*\*)?\s*(?P<label>[A-Z][^:*\n]{0,60}?)\s*:(?:\*\*)?(?P<rest>.*)$")
+LIST_MARKER = re.compile(r"^(?:\d+\.|-|•|\*)\s*")
+NUMBERED_ITEM = re.compile(r"^\s*(?P<number>\d+)\.\s+(?P<text>.*\S)\s*$")
+NUMBERED_PREFIX = re.compile(r"^\s*\d+\.")
+
+MAX_LABEL_WORDS = 6
+
+
+def section_key(heading: str) -> str:
+    """Normalized lookup key for a heading (case and spacing insensitive)."""
+    return " ".join(heading.split()).lower()
+
+
+def clean_scenario(scenario: str) -> str:
+    """Strip an existing list marker (``1.``, ``-``, ``•``, ``*``) from a scenario."""
+    return LIST_MARKER.sub("", scenario.strip(), count=1)
+
+
+def _heading_of(line: str) -> Optional[str]:
+    match = HEADER_LINE.match(line)
+    if not match:
+        return None
+    stripped = line.lstrip()
+    if not stripped.startswith("**") and LIST_MARKER.match(stripped):
+        # "1. Verify: ..." is a scenario, not a heading
+        return None
+    label = match.group("label")
+    if len(label.split()) > MAX_LABEL_WORDS:
+        return None
+    return label
+
+
+def _scenario_list_end(body: List[str]) -> int:
+    """Index of the first body line after the scenario list (see ``set_scenarios``)."""
+    for index, line in enumerate(body):
+        stripped = line.strip()
+        if stripped and ":" in stripped and not NUMBERED_PREFIX.match(stripped):
+            return index
+    return len(body)
+
+
+@dataclass
+class Scenario:
+    """One numbered line of the Test Scenarios section."""
+
+    number: int
+    text: str
+
+
+@dataclass
+class Section:
+    """A heading line and the lines up to the next heading."""
+
+    heading: str
+    header_line: str
+    body: List[str] = field(default_factory=list)
+
+    def lines(self) -> List[str]:
+        return [self.header_line] + self.body
+
+
+class TestPlan:
+    """Parsed Test Plan: lines before the first heading plus ordered, indexed sections.
+
+    Args:
+        preamble: Lines before the first section heading
+        sections: Sections in document order
+    """
+
+    def __init__(self, preamble: Optional[List[str]] = None, sections: Optional[List[Section]] = None):
+        self.preamble = preamble or []
+        self.sections = sections or []
+        self._index: Dict[str, int] = {}
+        self._reindex()
+
+    @classmethod
+    def parse(cls, text: Optional[str]) -> "TestPlan":
+        """Split Test Plan text into sections; ``parse(t).serialize() == t``."""
+        preamble: List[str] = []
+        sections: List[Section] = []
+        body = preamble
+        for line in (text or "").split("\n"):
+            heading = _heading_of(line) if line and ":" in line else None
+            if heading is not None:
+                section = Section(heading, line)
+                sections.append(section)
+                body = section.body
+            else:
+                body.append(line)
+        return cls(preamble, sections)
+
+    @classmethod
+    def template(cls) -> "TestPlan":
+        return cls.parse(DEFAULT_TEMPLATE)
+
+    def _reindex(self) -> None:
+        self._index = {}
+        for position, section in enumerate(self.sections):
+            # The first section with a given heading wins, as in the editor
+            self._index.setdefault(section_key(section.heading), position)
+
+    def section(self, heading: str) -> Optional[Section]:
+        """Return the section with ``heading``, or None."""
+        position = self._index.get(section_key(heading))
+        return None if position is None else self.sections[position]
+
+    def __contains__(self, heading: str) -> bool:
+        return section_key(heading) in self._index
+
+    def headings(self) -> List[str]:
+        return [section.heading for section in self.sections]
+
+    @property
+    def scenarios(self) -> List[Scenario]:
+        """Numbered items of the Test Scenarios section."""
+        section = self.section(SCENARIOS_HEADING)
+        if section is None:
+            return []
+        items = []
+        for line in section.body:
+            match = NUMBERED_ITEM.match(line)
+            if match:
+                items.append(Scenario(int(match.group("number")), match.group("text")))
+        return items
+
+    def insert_section(self, section: Section, before: Optional[str] = None) -> None:
+        """Add ``section`` before the section named ``before`` (or at the end)."""
+        position = self._index.get(section_key(before)) if before else None
+        if position is None:
+            self.sections.append(section)
+        else:
+            self.sections.insert(position, section)
+        self._reindex()
+
+    def set_scenarios(self, scenarios: Iterable[str]) -> bool:
+        """
+        Replace the scenario list at the top of the Test Scenarios section.
+
+        The list runs up to the first non-empty line that contains ':' and is
+        not numbered; that line and everything after it in the section (links,
+        "Label: value" notes, "- Check: ok" bullets) are kept. The section is
+        created before "Approved By" when missing (or appended together with
+        an "Approved By" section when that is missing too).
+
+        Args:
+            scenarios: Scenario texts; existing list markers are stripped
+
+        Returns:
+            True when the section changed
+        """
+        body = [""] + [f"{number}. {clean_scenario(text)}" for number, text in enumerate(scenarios, 1)] + [""]
+        section = self.section(SCENARIOS_HEADING)
+        if section is not None:
+            body += section.body[_scenario_list_end(section.body):]
+            changed = section.body != body
+            section.body = body
+            return changed
+        section = Section(SCENARIOS_HEADING, f"{SCENARIOS_HEADING}: ", body)
+        if APPROVED_BY_HEADING in self:
+            self.insert_section(section, before=APPROVED_BY_HEADING)
+        else:
+            self.insert_section(section)
+            self.insert_section(Section(APPROVED_BY_HEADING, f"{APPROVED_BY_HEADING}: ", ["", ""]))
+        return True
+
+    def changed_sections(self, other: "TestPlan") -> List[str]:
+        """Headings whose lines differ between this plan and ``other`` (added or removed included)."""
+        changed = []
+        if self.preamble != other.preamble:
+            changed.append("")
+        for section in self.sections:
+            theirs = other.section(section.heading)
+            if theirs is None or theirs.lines() != section.lines():
+                changed.append(section.heading)
+        changed.extend(s.heading for s in other.sections if s.heading not in self)
+        return changed
+
+    def serialize(self) -> str:
+        lines = list(self.preamble)
+        for section in self.sections:
+            lines.append(section.header_line)
+            lines.extend(section.body)
+        return "\n".join(lines)
+
+
+def update_scenarios(current_content: Optional[str], test_scenarios: List[str]) -> str:
+    """
+    Write ``test_scenarios`` into the Test Scenarios section of a Test Plan.
+
+    Args:
+        current_content: Current Test Plan text (the default template is used when empty)
+        test_scenarios: Scenario texts
+
+    Returns:
+        Updated Test Plan text
+    """
+    plan = TestPlan.parse(current_content) if current_content else TestPlan.template()
+    plan.set_scenarios(test_scenarios)
+    return plan.serialize()
+
+
+def update_test_plan_field(current_value: Any, test_scenarios: List[str]) -> Tuple[str, str, Any]:
+    """
+    Write ``test_scenarios`` into a raw Test Plan field value.
+
+    Follows the preview/confirm endpoints: an ADF plan is edited as markup,
+    with the scenarios escaped so text like "2*3*4" stays literal, and
+    written back as ADF; a plain text plan stays plain text.
+
+    Args:
+        current_value: Test Plan field as returned by Jira (ADF dict, string or None)
+        test_scenarios: Scenario texts
+
+    Returns:
+        Tuple of (current text, updated text, field value to write)
+    """
+    if isinstance(current_value, dict):
+        current_text = adf_to_markup(current_value)
+        updated_text = update_scenarios(current_text, [escape_markup(clean_scenario(s)) for s in test_scenarios])
+        return current_text, updated_text, text_to_adf(updated_text)
+    current_text = current_value or ""
+    updated_text = update_scenarios(current_text, test_scenarios)
+    return current_text, updated_text, updated_text
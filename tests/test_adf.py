@@ -0,0 +1,50 @@
+import pytest
+
+from adf import adf_to_markup, escape_markup, text_to_adf
+
+
+def text(value, *marks):
+    node = {"type": "text", "text": value}
+    if marks:
+        node["marks"] = [{"type": mark} for mark in marks]
+    return node
+
+
+def paragraph(*nodes):
+    return {"type": "doc", "version": 1, "content": [{"type": "paragraph", "content": list(nodes)}]}
+
+
+@pytest.mark.parametrize("doc", [
+    paragraph(text("user"), text("id", "em"), text("x")),
+    paragraph(text("x", "strong", "em")),
+    paragraph(text("a", "strong"), text("b", "em")),
+    paragraph(text("a", "em"), text("b", "strong")),
+    paragraph(text("a ", "strong"), text("b", "strong", "em"), text(" c", "strong")),
+    paragraph(text("a*b", "em")),
+    paragraph(text("a*b", "code")),
+    paragraph(text("x", "em", "code")),
+    paragraph(text("x", "strong", "em", "strike")),
+    paragraph(text("snake_case_name and _x_")),
+    paragraph(text("2*3*4 [not a link]")),
+], ids=lambda doc: adf_to_markup(doc))
+def test_marks_round_trip(doc):
+    assert text_to_adf(adf_to_markup(doc)) == doc
+
+
+def test_em_is_written_with_asterisks():
+    assert adf_to_markup(paragraph(text("user"), text("id", "em"), text("x"))) == "user*id*x"
+
+
+def test_underscore_emphasis_is_still_read():
+    assert text_to_adf("an _em_ word") == paragraph(text("an "), text("em", "em"), text(" word"))
+
+
+def test_escaped_scenario_text_stays_literal():
+    doc = text_to_adf("1. " + escape_markup("Multiply 2*3*4 and check **total**"))
+    item = doc["content"][0]["content"][0]["content"][0]
+    assert item["content"] == [text("Multiply 2*3*4 and check **total**")]
+
+
+def test_lists_and_headings_round_trip():
+    markup = "# Plan\n\n1. First *step*\n2. Second\n  - nested **bold**\n\n---"
+    assert adf_to_markup(text_to_adf(markup)) == markup
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from ai.admission import AdmissionController, AdmissionRejected
+
+
+def hold_slot(controller, user, release, started):
+    with controller.admit(user):
+        started.set()
+        release.wait(5)
+
+
+def start_holder(controller, user, release):
+    started = threading.Event()
+    thread = threading.Thread(target=hold_slot, args=(controller, user, release, started), daemon=True)
+    thread.start()
+    assert started.wait(5)
+    return thread
+
+
+def wait_for_queued(controller, count):
+    deadline = time.monotonic() + 5
+    while controller.stats()['queued'] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_freed_slots_go_to_users_round_robin():
+    controller = AdmissionController(max_concurrency=1, per_user_concurrency=1, per_user_rate=0, max_queued=4)
+    release = threading.Event()
+    holder = start_holder(controller, 'holder', release)
+
+    order, lock = [], threading.Lock()
+
+    def request(user):
+        with controller.admit(user, max_wait=5):
+            with lock:
+                order.append(user)
+
+    # "busy" queues three requests before "quiet" queues its only one
+    threads = []
+    for n, user in enumerate(['busy', 'busy', 'busy', 'quiet']):
+        threads.append(threading.Thread(target=request, args=(user,), daemon=True))
+        threads[-1].start()
+        wait_for_queued(controller, n + 1)
+
+    release.set()
+    for thread in threads + [holder]:
+        thread.join(5)
+    assert order == ['busy', 'quiet', 'busy', 'busy']
+
+
+def test_max_wait_zero_rejects_instead_of_queueing():
+    controller = AdmissionController(max_concurrency=1, per_user_rate=0)
+    release = threading.Event()
+    holder = start_holder(controller, 'holder', release)
+
+    with pytest.raises(AdmissionRejected) as info:
+        with controller.admit('other', max_wait=0):
+            pass
+    assert info.value.reason == 'busy'
+    assert controller.stats()['queued'] == 0
+
+    release.set()
+    holder.join(5)
+    with controller.admit('other', max_wait=0):
+        pass
+
+
+def test_shed_request_does_not_use_up_rate_limit():
+    controller = AdmissionController(max_concurrency=1, per_user_rate=0.001, per_user_burst=1)
+    release = threading.Event()
+    holder = start_holder(controller, 'holder', release)
+
+    with pytest.raises(AdmissionRejected) as info:
+        with controller.admit('alice', max_wait=0):
+            pass
+    assert info.value.reason == 'busy'
+
+    release.set()
+    holder.join(5)
+    # The refunded token still admits alice's next request
+    with controller.admit('alice', max_wait=0):
+        pass
+    with pytest.raises(AdmissionRejected) as info:
+        with controller.admit('alice', max_wait=0):
+            pass
+    assert info.value.reason == 'rate_limited'
@@ -0,0 +1,103 @@
+import os
+import time
+
+import pytest
+
+import storage
+from adf import text_to_adf
+from bulk_update import TEST_PLAN_FIELD, BulkJournal, BulkTestPlanUpdater, prune_journals
+from testplan import update_test_plan_field
+
+
+class FakeJira:
+    """Stands in for JiraClient; ``edits`` simulates someone changing a ticket mid-job."""
+
+    def __init__(self, fields, edits=()):
+        self.fields = fields
+        self.edits = set(edits)
+        self.updates = {}
+
+    def get_issue(self, key, expand="", cached=True):
+        return {"key": key, "fields": {TEST_PLAN_FIELD: self.fields.get(key), "updated": "2026-01-01T10:00:00.000+0000"}}
+
+    def update_issue(self, key, expected_updated=None, **fields):
+        assert expected_updated == "2026-01-01T10:00:00.000+0000"
+        if key in self.edits:
+            return {"error": f"Issue {key} was modified in Jira after it was loaded.", "conflict": True}
+        self.updates[key] = fields[TEST_PLAN_FIELD]
+        return {"success": True}
+
+
+def append(current, scenarios):
+    text = current + "\n" + "\n".join(scenarios)
+    return current, text, text
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def run(client, journal, items, build_update=append):
+    return BulkTestPlanUpdater(client, build_update, journal, rate_per_sec=1000).run(items)
+
+
+def test_conflict_is_journaled_and_retried_on_resubmit():
+    client = FakeJira({"A-1": "plan", "A-2": "plan"}, edits={"A-2"})
+    journal = BulkJournal("job1", "https://jira.example", "ann@example.com")
+
+    results = run(client, journal, {"A-1": ["one"], "A-2": ["two"]})
+    assert [r["status"] for r in results] == ["updated", "conflict"]
+    assert journal.status()["summary"] == {"updated": 1, "conflict": 1}
+
+    client.edits.clear()
+    results = run(client, journal, {"A-1": ["one"], "A-2": ["two"]})
+    assert [r["status"] for r in results] == ["skipped", "updated"]
+    assert client.updates["A-2"] == "plan\ntwo"
+    assert journal.status()["finished"]
+
+
+def test_journal_is_scoped_to_site_and_user():
+    run(FakeJira({"A-1": "plan"}), BulkJournal("job1", "https://jira.example", "ann@example.com"), {"A-1": ["one"]})
+
+    assert BulkJournal("job1", "https://evil.example", "ann@example.com").status() is None
+    assert BulkJournal("job1", "https://jira.example", "bob@example.com").status() is None
+
+
+def test_prune_removes_only_old_journals():
+    old = BulkJournal("old", "https://jira.example", "ann@example.com")
+    new = BulkJournal("new", "https://jira.example", "ann@example.com")
+    for journal in (old, new):
+        journal.record({"event": "started", "total": 0})
+    stale = time.time() - 10 * 86400
+    os.utime(old.path, (stale, stale))
+
+    assert prune_journals(7) == 1
+    assert old.status() is None
+    assert new.status() is not None
+
+
+def test_adf_test_plan_keeps_its_structure():
+    plan = text_to_adf("Permissions: admin\n\nTest Scenarios:\n1. Old one\n\nApproved By: ")
+    client = FakeJira({"A-1": plan})
+
+    results = run(client, BulkJournal("job1", "site", "ann"), {"A-1": ["Verify 2*3*4 and _x_", "Second"]},
+                  build_update=update_test_plan_field)
+
+    assert results[0]["status"] == "updated"
+    written = client.updates["A-1"]
+    assert written["type"] == "doc"
+    scenarios = next(node for node in written["content"] if node["type"] == "orderedList")
+    texts = [item["content"][0]["content"] for item in scenarios["content"]]
+    # Markup characters in scenarios stay literal text, not emphasis marks
+    assert texts == [[{"type": "text", "text": "Verify 2*3*4 and _x_"}], [{"type": "text", "text": "Second"}]]
+    assert written["content"][0]["content"][0]["text"] == "Permissions: admin"
+
+
+def test_unchanged_adf_plan_is_not_rewritten():
+    plan = text_to_adf("Test Scenarios:\n1. Same")
+    client = FakeJira({"A-1": plan})
+    results = run(client, BulkJournal("job1", "site", "ann"), {"A-1": ["Same"]}, build_update=update_test_plan_field)
+    assert results[0]["status"] == "unchanged"
+    assert client.updates == {}
@@ -0,0 +1,55 @@
+import sqlite3
+
+from chat_history import ChatHistoryStore
+
+
+def store_at(path, **kwargs):
+    return ChatHistoryStore(str(path), compact_interval=0, **kwargs)
+
+
+def test_history_is_scoped_to_site_and_user(tmp_path):
+    store = store_at(tmp_path / 'history.db')
+    store.append('https://jira.example', 'acc-1', 'hi', 'hello')
+
+    assert store.page('https://evil.example', 'acc-1')[0] == []
+    assert store.clear('https://evil.example', 'acc-1') == 0
+    entries, _ = store.page('https://jira.example', 'acc-1')
+    assert [e['prompt'] for e in entries] == ['hi']
+
+
+def test_pages_newest_first_with_cursor(tmp_path):
+    store = store_at(tmp_path / 'history.db')
+    for i in range(5):
+        store.append('site', 'me', f'q{i}', f'a{i}')
+
+    first, cursor = store.page('site', 'me', limit=2)
+    second, _ = store.page('site', 'me', before=cursor, limit=2)
+    assert [e['prompt'] for e in first + second] == ['q4', 'q3', 'q2', 'q1']
+
+
+def test_compaction_caps_each_user(tmp_path):
+    store = store_at(tmp_path / 'history.db', max_entries=2)
+    for i in range(4):
+        store.append('site', 'me', f'q{i}', 'a')
+    store.append('other-site', 'me', 'kept', 'a')
+
+    assert store.compact() == 2
+    assert [e['prompt'] for e in store.page('site', 'me')[0]] == ['q3', 'q2']
+    assert len(store.page('other-site', 'me')[0]) == 1
+
+
+def test_database_without_site_column_is_migrated(tmp_path):
+    path = tmp_path / 'history.db'
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE ai_chat_history (id INTEGER PRIMARY KEY AUTOINCREMENT, owner TEXT NOT NULL,
+                                      ts REAL NOT NULL, prompt TEXT NOT NULL, response TEXT NOT NULL);
+        CREATE INDEX ai_chat_history_owner ON ai_chat_history (owner, id);
+        INSERT INTO ai_chat_history (owner, ts, prompt, response) VALUES ('me', 1, 'old', 'a');
+    """)
+    conn.close()
+
+    store = store_at(path)
+    store.append('site', 'me', 'new', 'a')
+    # Unscoped legacy rows are not handed to whoever claims the owner on some site
+    assert [e['prompt'] for e in store.page('site', 'me')[0]] == ['new']
@@ -0,0 +1,32 @@
+from ai.chunking import CHARS_PER_TOKEN, chunk_text, estimate_tokens, map_reduce_text
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text('short', 10) == ['short']
+
+
+def test_paragraphs_are_packed_up_to_the_budget():
+    text = '\n\n'.join(['a' * 10, 'b' * 10, 'c' * 10])
+    assert chunk_text(text, 6) == ['a' * 10 + '\n\n' + 'b' * 10, 'c' * 10]
+
+
+def test_too_long_paragraph_is_split_on_lines():
+    paragraph = '\n'.join(f'line {i:02d}' for i in range(10))
+    chunks = chunk_text(paragraph, 6)
+    assert all(len(c) <= 6 * CHARS_PER_TOKEN for c in chunks)
+    # Lines of one paragraph rejoin with a single newline, not a blank line
+    assert '\n'.join(chunks) == paragraph
+
+
+def test_too_long_line_is_cut_mid_line():
+    line = 'x' * 50
+    chunks = chunk_text(line, 4)
+    assert [len(c) for c in chunks] == [16, 16, 16, 2]
+    assert ''.join(chunks) == line
+
+
+def test_map_reduce_keeps_chunk_order():
+    text = '\n\n'.join(str(i) * 40 for i in range(4))
+    result = map_reduce_text(text, lambda chunk, index, total: f'{index}/{total}', budget_tokens=5, chunk_tokens=10)
+    assert result == '1/4\n\n2/4\n\n3/4\n\n4/4'
+    assert estimate_tokens(result) <= 10
@@ -0,0 +1,24 @@
+from ai import create_chat
+from ai.fake_ai import UNAVAILABLE, FakeAIChat
+
+
+def test_injected_error_rate_matches_configuration(monkeypatch):
+    monkeypatch.setenv('AI_FAKE_ERROR_RATE', '0.2')
+    monkeypatch.setenv('AI_FAKE_ERRORS', '503')
+    monkeypatch.setenv('AI_FAKE_SEED', '7')
+    calls = 2000
+    # A new client per call, as the app creates one per request
+    failures = sum(create_chat('key', 'fake').send_message(f'story {i}') == UNAVAILABLE for i in range(calls))
+    assert 0.15 < failures / calls < 0.25
+
+
+def test_no_errors_injected_by_default():
+    chat = FakeAIChat('key', error_rate=0)
+    assert all(chat.send_message('story') != UNAVAILABLE for _ in range(50))
+
+
+def test_response_is_deterministic_per_prompt():
+    first = FakeAIChat('key', seed=3).send_message('Login with valid credentials')
+    second = FakeAIChat('key', seed=3).send_message('Login with valid credentials')
+    assert first == second
+    assert first.startswith('1. Verify that')
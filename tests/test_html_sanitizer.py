@@ -0,0 +1,67 @@
+import pytest
+
+from html_sanitizer import TRUNCATED_NOTICE, safe_url, sanitize_html
+
+BASE = 'https://jira.example'
+
+
+@pytest.mark.parametrize('url', ['javascript:alert(1)', ' JaVaScRiPt:alert(1)', 'java\tscript:alert(1)',
+                                 'vbscript:x', 'data:text/html,<script>x</script>'])
+def test_unsafe_schemes_are_dropped(url):
+    assert safe_url(url) is None
+    assert safe_url(url, BASE) is None
+    assert sanitize_html(f'<a href="{url}">x</a>', BASE) == '<a>x</a>'
+
+
+def test_entity_encoded_scheme_is_not_executable():
+    assert sanitize_html('<a href="&#106;avascript:alert(1)">x</a>') == '<a>x</a>'
+
+
+def test_protocol_relative_urls_take_the_site_scheme():
+    assert safe_url('//cdn.example/a.png', BASE) == 'https://cdn.example/a.png'
+    # Without a site to resolve against the scheme is unknown
+    assert safe_url('//cdn.example/a.png') is None
+
+
+def test_relative_links_resolve_against_the_site_and_open_in_new_tab():
+    assert sanitize_html('<a href="/browse/ABC-1" onclick="x()">ABC-1</a>', BASE) == (
+        '<a href="https://jira.example/browse/ABC-1" target="_blank" rel="noopener noreferrer">ABC-1</a>')
+    assert sanitize_html('<a href="#top">up</a>', BASE) == '<a href="#top">up</a>'
+
+
+def test_dangerous_tags_are_dropped_with_their_content():
+    html = '<p>a<script>evil()</script>b</p><style>p{}</style><iframe src="x">in</iframe><form>f</form>'
+    assert sanitize_html(html) == '<p>ab</p>'
+
+
+def test_unknown_tags_keep_their_text():
+    assert sanitize_html('<custom onmouseover="x()">text</custom>') == 'text'
+
+
+def test_images_become_lazy_placeholders():
+    assert sanitize_html('<img src="/x.png" onerror="evil()" width="10px" alt="x">', BASE) == (
+        '<img data-src="https://jira.example/x.png" class="lazy-image" loading="lazy" alt="x">')
+
+
+def test_unbalanced_markup_is_closed():
+    assert sanitize_html('<ul><li>a<li>b</ul>') == '<ul><li>a</li><li>b</li></ul>'
+    assert sanitize_html('<p><strong>open') == '<p><strong>open</strong></p>'
+
+
+def test_whitespace_collapses_outside_pre():
+    assert sanitize_html('<p>a \n\n  b</p><pre>x\n  y</pre>') == '<p>a b</p><pre>x\n  y</pre>'
+
+
+def test_truncation_does_not_split_an_entity():
+    result = sanitize_html('<p>' + 'abc &amp; ' * 5 + '</p>', max_bytes=30)
+    assert result == '<p>abc &amp; abc &amp; abc </p>' + TRUNCATED_NOTICE
+
+
+def test_truncation_does_not_split_a_character():
+    assert sanitize_html('<p>héllo wörld</p>', max_bytes=12) == '<p>héllo w</p>' + TRUNCATED_NOTICE
+
+
+def test_no_text_is_added_after_a_cut():
+    result = sanitize_html('<p>' + 'x' * 20 + '</p><p>later</p>', max_bytes=15)
+    assert 'later' not in result
+    assert result.endswith(TRUNCATED_NOTICE)
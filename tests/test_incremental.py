@@ -0,0 +1,48 @@
+from ai.incremental import (build_incremental_prompt, criteria_lines, diff_criteria, merge_scenarios,
+                            split_removals)
+
+OLD = """1. User can log in with email
+2. User can reset the password
+3. Session expires after 30 minutes"""
+
+
+def test_criteria_lines_ignore_markers_and_spacing():
+    assert criteria_lines("* Log  in\n\n2) Log out ") == ['Log in', 'Log out']
+
+
+def test_diff_ignores_renumbering():
+    renumbered = "- User can log in with email\n- User can reset the password\n- Session expires after 30 minutes"
+    diff = diff_criteria(OLD, renumbered)
+    assert diff.added == [] and diff.removed == []
+    assert diff.change_ratio == 0.0
+
+
+def test_diff_reports_rewritten_lines():
+    new = OLD.replace('30 minutes', '15 minutes') + '\n4. User can log in with SSO'
+    diff = diff_criteria(OLD, new)
+    assert diff.removed == ['Session expires after 30 minutes']
+    assert diff.added == ['Session expires after 15 minutes', 'User can log in with SSO']
+    assert diff.unchanged == 2
+    assert diff.change_ratio == 0.5
+
+
+def test_prompt_lists_only_changed_lines():
+    diff = diff_criteria(OLD, OLD.replace('30 minutes', '15 minutes'))
+    prompt = build_incremental_prompt('Write tests.', ['Verify login'], diff)
+    assert '1. Verify login' in prompt
+    assert '- Session expires after 15 minutes' in prompt
+    assert 'reset the password' not in prompt
+
+
+def test_regeneration_merges_removals_and_new_scenarios():
+    existing = ['Verify login', 'Verify reset', 'Verify 30 minute expiry']
+    removed, rest = split_removals('REMOVE: 3, 7\n1. Verify 15 minute expiry\n2. Verify login', len(existing))
+    assert removed == {2}
+    new = [line.split('. ', 1)[1] for line in rest.splitlines()]
+    assert merge_scenarios(existing, removed, new) == ['Verify login', 'Verify reset', 'Verify 15 minute expiry']
+
+
+def test_remove_none_keeps_everything():
+    removed, rest = split_removals('REMOVE: none\n1. New one', 2)
+    assert removed == set()
+    assert rest == '1. New one'
@@ -0,0 +1,142 @@
+import gzip
+import json
+import logging
+import multiprocessing
+import queue
+
+import logger as logutil
+from logger import DroppingQueueHandler
+
+
+def make_record(msg, *args, level=logging.INFO, exc_info=None):
+    return logging.LogRecord('test', level, __file__, 1, msg, args, exc_info)
+
+
+def test_full_queue_drops_and_reports_the_gap():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record('record %d', i))
+    assert handler.dropped() == {'INFO': 3}
+
+    handler.queue.get_nowait()
+    handler.queue.get_nowait()
+    handler.handle(make_record('after'))
+    notice, record = handler.queue.get_nowait(), handler.queue.get_nowait()
+    assert notice.getMessage() == 'Log queue full: dropped 3 record(s)'
+    assert record.getMessage() == 'after'
+
+
+def test_records_are_prepared_in_the_logging_thread():
+    handler = DroppingQueueHandler(queue.Queue())
+    payload = {'state': 'before'}
+    logutil.start_context(request_id='req-1')
+    try:
+        try:
+            raise ValueError('boom')
+        except ValueError as e:
+            handler.handle(make_record('payload %s', payload, exc_info=(type(e), e, e.__traceback__)))
+    finally:
+        logutil.clear_context()
+    payload['state'] = 'after'
+
+    record = handler.queue.get_nowait()
+    assert record.getMessage() == "payload {'state': 'before'}"
+    assert record.exc_info is None and 'ValueError: boom' in record.exc_text
+    assert record.context == {'request_id': 'req-1'}
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def plain_logger(name, level=logging.INFO):
+    log = logging.getLogger(name)
+    log.handlers[:] = [ListHandler()]
+    log.setLevel(level)
+    log.propagate = False
+    return log, log.handlers[0].messages
+
+
+def test_lazy_values_are_not_computed_for_disabled_levels():
+    log, messages = plain_logger('test.lazy')
+    calls = []
+    log.debug('value %s', logutil.lazy(lambda: calls.append(1) or 'x'))
+    assert calls == []
+    log.info('value %s', logutil.lazy(lambda: calls.append(1) or 'x'))
+    assert calls == [1] and messages == ['value x']
+
+
+def test_truncated_and_object_state():
+    class Response:
+        def __init__(self):
+            self.text = 'y' * 50
+
+    assert str(logutil.truncated('x' * 10, limit=4)) == 'xxxx...'
+    assert str(logutil.truncated('short', limit=10)) == 'short'
+    assert str(logutil.object_state(Response(), limit=12)) == "{'text': 'yy..."
+
+
+def test_log_sampled_respects_rate():
+    log, messages = plain_logger('test.sampled')
+    assert not logutil.log_sampled(log, logging.INFO, 'item', rate=0)
+    assert logutil.log_sampled(log, logging.INFO, 'item %d', 1, rate=1)
+    assert not logutil.log_sampled(log, logging.DEBUG, 'hidden', rate=1)
+    assert messages == ['item 1']
+
+
+def test_log_rate_limited_reports_suppressed_records(monkeypatch):
+    log, messages = plain_logger('test.rate_limited')
+    now = [100.0]
+    monkeypatch.setattr(logutil.time, 'monotonic', lambda: now[0])
+    for _ in range(3):
+        logutil.log_rate_limited(log, logging.WARNING, 'jira-429', 60, 'Jira throttled %s', 'ABC')
+    now[0] += 61
+    logutil.log_rate_limited(log, logging.WARNING, 'jira-429', 60, 'Jira throttled %s', 'ABC')
+    assert messages == ['Jira throttled ABC', 'Jira throttled ABC (2 similar record(s) suppressed)']
+
+
+def test_json_formatter_includes_context_and_timings():
+    record = make_record('Loaded %s', 'ABC-1')
+    record.context = {'request_id': 'req-1', 'timings': {'jira': 0.01234}}
+    line = json.loads(logutil.JsonFormatter().format(record))
+    assert line['message'] == 'Loaded ABC-1'
+    assert line['request_id'] == 'req-1'
+    assert line['upstream_ms'] == {'jira': 12.3}
+
+
+def _write_records(path, worker, count):
+    handler = logutil.CompressingRotatingFileHandler(path, maxBytes=4000, backupCount=100000, compression='gzip')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for n in range(count):
+        handler.emit(make_record('worker %d record %d', worker, n))
+    logutil._compressor.wait()
+    handler.close()
+
+
+def test_rotation_across_processes_loses_no_records(tmp_path):
+    path = str(tmp_path / 'app.log')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_write_records, args=(path, w, 1000)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    lines = []
+    segments = sorted(p for p in tmp_path.iterdir() if p.name.startswith('app.log.') and p.suffix == '.gz')
+    assert len(segments) > 10
+    for segment in segments:
+        with gzip.open(segment, 'rt') as fh:
+            lines += fh.read().splitlines()
+    lines += (tmp_path / 'app.log').read_text().splitlines()
+    expected = {f'worker {w} record {n}' for w in range(4) for n in range(1000)}
+    assert len(lines) == len(expected) and set(lines) == expected
+    # Every rotated segment was compressed exactly once
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith('app.log.2')
+                and p.suffix not in ('.gz', '.lock')]
@@ -0,0 +1,40 @@
+from markup import markdown_to_html, render_inline
+
+
+def test_paragraph_lines_keep_line_breaks():
+    assert markdown_to_html('first\nsecond') == 'first<br>\nsecond'
+    assert markdown_to_html('') == ''
+
+
+def test_inline_formatting():
+    assert render_inline('**bold** and *italic*') == '<strong>bold</strong> and <em>italic</em>'
+    assert render_inline('[docs](https://example.com)') == '<a href="https://example.com">docs</a>'
+
+
+def test_code_spans_stay_literal():
+    assert markdown_to_html('use `*x* <b>` here') == 'use <code>*x* &lt;b&gt;</code> here'
+
+
+def test_flat_lists():
+    assert markdown_to_html('1. a\n2. b') == '<ol>\n<li>a<br></li>\n<li>b</li>\n</ol>'
+
+
+def test_nested_list_is_placed_inside_its_parent_item():
+    assert markdown_to_html('- one\n- two\n  - nested\n- three') == (
+        '<ul>\n<li>one<br></li>\n<li>two<br>\n<ul>\n<li>nested<br></li>\n</ul>\n</li>\n<li>three</li>\n</ul>')
+
+
+def test_list_type_change_closes_the_list():
+    assert markdown_to_html('- a\n1. b') == '<ul>\n<li>a<br></li>\n</ul>\n<ol>\n<li>b</li>\n</ol>'
+
+
+def test_headings_have_no_line_break():
+    assert markdown_to_html('## Steps ##\ntext') == '<h2>Steps</h2>\ntext'
+
+
+def test_fenced_code_is_escaped_and_not_formatted():
+    assert markdown_to_html('```\n*x* <y>\n```\nafter') == '<pre><code>*x* &lt;y&gt;</code></pre>\nafter'
+
+
+def test_unclosed_fence_is_closed_at_the_end():
+    assert markdown_to_html('```\ncode') == '<pre><code>code</code></pre>'
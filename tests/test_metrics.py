@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+
+from metrics import ProcessAggregator, Registry, merge_snapshots, render_prometheus
+
+
+def make_registry():
+    registry = Registry()
+    registry.counter('http_requests_total', 'Requests', ('route',)).inc(2, route='/select')
+    registry.gauge('http_in_flight', 'In flight').inc()
+    registry.histogram('jira_seconds', 'Jira latency', buckets=(0.1, 1.0)).observe(0.5)
+    return registry
+
+
+def values(snapshot, name):
+    return snapshot[name]['values']
+
+
+def test_exposition_format():
+    registry = Registry()
+    registry.counter('events_total', 'Events\nby kind', ('kind',)).inc(3, kind='say "hi"\\')
+    registry.histogram('jira_seconds', 'Jira latency', buckets=(0.1, 1.0)).observe(0.5)
+    assert render_prometheus(registry.snapshot()).splitlines() == [
+        '# HELP events_total Events by kind',
+        '# TYPE events_total counter',
+        'events_total{kind="say \\"hi\\"\\\\"} 3',
+        '# HELP jira_seconds Jira latency',
+        '# TYPE jira_seconds histogram',
+        'jira_seconds_bucket{le="0.1"} 0',
+        'jira_seconds_bucket{le="1.0"} 1',
+        'jira_seconds_bucket{le="+Inf"} 1',
+        'jira_seconds_sum 0.5',
+        'jira_seconds_count 1',
+    ]
+
+
+def test_merge_sums_counters_gauges_and_histograms():
+    merged = merge_snapshots([make_registry().snapshot(), make_registry().snapshot()])
+    assert values(merged, 'http_requests_total') == [{'labels': {'route': '/select'}, 'value': 4.0}]
+    assert values(merged, 'http_in_flight')[0]['value'] == 2.0
+    histogram = values(merged, 'jira_seconds')[0]
+    assert (histogram['count'], histogram['sum']) == (2, 1.0)
+    assert histogram['buckets'] == {'0.1': 0, '1.0': 2, '+Inf': 2}
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_collect_merges_worker_files(tmp_path):
+    live = make_registry()
+    aggregator = ProcessAggregator(live, str(tmp_path))
+    # Another live worker (our parent) and one that has exited
+    with open(tmp_path / f'metrics-{os.getppid()}.json', 'w') as f:
+        json.dump(make_registry().snapshot(), f)
+    dead = exited_pid()
+    with open(tmp_path / f'metrics-{dead}.json', 'w') as f:
+        json.dump(make_registry().snapshot(), f)
+
+    merged = aggregator.collect()
+    assert values(merged, 'http_requests_total')[0]['value'] == 6.0
+    # Gauges of exited workers no longer count
+    assert values(merged, 'http_in_flight')[0]['value'] == 2.0
+    assert not (tmp_path / f'metrics-{dead}.json').exists()
+    assert (tmp_path / ProcessAggregator.ARCHIVE).exists()
+
+    # The archived counters are kept on later scrapes
+    assert values(aggregator.collect(), 'http_requests_total')[0]['value'] == 6.0
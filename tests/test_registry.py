@@ -0,0 +1,45 @@
+import sys
+
+import pytest
+
+from ai import registry
+from ai.fake_ai import FakeAIChat
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    monkeypatch.setattr(registry, '_REGISTRY', dict(registry._REGISTRY))
+    monkeypatch.setattr(registry, '_loaded', {})
+    monkeypatch.setattr(registry, '_stats', {})
+
+
+def test_target_must_name_a_class():
+    with pytest.raises(ValueError):
+        registry.register_provider('broken', 'ai.fake_ai')
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        registry.get_provider('nope')
+
+
+def test_provider_module_is_imported_on_first_use(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'json.tool', raising=False)
+    registry.register_provider('lazy', 'json.tool:main')
+    assert 'json.tool' not in sys.modules
+    registry.get_provider('LAZY')
+    assert 'json.tool' in sys.modules
+
+
+def test_default_provider_comes_from_environment(monkeypatch):
+    monkeypatch.setenv('AI_PROVIDER', ' Fake ')
+    assert isinstance(registry.create_chat('key'), FakeAIChat)
+
+
+def test_stats_count_client_construction():
+    registry.create_chat('key', 'fake')
+    registry.create_chat('key', 'fake')
+    registry.record_import('fake', 0.5)
+    stats = registry.provider_stats()['fake']
+    assert stats['inits'] == 2
+    assert stats['import_seconds'] >= 0.5
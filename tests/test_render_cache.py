@@ -0,0 +1,66 @@
+from render_cache import RenderCache
+
+OLD = '2026-01-01T10:00:00.000+0000'
+NEW = '2026-01-01T11:00:00.000+0000'
+
+
+class Counter:
+    """Converter that records how often it ran."""
+
+    __name__ = 'upper'
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, content):
+        self.calls += 1
+        return content.upper()
+
+
+def test_unchanged_issue_is_converted_once():
+    cache, convert = RenderCache(), Counter()
+    for _ in range(3):
+        assert cache.render('site', 'ABC-1', 'description', 'text', convert, updated=OLD) == 'TEXT'
+    assert convert.calls == 1
+
+
+def test_newer_timestamp_evicts_the_old_version():
+    cache, convert = RenderCache(), Counter()
+    cache.render('site', 'ABC-1', 'description', 'text', convert, updated=OLD)
+    assert cache.render('site', 'ABC-1', 'description', 'edited', convert, updated=NEW) == 'EDITED'
+    assert convert.calls == 2
+
+
+def test_older_timestamp_does_not_evict():
+    cache, convert = RenderCache(), Counter()
+    cache.render('site', 'ABC-1', 'description', 'edited', convert, updated=NEW)
+    # A stale search page still carries the old version
+    assert cache.render('site', 'ABC-1', 'description', 'text', convert, updated=OLD) == 'TEXT'
+    assert cache.render('site', 'ABC-1', 'description', 'edited', convert, updated=NEW) == 'EDITED'
+    assert convert.calls == 2
+
+
+def test_timezones_are_compared_as_instants():
+    cache, convert = RenderCache(), Counter()
+    cache.render('site', 'ABC-1', 'description', 'edited', convert, updated='2026-01-01T12:00:00.000+0200')
+    # 11:00 UTC is later than 10:00 UTC even though it sorts lower as text
+    cache.render('site', 'ABC-1', 'description', 'latest', convert, updated='2026-01-01T11:00:00.000+0000')
+    cache.render('site', 'ABC-1', 'description', 'edited', convert, updated='2026-01-01T12:00:00.000+0200')
+    assert convert.calls == 3
+
+
+def test_content_hash_is_used_without_timestamp():
+    cache, convert = RenderCache(), Counter()
+    cache.render('site', 'ABC-1', 'description', 'text', convert)
+    cache.render('site', 'ABC-1', 'description', 'text', convert)
+    cache.render('site', 'ABC-1', 'description', 'other', convert)
+    assert convert.calls == 2
+
+
+def test_size_limit_drops_least_recently_used():
+    cache, convert = RenderCache(max_entries=2), Counter()
+    for key in ('ABC-1', 'ABC-2', 'ABC-3'):
+        cache.render('site', key, 'description', 'text', convert, updated=OLD)
+    cache.render('site', 'ABC-1', 'description', 'text', convert, updated=OLD)
+    assert convert.calls == 4
+    assert cache.stats()['entries'] == 2
@@ -0,0 +1,40 @@
+import pytest
+
+from scenario_store import SCENARIOS, TEST_CASES, ScenarioStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ScenarioStore(str(tmp_path / 'scenarios.db'))
+
+
+def test_latest_returns_newest_generation_of_kind(store):
+    store.record('https://jira.example', 'ABC-1', SCENARIOS, 'ann', ['first'])
+    store.record('https://jira.example', 'ABC-1', SCENARIOS, 'bob', ['second'], prompt='shorter')
+    store.record('https://jira.example', 'ABC-1', TEST_CASES, 'ann', [{'title': 'case'}])
+
+    latest = store.latest('https://jira.example', 'ABC-1')
+    assert latest['items'] == ['second']
+    assert latest['prompt'] == 'shorter'
+    assert store.latest('https://jira.example', 'ABC-1', owner='ann')['items'] == ['first']
+    assert store.latest('https://jira.example', 'ABC-1', TEST_CASES)['items'] == [{'title': 'case'}]
+
+
+def test_ticket_keys_are_scoped_by_site(store):
+    store.record('https://jira.example', 'ABC-1', SCENARIOS, 'ann', ['ours'])
+    assert store.latest('https://other.example', 'ABC-1') is None
+
+
+def test_history_pages_newest_first(store):
+    for i in range(5):
+        store.record('site', 'ABC-1', SCENARIOS, 'ann', [f'v{i}'])
+
+    first, cursor = store.history('site', 'ABC-1', limit=3)
+    rest, end = store.history('site', 'ABC-1', before=cursor, limit=3)
+    assert [e['items'][0] for e in first + rest] == ['v4', 'v3', 'v2', 'v1', 'v0']
+    assert end is None
+
+
+def test_unknown_kind_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.record('site', 'ABC-1', 'notes', 'ann', [])
@@ -0,0 +1,66 @@
+import datetime
+import pickle
+
+import pytest
+
+import session_serializer
+from session_serializer import SessionSerializer, describe
+
+VALUE = {'jira_url': 'https://jira.example', 'results': [{'key': 'ABC-1', 'points': 3.5, 'done': False}],
+         'empty': None}
+
+
+@pytest.mark.parametrize('encoding', ['msgpack', 'json'])
+def test_round_trip(monkeypatch, encoding):
+    if encoding == 'json':
+        monkeypatch.setattr(session_serializer, 'msgpack', None)
+    serializer = SessionSerializer()
+    data = serializer.dumps(VALUE)
+    assert describe(data) == encoding
+    assert serializer.loads(data) == VALUE
+
+
+@pytest.mark.parametrize('encoding', ['msgpack', 'json'])
+def test_tuples_come_back_as_lists(monkeypatch, encoding):
+    if encoding == 'json':
+        monkeypatch.setattr(session_serializer, 'msgpack', None)
+    serializer = SessionSerializer()
+    assert serializer.loads(serializer.dumps({'pair': ('a', 1)})) == {'pair': ['a', 1]}
+
+
+@pytest.mark.parametrize('compression', ['zstd', 'zlib'])
+def test_large_values_are_compressed(monkeypatch, compression):
+    if compression == 'zlib':
+        monkeypatch.setattr(session_serializer, 'zstandard', None)
+    serializer = SessionSerializer(compress_min_bytes=100)
+    value = {'description': 'As a user I want to log in. ' * 200}
+    data = serializer.dumps(value)
+    assert describe(data) == f'msgpack+{compression}'
+    assert len(data) < 1000
+    assert serializer.loads(data) == value
+
+
+def test_unsupported_types_fall_back_to_pickle():
+    serializer = SessionSerializer()
+    value = {'when': datetime.date(2026, 1, 2)}
+    data = serializer.dumps(value)
+    assert describe(data) == 'pickle'
+    assert serializer.loads(data) == value
+
+
+def test_legacy_pickled_rows_are_read():
+    data = pickle.dumps({'old': ('row',)}, protocol=2)
+    assert describe(data) == 'pickle (legacy)'
+    assert SessionSerializer().loads(data) == {'old': ('row',)}
+
+
+def test_digest_ignores_compression_settings():
+    value = {'description': 'x' * 5000}
+    fmt, payload = SessionSerializer().encode(value)
+    other_fmt, other_payload = SessionSerializer(compress_min_bytes=10 ** 9).encode(value)
+    assert SessionSerializer.digest(fmt, payload) == SessionSerializer.digest(other_fmt, other_payload)
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        SessionSerializer().loads(b'\x09\x10')
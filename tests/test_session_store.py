@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from flask import Flask, jsonify, session
+
+from session_store import SqliteSessionInterface
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SqliteSessionInterface(str(tmp_path / 'sessions.db'), cleanup_interval=0)
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = store
+
+    @app.route('/set')
+    def set_values():
+        session['jira_url'] = 'https://jira.example'
+        session['search_results'] = [{'key': 'ABC-1'}]
+        return ''
+
+    @app.route('/url')
+    def url():
+        return jsonify(session.get('jira_url'))
+
+    @app.route('/append')
+    def append():
+        session['search_results'].append({'key': 'ABC-2'})
+        return ''
+
+    @app.route('/results')
+    def results():
+        return jsonify(session.get('search_results'))
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return ''
+
+    return app.test_client()
+
+
+def stored_keys(store):
+    return {key for key, in store.db.connect().execute('SELECT key FROM session_items')}
+
+
+def test_values_persist_and_load_lazily(client, store, monkeypatch):
+    client.get('/set')
+    loaded = []
+    original = store.load_value
+    monkeypatch.setattr(store, 'load_value', lambda sid, key: loaded.append(key) or original(sid, key))
+
+    assert client.get('/url').get_json() == 'https://jira.example'
+    assert loaded == ['jira_url']
+
+
+def test_in_place_mutation_is_saved(client):
+    client.get('/set')
+    client.get('/append')
+    assert client.get('/results').get_json() == [{'key': 'ABC-1'}, {'key': 'ABC-2'}]
+
+
+def test_unchanged_keys_are_not_rewritten(client, store):
+    client.get('/set')
+    conn = store.db.connect()
+    conn.execute("UPDATE session_items SET value = ? WHERE key = 'search_results'",
+                 (store.serializer.dumps([{'key': 'SENTINEL'}]),))
+    client.get('/url')
+    client.get('/append')
+    # Only the appended list was written back; the read-only request left it alone
+    assert client.get('/results').get_json() == [{'key': 'SENTINEL'}, {'key': 'ABC-2'}]
+
+
+def test_cleared_session_is_deleted(client, store):
+    client.get('/set')
+    assert stored_keys(store) == {'jira_url', 'search_results'}
+    client.get('/logout')
+    assert stored_keys(store) == set()
+    assert client.get('/url').get_json() is None
+
+
+def test_expired_sessions_are_removed(client, store):
+    client.get('/set')
+    store.db.connect().execute('UPDATE sessions SET expires = ?', (time.time() - 1,))
+    assert client.get('/url').get_json() is None
+    assert store.delete_expired() == 1
+    assert stored_keys(store) == set()
@@ -0,0 +1,63 @@
+import datetime
+import time
+
+import pytest
+
+from shared_cache import SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / 'cache.db'), evict_interval=0)
+
+
+def test_values_round_trip_until_expiry(cache):
+    cache.set('issue:ABC-1', {'key': 'ABC-1', 'fields': {'summary': 'Login'}}, ttl=60)
+    assert cache.get('issue:ABC-1') == {'key': 'ABC-1', 'fields': {'summary': 'Login'}}
+
+    cache.set('issue:ABC-2', 'soon gone', ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('issue:ABC-2') is None
+
+
+def test_values_needing_pickle_are_not_cached(cache):
+    cache.set('issue:ABC-1', {'due': datetime.date(2026, 1, 2)}, ttl=60)
+    assert cache.get('issue:ABC-1') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_tag_invalidates_every_copy(cache):
+    cache.set('issue:ABC-1', 1, ttl=60, tag='ABC-1')
+    cache.set('search:project=ABC', 2, ttl=60, tag='ABC-1')
+    cache.set('issue:ABC-2', 3, ttl=60, tag='ABC-2')
+    assert cache.invalidate_tag('ABC-1') == 2
+    assert cache.get('issue:ABC-2') == 3
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SharedCache(str(tmp_path / 'cache.db'), max_bytes=2000, evict_interval=0)
+    for i in range(10):
+        cache.set(f'issue:{i}', 'x' * 300, ttl=60)
+    assert cache.stats()['bytes'] <= 2000
+    assert cache.get('issue:9') is not None
+    assert cache.get('issue:0') is None
+
+
+def test_loader_result_is_cached_only_when_cacheable(cache):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return None
+
+    cache.get_or_load('issue:ABC-1', 60, load)
+    cache.get_or_load('issue:ABC-1', 60, load)
+    assert len(calls) == 2
+    assert cache.get_or_load('issue:ABC-2', 60, lambda: 'ok') == 'ok'
+    assert cache.get_or_load('issue:ABC-2', 60, lambda: 'reloaded') == 'ok'
+
+
+def test_disabled_cache_always_misses(tmp_path):
+    cache = SharedCache(str(tmp_path / 'cache.db'), enabled=False)
+    cache.set('issue:ABC-1', 1, ttl=60)
+    assert cache.get('issue:ABC-1') is None
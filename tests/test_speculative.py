@@ -0,0 +1,49 @@
+import threading
+
+from ai.speculative import SpeculativeGenerator
+
+
+def test_result_is_handed_out_once():
+    generator = SpeculativeGenerator()
+    assert generator.submit('alice', 'ABC-1', 'story', lambda: ['scenario'])
+    assert generator.take('alice', 'ABC-1', 'story', timeout=5) == ['scenario']
+    assert generator.take('alice', 'ABC-1', 'story', timeout=5) is None
+
+
+def test_changed_description_or_other_owner_gets_nothing():
+    generator = SpeculativeGenerator()
+    generator.submit('alice', 'ABC-1', 'story', lambda: ['scenario'])
+    assert generator.take('bob', 'ABC-1', 'story', timeout=5) is None
+    assert generator.take('alice', 'ABC-1', 'edited story', timeout=5) is None
+    assert generator.take('alice', 'ABC-1', ' story ', timeout=5) == ['scenario']
+
+
+def test_new_selection_cancels_queued_job():
+    release = threading.Event()
+    generator = SpeculativeGenerator(max_workers=1)
+    # Occupy the only worker so the next job stays queued
+    generator.submit('bob', 'ABC-9', 'busy', release.wait)
+    generator.submit('alice', 'ABC-1', 'story', lambda: ['old'])
+    generator.submit('alice', 'ABC-2', 'story', lambda: ['new'])
+    release.set()
+    assert generator.take('alice', 'ABC-1', 'story', timeout=5) is None
+    assert generator.take('alice', 'ABC-2', 'story', timeout=5) == ['new']
+
+
+def test_submissions_beyond_max_pending_are_refused():
+    release = threading.Event()
+    generator = SpeculativeGenerator(max_workers=1, max_pending=2)
+    assert generator.submit('a', 'ABC-1', 'x', release.wait)
+    assert generator.submit('b', 'ABC-2', 'x', release.wait)
+    assert not generator.submit('c', 'ABC-3', 'x', release.wait)
+    release.set()
+
+
+def test_failed_job_falls_back_to_normal_generation():
+    generator = SpeculativeGenerator()
+
+    def fail():
+        raise RuntimeError('boom')
+
+    generator.submit('alice', 'ABC-1', 'story', fail)
+    assert generator.take('alice', 'ABC-1', 'story', timeout=5) is None
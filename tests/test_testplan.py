@@ -0,0 +1,74 @@
+import pytest
+
+# Imported under another name so pytest does not try to collect it
+from testplan import DEFAULT_TEMPLATE, TestPlan as Plan, update_scenarios
+
+PLAN = (
+    "Intro line\n"
+    "Testing Environment URL: https://qa.example.com\n"
+    "\n"
+    "**Permissions:** admin\n"
+    "## Test Scenarios:\n"
+    "\n"
+    "1. Old scenario\n"
+    "2. Verify: numbered with colon\n"
+    "- Verify login: ok\n"
+    "https://wiki.example.com/page\n"
+    "Some note with more than six words before the colon: kept\n"
+    "\n"
+    "Approved By: QA Lead\n"
+)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    DEFAULT_TEMPLATE,
+    PLAN,
+    "no headings at all\n\n",
+    "Test Scenarios: \n1. a\n10. b\r\nApproved By:",
+    "Label : value\n   indented: line\n\n\n",
+])
+def test_parse_serialize_is_identity(text):
+    assert Plan.parse(text).serialize() == text
+
+
+def test_headings_and_scenarios():
+    plan = Plan.parse(PLAN)
+    assert plan.headings() == ["Testing Environment URL", "Permissions", "Test Scenarios", "Approved By"]
+    assert [s.text for s in plan.scenarios] == ["Old scenario", "Verify: numbered with colon"]
+
+
+def test_set_scenarios_stops_at_first_unnumbered_line_with_colon():
+    plan = Plan.parse(PLAN)
+    assert plan.set_scenarios(["- New one", "2. New two"])
+    assert plan.section("Test Scenarios").body == [
+        "", "1. New one", "2. New two", "",
+        "- Verify login: ok",
+        "https://wiki.example.com/page",
+        "Some note with more than six words before the colon: kept",
+        "",
+    ]
+    assert plan.section("Approved By").header_line == "Approved By: QA Lead"
+    assert plan.changed_sections(Plan.parse(PLAN)) == ["Test Scenarios"]
+
+
+def test_set_scenarios_replaces_unnumbered_lines_without_colon():
+    plan = Plan.parse("Test Scenarios:\n1. a\n- stray bullet\nplain prose\n\nApproved By:")
+    plan.set_scenarios(["b"])
+    assert plan.serialize() == "Test Scenarios:\n\n1. b\n\nApproved By:"
+
+
+def test_set_scenarios_is_unchanged_for_same_list():
+    text = update_scenarios(PLAN, ["x", "y"])
+    assert not Plan.parse(text).set_scenarios(["x", "y"])
+
+
+def test_missing_section_is_inserted_before_approved_by():
+    text = update_scenarios("Navigation: menu\n\nApproved By: \n", ["x"])
+    assert text == "Navigation: menu\n\nTest Scenarios: \n\n1. x\n\nApproved By: \n"
+
+
+def test_empty_content_uses_template():
+    plan = Plan.parse(update_scenarios("", ["x"]))
+    assert [s.text for s in plan.scenarios] == ["x"]
+    assert plan.headings() == Plan.template().headings()